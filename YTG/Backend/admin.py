@@ -7,7 +7,12 @@ admin.site.register(models.Card)
 admin.site.register(models.Booster)
 admin.site.register(models.Order)
 admin.site.register(models.OrderItem)
+admin.site.register(models.StockHold)
+admin.site.register(models.IdempotencyKey)
 admin.site.register(models.PointTransaction)
 admin.site.register(models.TournamentResult)
 admin.site.register(models.Reward)
 admin.site.register(models.RewardRedemption)
+admin.site.register(models.MonthlyRanking)
+admin.site.register(models.TournamentImportJob)
+admin.site.register(models.LedgerSnapshot)
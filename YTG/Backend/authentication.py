@@ -0,0 +1,121 @@
+"""
+Lightweight JWT authentication for read endpoints.
+
+JWTAuthentication loads the UserProfile row on every request. Views that
+only read on behalf of the caller can use StatelessJWTAuthentication instead.
+It takes the user id from the validated token and reads the row through a
+small per-process cache kept for TOKEN_USER_CACHE_SECONDS, so a busy user
+costs one query per process per TTL instead of one per request.
+
+Access tokens live long and cannot be revoked, so nothing that grants access
+is taken from their claims: whether the user still exists and is active, and
+their staff and superuser flags, always come from the cached row. A user who
+is deactivated or demoted loses access within the TTL. Balances and profile
+fields can be up to that old as well; views that write through request.user,
+or that need a current balance to make a decision, keep the default
+authentication.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from django.utils.translation import gettext as _
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from . import models
+
+# Seconds a loaded user row is reused by this process
+ROW_TTL = getattr(settings, 'TOKEN_USER_CACHE_SECONDS', 10)
+
+# Rows kept per process; the cache is emptied when full
+MAX_CACHED_ROWS = 10000
+
+_rows = {}
+_rows_lock = threading.Lock()
+
+
+def load_row(user_id):
+    """
+    Return a copy of the UserProfile row of `user_id`, from the process cache while fresh.
+    Raises AuthenticationFailed if the user no longer exists or is inactive.
+    """
+    now = time.monotonic()
+    with _rows_lock:
+        cached = _rows.get(user_id)
+    if cached is None or cached[0] <= now:
+        row = models.UserProfile.objects.filter(id=user_id).first()
+        if row is None:
+            raise exceptions.AuthenticationFailed(_('User not found'), code='user_not_found')
+        cached = (now + ROW_TTL, row)
+        with _rows_lock:
+            if len(_rows) >= MAX_CACHED_ROWS:
+                _rows.clear()
+            _rows[user_id] = cached
+    if not cached[1].is_active:
+        raise exceptions.AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    # Callers get their own instance; the cached one is shared between requests
+    return copy.copy(cached[1])
+
+
+def forget(user_id=None):
+    """Drop the cached row of `user_id`, or every cached row."""
+    with _rows_lock:
+        if user_id is None:
+            _rows.clear()
+        else:
+            _rows.pop(user_id, None)
+
+
+class LazyTokenUser(TokenUser):
+    """A token-backed user whose attributes, beyond its id, are read from the cached UserProfile row."""
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the id claim as a string
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def row(self):
+        return load_row(self.id)
+
+    # Claims are a snapshot from login; access and privileges follow the row
+    @property
+    def username(self):
+        return self.row.username
+
+    @property
+    def is_active(self):
+        return self.row.is_active
+
+    @property
+    def is_staff(self):
+        return self.row.is_staff
+
+    @property
+    def is_superuser(self):
+        return self.row.is_superuser
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name == 'token':
+            raise AttributeError(name)
+        return getattr(self.row, name)
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication returning a LazyTokenUser backed by the per-process row cache."""
+
+    def get_user(self, validated_token):
+        try:
+            int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        user = LazyTokenUser(validated_token)
+        # Rejects deleted and deactivated users, like JWTAuthentication does
+        user.row
+        return user
@@ -0,0 +1,267 @@
+"""
+Micro-benchmarks for hot write and read paths, run with
+`python manage.py benchmark <name>` against the configured database.
+
+Each benchmark runs inside a transaction that is rolled back at the end, so
+the synthetic rows it creates never persist. Benchmarks return a list of
+(label, seconds, operations) tuples that the command prints as ops/second.
+"""
+import random
+import string
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from . import authentication
+from . import models
+from . import orders
+from . import revocation
+from . import search
+from . import serializers
+from . import views
+
+BENCHMARKS = {}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def benchmark(name):
+    """Register a benchmark function under `name`."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return the elapsed wall time in seconds."""
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def run(name, size):
+    """Run a registered benchmark with rollback and return its measurements."""
+    measurements = []
+    try:
+        with transaction.atomic():
+            measurements = BENCHMARKS[name](size)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    return measurements
+
+
+def _bench_user(username='bench-user', **extra):
+    return models.UserProfile.objects.create_user(username=username, password='BenchPass123', nickname=username, **extra)
+
+
+@benchmark('point_ids')
+def point_transaction_ids(size):
+    """PointTransaction inserts with the legacy lookup-per-ID generator vs ULIDs."""
+    user = _bench_user()
+
+    def legacy_generate_id(length=7):
+        # Previous generator: random 7-char IDs checked against the table
+        while True:
+            candidate = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
+            if not models.PointTransaction.objects.filter(id=candidate).exists():
+                return candidate
+
+    def insert_legacy():
+        for _ in range(size):
+            models.PointTransaction.objects.create(id=legacy_generate_id(), user=user, points=1, description='bench')
+
+    def insert_ulid():
+        for _ in range(size):
+            models.PointTransaction.objects.create(user=user, points=1, description='bench')
+
+    def bulk_insert_ulid():
+        models.PointTransaction.objects.bulk_create(
+            [models.PointTransaction(user=user, points=1, description='bench') for _ in range(size)],
+            batch_size=1000,
+        )
+
+    return [
+        ('legacy random id + exists()', timed(insert_legacy), size),
+        ('ulid, one insert per row', timed(insert_ulid), size),
+        ('ulid, bulk_create', timed(bulk_insert_ulid), size),
+    ]
+
+
+@benchmark('create_order')
+def create_order_carts(size):
+    """Order creation for 50-item carts: legacy per-item queries vs the batched transaction."""
+    user = _bench_user()
+    models.Card.objects.bulk_create([
+        models.Card(name=f'Bench card {i}', price=1, stock=10 ** 6, card_code=f'BCH-{i:03d}', rarity='common')
+        for i in range(25)
+    ])
+    models.Booster.objects.bulk_create([
+        models.Booster(name=f'Bench booster {i}', price=5, stock=10 ** 6, booster_code=f'BB-{i:03d}')
+        for i in range(25)
+    ])
+    # bulk_create does not return ids on every backend
+    card_ids = list(models.Card.objects.filter(card_code__startswith='BCH-').values_list('id', flat=True))
+    booster_ids = list(models.Booster.objects.filter(booster_code__startswith='BB-').values_list('id', flat=True))
+    cart = [{'product_type': 'card', 'product_id': i, 'quantity': 2} for i in card_ids]
+    cart += [{'product_type': 'booster', 'product_id': i, 'quantity': 1} for i in booster_ids]
+
+    def legacy_create_order(items):
+        # Previous view body: one lookup, save and insert per item, no transaction
+        order = models.Order.objects.create(user=user, total_price=0)
+        total_price = 0
+        for item in items:
+            model = models.Card if item['product_type'] == 'card' else models.Booster
+            product = model.objects.get(id=item['product_id'])
+            price = product.price * item['quantity']
+            total_price += price
+            product.stock -= item['quantity']
+            product.save()
+            models.OrderItem.objects.create(order=order, product_type=item['product_type'],
+                                            product_id=item['product_id'], quantity=item['quantity'], price=price)
+        order.total_price = total_price
+        order.save()
+
+    def legacy():
+        for _ in range(size):
+            legacy_create_order(cart)
+
+    def batched():
+        for _ in range(size):
+            orders.create_order(user, cart)
+
+    return [
+        (f'legacy, {len(cart)}-item carts', timed(legacy), size),
+        (f'batched, {len(cart)}-item carts', timed(batched), size),
+    ]
+
+
+@benchmark('search')
+def catalog_search(size):
+    """Ranked catalog search over `size` synthetic cards (try --size 200000): LIKE '%word%' vs the trigram index."""
+    rng = random.Random(size)
+    # A few very common words plus a long tail of pronounceable ones, like real card names
+    common = ['dragon', 'the', 'of', 'dark', 'magician', 'knight', 'hero', 'blue', 'eyes', 'white']
+    vocabulary = common + [
+        ''.join(rng.choice('bcdfghklmnprstvz') + rng.choice('aeiou') for _ in range(rng.randint(2, 4)))
+        for _ in range(20000)
+    ]
+    rarities = ['common', 'rare', 'super rare', 'ultra rare']
+    names = [' '.join(rng.sample(vocabulary, rng.randint(2, 4))) for _ in range(size)]
+    for start in range(0, size, 5000):
+        models.Card.objects.bulk_create([
+            models.Card(name=name, price=1, stock=1, card_code=f'S{i // 100:03d}-{i % 100:03d}', rarity=rng.choice(rarities))
+            for i, name in enumerate(names[start:start + 5000], start)
+        ])
+
+    # Two words of an existing name, the second with a typo (one letter dropped)
+    queries = []
+    for name in rng.sample(names, 50):
+        first, second = name.split()[:2]
+        cut = rng.randrange(len(second))
+        queries.append(f'{first} {second[:cut]}{second[cut + 1:]}')
+
+    def like():
+        # Ranking needs every row matching any word; typos are simply missed
+        for query in queries:
+            words = query.split()
+            matches = Q()
+            for word in words:
+                matches |= Q(name__icontains=word)
+            rows = models.Card.objects.filter(matches).values_list('id', 'name')
+            sorted(rows, key=lambda row: -sum(word in row[1].lower() for word in words))[:20]
+
+    def trigram():
+        for query in queries:
+            search.search(query, [models.Card], limit=20)
+
+    return [
+        (f'index {size} cards', timed(search.reindex, models.Card, 5000), size),
+        ("ranked LIKE '%word%' queries", timed(like), len(queries)),
+        ('trigram index queries', timed(trigram), len(queries)),
+    ]
+
+
+@benchmark('jwt_reads')
+def authenticated_reads(size):
+    """Authenticated read endpoints: JWTAuthentication (user row per request) vs StatelessJWTAuthentication."""
+    user = _bench_user(point=100)
+    models.PointTransaction.objects.bulk_create(
+        [models.PointTransaction(user=user, points=1, description='bench') for _ in range(50)]
+    )
+    token = serializers.CustomTokenObtainPairSerializer.get_token(user).access_token
+    factory = APIRequestFactory()
+    endpoints = [
+        ('point history', views.PointTransactionHistoryAPIView, reverse('point_transaction_history')),
+        ('reward list', views.RewardListAPIView, reverse('reward_list')),
+    ]
+
+    def requests(view):
+        for _ in range(size):
+            response = view(factory.get(path, HTTP_AUTHORIZATION=f'Bearer {token}'))
+            assert response.status_code == 200, response.status_code
+
+    measurements = []
+    for label, view_class, path in endpoints:
+        for auth_label, auth_class in (('JWTAuthentication', JWTAuthentication),
+                                       ('stateless', authentication.StatelessJWTAuthentication)):
+            # Throttling is left out: it would cap the run and weighs the same on both sides
+            view = view_class.as_view(authentication_classes=[auth_class], throttle_classes=[])
+            authentication.forget()
+            measurements.append((f'{label}, {auth_label}', timed(requests, view), size))
+    return measurements
+
+
+@benchmark('token_refresh')
+def token_refresh(size):
+    """Rotating token refreshes over `size` blacklisted tokens: simplejwt blacklist join vs the revocation filter."""
+    user = _bench_user()
+    now = aware_utcnow()
+    for start in range(0, size, 5000):
+        count = min(5000, size - start)
+        OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=user, jti=f'bench-{start + i}', token='', created_at=now, expires_at=now + timedelta(days=1))
+            for i in range(count)
+        ])
+    # bulk_create does not return ids on every backend
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=token_id) for token_id in OutstandingToken.objects.filter(jti__startswith='bench-').values_list('id', flat=True)],
+        batch_size=5000,
+    )
+    refreshes = 200
+
+    def rotate(serializer_class):
+        token = str(revocation.RefreshToken.for_user(user))
+        for _ in range(refreshes):
+            serializer = serializer_class(data={'refresh': token})
+            serializer.is_valid(raise_exception=True)
+            token = serializer.validated_data['refresh']
+
+    def build():
+        checks = 0
+        while not revocation.ready():
+            revocation.is_revoked('')
+            checks += 1
+        return checks
+
+    revocation.reset()
+    simplejwt = timed(rotate, TokenRefreshSerializer)
+    # Built once per process, one chunk per check, then kept current from the blacklist tail
+    started = time.perf_counter()
+    checks = build()
+    return [
+        (f'simplejwt blacklist, {size} revoked', simplejwt, refreshes),
+        (f'build revocation filter, {size} revoked', time.perf_counter() - started, checks),
+        (f'revocation filter, {size} revoked', timed(rotate, serializers.RevocationTokenRefreshSerializer), refreshes),
+    ]
@@ -0,0 +1,140 @@
+"""
+Public catalog browsing for Card and Booster.
+
+Query parameters map onto the composite indexes declared on the models:
+(rarity, price) and (card_code, version) for cards, (booster_code, version)
+for boosters, and price for price-sorted browsing. Pages are keyset
+paginated with a unique id tie-break, so deep pages cost the same as the first.
+
+Catalog responses are cached per path and query string under a catalog-wide
+version counter in the Django cache. Any committed Card or Booster write bumps
+the counter (Backend.signals for saves and deletes, orders.decrement_stock for
+set-based stock updates), so every cached page turns stale at once. Each cached
+payload carries a strong ETag derived from the ids and updated_at of its rows.
+
+The version bump only reaches other processes through a shared cache backend.
+With a per-process backend (the LocMemCache default), other workers keep
+serving their copies, so those are cached for LOCAL_CACHE_TIMEOUT seconds only.
+"""
+import hashlib
+import random
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext as _
+
+# ?ordering= value -> keyset ordering
+ORDERINGS = {
+    'id': ['id'],
+    '-id': ['-id'],
+    'price': ['price', 'id'],
+    '-price': ['-price', '-id'],
+}
+
+# Exact-match filters per model
+CARD_FILTERS = ['rarity', 'card_code', 'version']
+BOOSTER_FILTERS = ['booster_code', 'version']
+
+# Seconds a cached response lives without any catalog write, with a shared cache
+SHARED_CACHE_TIMEOUT = 600
+
+# Seconds a cached response lives when other workers cannot see invalidations
+LOCAL_CACHE_TIMEOUT = 15
+
+# Cache backends whose contents, version counter included, are private to one process
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_timeout(shared_timeout):
+    """
+    Seconds to keep a cached value that writers invalidate through the cache:
+    `shared_timeout` on a shared backend, LOCAL_CACHE_TIMEOUT when invalidations
+    stay in the writing process.
+    """
+    if settings.CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return min(shared_timeout, LOCAL_CACHE_TIMEOUT)
+    return shared_timeout
+
+
+CACHE_TIMEOUT = cache_timeout(SHARED_CACHE_TIMEOUT)
+
+VERSION_KEY = 'catalog_version'
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+class CatalogFilterError(ValueError):
+    pass
+
+
+def _price(params, name):
+    try:
+        return Decimal(params[name])
+    except (InvalidOperation, ValueError):
+        raise CatalogFilterError(_('Invalid price filter'))
+
+
+def filter_products(queryset, params, exact_fields):
+    """Apply catalog query parameters to a Card or Booster queryset."""
+    for field in exact_fields:
+        value = params.get(field)
+        if value:
+            queryset = queryset.filter(**{field: value})
+
+    if params.get('min_price'):
+        queryset = queryset.filter(price__gte=_price(params, 'min_price'))
+    if params.get('max_price'):
+        queryset = queryset.filter(price__lte=_price(params, 'max_price'))
+
+    in_stock = params.get('in_stock', '').lower()
+    if in_stock in TRUE_VALUES:
+        queryset = queryset.filter(stock__gt=0)
+    elif in_stock in FALSE_VALUES:
+        queryset = queryset.filter(stock__lte=0)
+    elif in_stock:
+        raise CatalogFilterError(_('Invalid in_stock filter'))
+    return queryset
+
+
+def get_ordering(params):
+    ordering = ORDERINGS.get(params.get('ordering', 'id'))
+    if ordering is None:
+        raise CatalogFilterError(_('Invalid ordering'))
+    return ordering
+
+
+def _current_version():
+    # A lost counter restarts from a random value so old entries never look current
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, random.getrandbits(48), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    """Make every cached catalog response stale. Call after the write has committed."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, random.getrandbits(48), None)
+
+
+def cache_key(request):
+    """Cache key for a catalog GET: path and sorted query string under the current version."""
+    query = '&'.join(f'{name}={value}' for name, values in sorted(request.query_params.lists()) for value in values)
+    digest = hashlib.sha1(f'{request.path}?{query}'.encode()).hexdigest()
+    return f'catalog:{_current_version()}:{digest}'
+
+
+def etag(products):
+    """Strong ETag over the identity and updated_at of the products in a response."""
+    digest = hashlib.sha1()
+    for product in products:
+        digest.update(f'{product._meta.model_name}:{product.pk}:{product.updated_at.isoformat()};'.encode())
+    return f'"{digest.hexdigest()}"'
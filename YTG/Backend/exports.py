@@ -0,0 +1,124 @@
+"""
+Streaming ledger exports for accounting.
+
+An export reads one ledger table in (date, id) order, in keyset chunks of
+CHUNK_SIZE value tuples on the export indexes, and encodes them into CSV or
+NDJSON blocks as it goes. At most one chunk and one output block are held in
+memory, however many rows the date range covers.
+
+Chunks are seeked rather than read through a single QuerySet.iterator():
+MySQL's driver buffers a whole result set on the client, so one long query
+would grow with the table there.
+"""
+import csv
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import filters
+from . import models
+from . import pagination
+
+# Rows read per query, and lines per streamed block
+CHUNK_SIZE = 2000
+
+# Export name -> (model, date field, exported fields)
+EXPORTS = {
+    'point_transactions': (
+        models.PointTransaction, 'created_at',
+        ['id', 'user_id', 'user__username', 'points', 'description', 'created_at'],
+    ),
+    'tournament_results': (
+        models.TournamentResult, 'created_at',
+        ['id', 'user_id', 'user__username', 'tournament_name', 'position', 'point_earned', 'ranking_point_earned', 'created_at'],
+    ),
+    'reward_redemptions': (
+        models.RewardRedemption, 'redeemed_at',
+        ['id', 'user_id', 'user__username', 'reward_id', 'reward__name', 'reward__cost', 'status', 'redeemed_at'],
+    ),
+}
+
+# File format -> content type
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def columns(kind):
+    """Column names of an export: its fields with lookups flattened, e.g. user__username -> user_username."""
+    return [field.replace('__', '_') for field in EXPORTS[kind][2]]
+
+
+def rows(kind, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Yield the value tuples of an export with its date in [since, until), oldest first."""
+    model, date_field, fields = EXPORTS[kind]
+    ordering = [date_field, 'id']
+    key = [fields.index(field) for field in ordering]
+    queryset = filters.filter_created(model.objects.all(), since, until, field=date_field).order_by(*ordering).values_list(*fields)
+    last = None
+    while True:
+        chunk = queryset.filter(pagination.keyset_filter(ordering, last)) if last else queryset
+        chunk = list(chunk[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last = [chunk[-1][index] for index in key]
+
+
+def _plain(row):
+    # Full-precision ISO timestamps; DjangoJSONEncoder would truncate them to milliseconds
+    return [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(header, values):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in values:
+        yield writer.writerow(_plain(row))
+
+
+def _ndjson_lines(header, values):
+    for row in values:
+        yield json.dumps(dict(zip(header, _plain(row))), cls=DjangoJSONEncoder) + '\n'
+
+
+ENCODERS = {
+    'csv': _csv_lines,
+    'ndjson': _ndjson_lines,
+}
+
+
+def encode(file_format, header, values, block_size=CHUNK_SIZE):
+    """Encode rows lazily into text blocks of up to `block_size` lines each."""
+    block = []
+    for line in ENCODERS[file_format](header, values):
+        block.append(line)
+        if len(block) >= block_size:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
+
+
+def stream(kind, file_format, since=None, until=None, chunk_size=CHUNK_SIZE):
+    """Text blocks of an export in `file_format`, read and encoded chunk by chunk."""
+    return encode(file_format, columns(kind), rows(kind, since, until, chunk_size), chunk_size)
+
+
+def filename(kind, file_format, since=None, until=None):
+    parts = [kind]
+    if since:
+        parts.append(since.date().isoformat())
+    if until:
+        # The upper bound is exclusive; name the file after the last day it covers
+        parts.append((until - datetime.timedelta(microseconds=1)).date().isoformat())
+    return '_'.join(parts) + f'.{file_format}'
@@ -0,0 +1,46 @@
+"""
+Query parameter parsing shared by list and export endpoints.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _parse_bound(value, end=False):
+    # Dates first: parse_datetime() also accepts a bare date, as midnight
+    day = parse_date(value)
+    if day is not None:
+        # A bare date covers the whole day
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+        if end:
+            # Exclusive upper bound just past the given instant
+            moment += timedelta(microseconds=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def date_range(start=None, end=None):
+    """
+    Parse inclusive ISO date or datetime bounds into (start, end_exclusive)
+    aware datetimes; missing bounds stay None. Raises ValueError on bad input.
+    """
+    since = _parse_bound(start) if start else None
+    until = _parse_bound(end, end=True) if end else None
+    if since and until and since >= until:
+        raise ValueError(end)
+    return since, until
+
+
+def filter_created(queryset, since, until, field='created_at'):
+    """Restrict a queryset to rows with `field` in [since, until)."""
+    if since:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
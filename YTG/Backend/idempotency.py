@@ -0,0 +1,109 @@
+"""
+Idempotency-Key support for write endpoints.
+
+A client that may retry a write sends a unique Idempotency-Key header. The
+first request with a key claims it by inserting an IdempotencyKey row, runs the
+view and stores the rendered response, all in one transaction. A retry with the
+same key gets the stored response back without running the view again; a
+concurrent duplicate blocks on the key's unique index until the first request
+commits and is then answered the same way. Reusing a key for a different
+request is rejected with 422.
+
+Keys expire after KEY_TTL. Expired keys are ignored and can be claimed again;
+purge_expired() (the purge_idempotency_keys command) deletes them.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import models
+
+HEADER = 'Idempotency-Key'
+
+# How long a stored response is replayed
+KEY_TTL = timedelta(hours=24)
+
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path} {body}'.encode()).hexdigest()
+
+
+def _claim(user, scope, key, fingerprint):
+    """Insert the key row, replacing an expired one. Returns (record, claimed)."""
+    now = timezone.now()
+    for _attempt in range(2):
+        try:
+            with transaction.atomic():
+                record = models.IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, request_hash=fingerprint,
+                    status_code=status.HTTP_202_ACCEPTED, expires_at=now + KEY_TTL,
+                )
+            return record, True
+        except IntegrityError:
+            record = models.IdempotencyKey.objects.get(user=user, scope=scope, key=key)
+            if record.expires_at > now:
+                return record, False
+            record.delete()
+    raise IntegrityError(key)
+
+
+def idempotent(scope):
+    """
+    Decorate an APIView post() so requests carrying an Idempotency-Key are
+    executed at most once per user, scope and key.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return method(view, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response({'message': _('Idempotency-Key is too long')}, status=status.HTTP_400_BAD_REQUEST)
+
+            fingerprint = request_hash(request)
+            with transaction.atomic():
+                record, claimed = _claim(request.user, scope, key, fingerprint)
+                if not claimed:
+                    if record.request_hash != fingerprint:
+                        return Response(
+                            {'message': _('Idempotency-Key was already used for a different request')},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        )
+                    return Response(record.response, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+                response = method(view, request, *args, **kwargs)
+                if response.status_code >= 500:
+                    # Not a final answer: let the client retry with the same key
+                    record.delete()
+                    return response
+                record.status_code = response.status_code
+                # Stored as rendered, so a replay is byte-for-byte the same JSON
+                record.response = json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+                record.save(update_fields=['status_code', 'response'])
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired keys in primary-key batches. Returns the number deleted."""
+    purged = 0
+    now = timezone.now()
+    while True:
+        ids = list(models.IdempotencyKey.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        models.IdempotencyKey.objects.filter(id__in=ids).delete()
+        purged += len(ids)
@@ -0,0 +1,215 @@
+"""
+Streaming tournament imports.
+
+Exports from the pairing software are read row by row from CSV or NDJSON,
+validated, and written in fixed-size chunks through the set-based bulk
+ingestion (tournaments.ingest_results), so memory stays bounded by the chunk
+size rather than the file size. Progress and per-row errors are recorded on a
+models.TournamentImportJob that clients can poll.
+
+Each chunk commits together with the job's progress, and that save refreshes
+the job's updated_at as its heartbeat. A job still pending or running with no
+heartbeat for STALE_AFTER has lost its worker (background imports run in a
+daemon thread that dies with its process). recover_stale(), run by the
+recover_tournament_imports command, resumes such a job from its stored file
+after the rows already processed, or fails it when it has no stored file.
+"""
+import csv
+import io
+import itertools
+import json
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import models
+from . import serializers
+from . import tournaments
+
+# Errors kept on the job row; error_count still counts every failed row
+MAX_REPORTED_ERRORS = 1000
+
+# Time without a heartbeat after which a pending or running job is presumed orphaned
+STALE_AFTER = timedelta(minutes=getattr(settings, 'TOURNAMENT_IMPORT_STALE_MINUTES', 10))
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename):
+    """Guess the import format from a file name, defaulting to CSV."""
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def iter_rows(fileobj, file_format):
+    """
+    Yield (index, row) pairs from a binary file object without reading it whole.
+    `row` is a dict, or None when the line could not be decoded.
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(text)
+            if not reader.fieldnames or 'username' not in reader.fieldnames:
+                raise ImportFormatError('CSV header must include a username column')
+            for index, row in enumerate(reader):
+                yield index, row
+        elif file_format == 'ndjson':
+            index = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield index, row if isinstance(row, dict) else None
+                index += 1
+        else:
+            raise ImportFormatError(f'Unsupported format: {file_format}')
+    finally:
+        # Leave the underlying file to its owner
+        text.detach()
+
+
+def _clean_row(row):
+    """Validate a raw row with the bulk item serializer. Returns (data, error message)."""
+    if row is None:
+        return None, 'Malformed row'
+    data = {key: value for key, value in row.items() if value not in (None, '')}
+    serializer = serializers.TournamentBulkItemSerializer(data=data)
+    if not serializer.is_valid():
+        return None, '; '.join(
+            f'{field}: {" ".join(str(error) for error in errors)}' for field, errors in serializer.errors.items()
+        )
+    return serializer.validated_data, None
+
+
+def process_rows(job, rows):
+    """
+    Process (index, row) pairs for a job in chunks, recording progress after each chunk.
+    Rows the job has already processed are skipped.
+    """
+    chunk = []
+    for index, row in itertools.islice(rows, job.rows_processed, None):
+        chunk.append((index, row))
+        if len(chunk) >= job.chunk_size:
+            _process_chunk(job, chunk)
+            chunk = []
+    if chunk:
+        _process_chunk(job, chunk)
+
+
+@transaction.atomic
+def _process_chunk(job, chunk):
+    # Results and progress commit together, so a resumed job neither skips nor repeats rows
+    errors = []
+    valid = []
+    for index, row in chunk:
+        data, error = _clean_row(row)
+        if error:
+            errors.append({'index': index, 'username': (row or {}).get('username'), 'error': error})
+        else:
+            valid.append((index, data))
+
+    imported = 0
+    if valid:
+        results, ingest_errors = tournaments.ingest_results(job.tournament_name, [data for _index, data in valid])
+        imported = len(results)
+        for error in ingest_errors:
+            # Map positions inside the chunk back to rows of the file
+            error['index'] = valid[error['index']][0]
+        errors.extend(ingest_errors)
+        errors.sort(key=lambda error: error['index'])
+
+    job.rows_processed += len(chunk)
+    job.rows_imported += imported
+    job.error_count += len(errors)
+    room = MAX_REPORTED_ERRORS - len(job.errors)
+    if room > 0:
+        job.errors.extend(errors[:room])
+    job.save(update_fields=['rows_processed', 'rows_imported', 'error_count', 'errors', 'updated_at'])
+
+
+def run_import(job, fileobj=None):
+    """Run an import job to completion. Reads `fileobj` if given, else the job's stored source."""
+    job.status = 'running'
+    job.save(update_fields=['status', 'updated_at'])
+    try:
+        if fileobj is not None:
+            process_rows(job, iter_rows(fileobj, job.file_format))
+        else:
+            with job.source.open('rb') as source:
+                process_rows(job, iter_rows(source, job.file_format))
+    except (ImportFormatError, UnicodeDecodeError, csv.Error, OSError) as exc:
+        job.status = 'failed'
+        job.message = str(exc)
+    else:
+        job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+    return job
+
+
+def _run_job(job_id):
+    try:
+        run_import(models.TournamentImportJob.objects.get(id=job_id))
+    except Exception as exc:
+        models.TournamentImportJob.objects.filter(id=job_id).update(
+            status='failed', message=str(exc), finished_at=timezone.now()
+        )
+
+
+def _run_in_background(job_id):
+    try:
+        _run_job(job_id)
+    finally:
+        # The thread owns its own connection
+        connection.close()
+
+
+def start_import(job):
+    """
+    Schedule a stored import job. Runs in a background thread once the job is
+    committed, or inline when TOURNAMENT_IMPORT_ASYNC is disabled.
+    """
+    if getattr(settings, 'TOURNAMENT_IMPORT_ASYNC', True):
+        transaction.on_commit(
+            lambda: threading.Thread(target=_run_in_background, args=(job.id,), daemon=True).start()
+        )
+    else:
+        run_import(job)
+
+
+def recover_stale():
+    """
+    Resume, in this process, the pending or running jobs whose heartbeat is
+    older than STALE_AFTER. Jobs without a stored file cannot be resumed and
+    are failed. Returns (resumed, failed) job counts.
+    """
+    resumed = failed = 0
+    stale = models.TournamentImportJob.objects.filter(
+        status__in=['pending', 'running'], updated_at__lt=timezone.now() - STALE_AFTER
+    ).order_by('id')
+    for job in stale:
+        # Claim the job; a concurrent sweep or a late heartbeat from its worker wins instead
+        claimed = models.TournamentImportJob.objects.filter(
+            id=job.id, status=job.status, updated_at=job.updated_at
+        ).update(updated_at=timezone.now())
+        if not claimed:
+            continue
+        if not job.source:
+            models.TournamentImportJob.objects.filter(id=job.id).update(
+                status='failed', message='Import stopped with no stored file to resume from', finished_at=timezone.now()
+            )
+            failed += 1
+            continue
+        _run_job(job.id)
+        resumed += 1
+    return resumed, failed
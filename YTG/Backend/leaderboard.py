@@ -0,0 +1,159 @@
+"""
+Order-statistics index over the monthly ranking.
+
+SortedScoreIndex is a small in-process stand-in for a Redis sorted set: score
+updates keep a sorted list of scores so rank and percentile lookups are a
+bisect instead of a COUNT(*) over every user with more points.
+
+Indexes are built lazily per (year, month) from models.MonthlyRanking and kept
+in step by ranking.record_results(). A version counter in the Django cache is
+bumped on every committed write so workers that did not see the write rebuild
+their copy on the next lookup. That only reaches other workers when the cache
+is shared (Redis, Memcached, database); with the default per-process
+LocMemCache they never see the bump, so every copy is also rebuilt once it is
+MAX_AGE seconds old, which bounds how stale another worker's ranks can be.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from . import models
+
+# Number of months kept in memory per process
+MAX_INDEXES = 12
+
+# Seconds an index is served before being rebuilt from the database, whatever its version
+MAX_AGE = 60
+
+
+class SortedScoreIndex:
+    def __init__(self, items=()):
+        self._scores = dict(items)
+        self._sorted = sorted(self._scores.values())
+        self._distinct = sorted(set(self._sorted))
+
+    def __len__(self):
+        return len(self._scores)
+
+    def score(self, member):
+        return self._scores.get(member)
+
+    def incr(self, member, delta):
+        old = self._scores.get(member)
+        if old is not None:
+            self._discard(old)
+        new = (old or 0) + delta
+        self._scores[member] = new
+        insort(self._sorted, new)
+        position = bisect_left(self._distinct, new)
+        if position == len(self._distinct) or self._distinct[position] != new:
+            self._distinct.insert(position, new)
+        return new
+
+    def rank(self, member):
+        """Dense rank (1 = best) of a member, or None if it has no score."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return len(self._distinct) - bisect_right(self._distinct, score) + 1
+
+    def percentile(self, member):
+        """Share of members (in %) scoring less than or equal to this member."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return round(100.0 * bisect_right(self._sorted, score) / len(self._sorted), 2)
+
+    def _discard(self, score):
+        position = bisect_left(self._sorted, score)
+        del self._sorted[position]
+        if position == len(self._sorted) or self._sorted[position] != score:
+            del self._distinct[bisect_left(self._distinct, score)]
+
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # (year, month) -> (version, built_at, SortedScoreIndex)
+
+
+def _version_key(year, month):
+    return f'leaderboard_version:{year}:{month}'
+
+
+def _current_version(year, month):
+    # A lost counter (cache flush, eviction) restarts from a random value so
+    # copies built against the old counter can never look current again.
+    version = cache.get(_version_key(year, month))
+    if version is None:
+        cache.add(_version_key(year, month), random.getrandbits(48), None)
+        version = cache.get(_version_key(year, month))
+    return version
+
+
+def _bump_version(year, month):
+    try:
+        return cache.incr(_version_key(year, month))
+    except ValueError:
+        cache.add(_version_key(year, month), random.getrandbits(48), None)
+        return None
+
+
+def get_index(year, month):
+    """Return an up-to-date SortedScoreIndex for a month, rebuilding it if stale."""
+    version = _current_version(year, month)
+    now = time.monotonic()
+    with _lock:
+        cached = _indexes.get((year, month))
+        if cached and cached[0] == version and now - cached[1] < MAX_AGE:
+            _indexes.move_to_end((year, month))
+            return cached[2]
+
+    rows = models.MonthlyRanking.objects.filter(year=year, month=month).values_list('user_id', 'ranking_earned')
+    index = SortedScoreIndex(rows.iterator(chunk_size=2000))
+    with _lock:
+        _indexes[(year, month)] = (version, now, index)
+        _indexes.move_to_end((year, month))
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def apply_deltas(year, month, deltas):
+    """
+    Apply committed ranking point deltas ({user_id: delta}) to the local index.
+    The local copy is patched in place only if no other worker wrote in between;
+    otherwise it is dropped and rebuilt on the next lookup.
+    """
+    new_version = _bump_version(year, month)
+    with _lock:
+        cached = _indexes.get((year, month))
+        if cached is None:
+            return
+        if new_version is None or cached[0] != new_version - 1:
+            del _indexes[(year, month)]
+            return
+        _version, built_at, index = cached
+        for user_id, delta in deltas.items():
+            index.incr(user_id, delta)
+        # Patching keeps the build time: writes of other workers may still be missing
+        _indexes[(year, month)] = (new_version, built_at, index)
+
+
+def invalidate(year, month):
+    """Force every worker to rebuild the month's index on the next lookup."""
+    _bump_version(year, month)
+    with _lock:
+        _indexes.pop((year, month), None)
+
+
+def lookup(year, month, user_id):
+    """
+    Return (ranking_earned, rank, percentile, total_ranked) for a user.
+    ranking_earned, rank and percentile are None if the user has no result that month.
+    """
+    index = get_index(year, month)
+    with _lock:
+        return index.score(user_id), index.rank(user_id), index.percentile(user_id), len(index)
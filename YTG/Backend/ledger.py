@@ -0,0 +1,77 @@
+"""
+Point ledger service.
+
+Every change to UserProfile.point / ranking_point goes through here. Balances
+are changed with a single UPDATE ... SET point = point + delta instead of a
+read-modify-write in Python, so concurrent admin actions cannot lose updates,
+and only the balance columns are written. The matching ledger row
+(PointTransaction or TournamentResult) is written in the same transaction.
+
+Note that the in-memory user instance passed in is not refreshed; call
+refresh_from_db() before reading its balance, and never save() a stale
+instance over it.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from . import models
+from . import ranking
+
+
+class InsufficientPoints(Exception):
+    pass
+
+
+def adjust_points(user, points, description='', require_balance=False):
+    """
+    Apply a spendable point delta to a user and record it as a PointTransaction.
+    With require_balance, a debit only applies if the balance covers it,
+    otherwise InsufficientPoints is raised and nothing is written.
+    """
+    with transaction.atomic():
+        users = models.UserProfile.objects.filter(pk=user.pk)
+        if require_balance and points < 0:
+            users = users.filter(point__gte=-points)
+        if not users.update(point=F('point') + points):
+            raise InsufficientPoints(user.pk)
+        return models.PointTransaction.objects.create(user=user, points=points, description=description)
+
+
+def credit_tournament_result(user, tournament_name, position, point_earned=0, ranking_point_earned=0):
+    """Record a single tournament result and credit its points and ranking points."""
+    with transaction.atomic():
+        result = models.TournamentResult.objects.create(
+            user=user,
+            tournament_name=tournament_name,
+            position=position,
+            point_earned=point_earned,
+            ranking_point_earned=ranking_point_earned
+        )
+        if point_earned or ranking_point_earned:
+            models.UserProfile.objects.filter(pk=user.pk).update(
+                point=F('point') + point_earned,
+                ranking_point=F('ranking_point') + ranking_point_earned,
+            )
+        ranking.record_results([result])
+    return result
+
+
+def _delta_case(deltas):
+    return Case(
+        *[When(id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+        default=Value(0),
+    )
+
+
+def apply_bulk_deltas(point_deltas, ranking_deltas):
+    """
+    Apply per-user deltas ({user_id: delta}) to point and ranking_point with one
+    UPDATE. Must run inside the transaction that writes the matching ledger rows.
+    """
+    user_ids = set(point_deltas) | set(ranking_deltas)
+    if not user_ids:
+        return 0
+    return models.UserProfile.objects.filter(id__in=user_ids).update(
+        point=F('point') + _delta_case(point_deltas),
+        ranking_point=F('ranking_point') + _delta_case(ranking_deltas),
+    )
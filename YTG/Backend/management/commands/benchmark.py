@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend import benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Run a micro-benchmark against the configured database. Synthetic rows are rolled back.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Benchmark to run; omit to list them')
+        parser.add_argument('--size', type=int, default=1000, help='Number of operations or rows')
+
+    def handle(self, *args, **options):
+        name = options['name']
+        if not name:
+            for registered, func in sorted(benchmarks.BENCHMARKS.items()):
+                self.stdout.write(f'{registered}: {func.__doc__.strip()}')
+            return
+        if name not in benchmarks.BENCHMARKS:
+            raise CommandError(f'Unknown benchmark: {name}')
+
+        for label, seconds, operations in benchmarks.run(name, options['size']):
+            rate = operations / seconds if seconds else float('inf')
+            self.stdout.write(f'{label:<45} {operations:>8} ops {seconds:>9.3f}s {rate:>12.1f} ops/s')
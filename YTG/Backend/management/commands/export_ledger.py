@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend import exports
+from Backend import filters
+from Backend import ranking
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream a ledger table (PointTransaction, TournamentResult or RewardRedemption rows) as CSV '
+        'or NDJSON, oldest first, reading it in keyset chunks so memory stays flat.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument('--format', dest='file_format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', help='First day or instant to include (ISO)')
+        parser.add_argument('--to', dest='end', help='Last day or instant to include (ISO)')
+        parser.add_argument('--month', help='Calendar month to export, as YYYY-MM')
+        parser.add_argument('--output', help='File to write instead of stdout')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE, help='Rows per query')
+
+    def handle(self, *args, **options):
+        try:
+            if options['month']:
+                year, month = options['month'].split('-')
+                since, until = ranking.month_bounds(int(year), int(month))
+            else:
+                since, until = filters.date_range(options['start'], options['end'])
+        except ValueError:
+            raise CommandError('Invalid date range')
+
+        blocks = exports.stream(options['kind'], options['file_format'], since, until, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                for block in blocks:
+                    output.write(block)
+        else:
+            for block in blocks:
+                self.stdout.write(block, ending='')
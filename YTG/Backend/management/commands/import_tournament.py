@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend import imports
+from Backend import models
+
+
+class Command(BaseCommand):
+    help = 'Import tournament results from a CSV or NDJSON export, streaming it in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (username,position,point_earned,ranking_point_earned) or NDJSON file')
+        parser.add_argument('--name', required=True, help='Tournament name')
+        parser.add_argument('--format', choices=[choice for choice, _label in models.Import_Format_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        job = models.TournamentImportJob.objects.create(
+            tournament_name=options['name'],
+            file_format=options['format'] or imports.detect_format(options['path']),
+            chunk_size=options['chunk_size'],
+        )
+        try:
+            source = open(options['path'], 'rb')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with source:
+            job = imports.run_import(job, fileobj=source)
+
+        for error in job.errors:
+            self.stderr.write(f"row {error['index']}: {error.get('username')}: {error['error']}")
+        if job.status == 'failed':
+            raise CommandError(f'Import {job.id} failed: {job.message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Import {job.id}: {job.rows_imported} of {job.rows_processed} rows imported, {job.error_count} errors'
+        ))
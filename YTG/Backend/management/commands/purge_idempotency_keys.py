@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Backend import idempotency
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency keys. Run periodically (e.g. hourly from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = idempotency.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {purged} expired idempotency keys'))
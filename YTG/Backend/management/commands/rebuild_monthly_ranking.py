@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Backend import ranking
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly ranking table from tournament result history.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Only rebuild this year (requires --month)')
+        parser.add_argument('--month', type=int, help='Only rebuild this month (requires --year)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        year = options.get('year')
+        month = options.get('month')
+        if bool(year) != bool(month):
+            raise CommandError('--year and --month must be given together')
+        if year and month:
+            try:
+                ranking.month_bounds(year, month)
+            except ValueError:
+                raise CommandError('Invalid year or month')
+
+        written = ranking.rebuild(year=year, month=month, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt monthly ranking: {written} rows written'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Backend import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the catalog search index, e.g. after bulk imports that bypass model signals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        for model in search.SEARCH_FIELDS:
+            indexed = search.reindex(model, batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} {model._meta.verbose_name_plural}'))
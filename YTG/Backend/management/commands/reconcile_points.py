@@ -0,0 +1,36 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from Backend import reconciliation
+
+REPORT_FIELDS = ['user_id', 'username', 'stored_point', 'ledger_point', 'stored_ranking_point', 'ledger_ranking_point', 'repaired']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare stored point balances against the PointTransaction / TournamentResult ledger '
+        'and print a CSV diff report. Schedule with --snapshot so later runs only scan new ledger rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repair', action='store_true', help='Correct drifted balances')
+        parser.add_argument('--snapshot', action='store_true', help='Store ledger totals for later runs')
+        parser.add_argument('--full', action='store_true', help='Ignore snapshots and scan all history')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users per chunk')
+
+    def handle(self, *args, **options):
+        writer = csv.DictWriter(self.stdout, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        drifted = 0
+        for diff in reconciliation.reconcile(
+            chunk_size=options['chunk_size'],
+            repair=options['repair'],
+            take_snapshot=options['snapshot'],
+            full=options['full'],
+        ):
+            writer.writerow(diff)
+            drifted += 1
+
+        summary = f'{drifted} drifted balances' + (' repaired' if options['repair'] and drifted else '')
+        self.stderr.write(self.style.SUCCESS(summary) if not drifted or options['repair'] else self.style.WARNING(summary))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Backend import imports
+
+
+class Command(BaseCommand):
+    help = (
+        'Resume tournament imports whose worker stopped without finishing, or fail them when they '
+        'have no stored file. Run periodically (e.g. every few minutes from cron).'
+    )
+
+    def handle(self, *args, **options):
+        resumed, failed = imports.recover_stale()
+        self.stdout.write(self.style.SUCCESS(f'Resumed {resumed} stale imports, failed {failed}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from Backend import reservations
+
+
+class Command(BaseCommand):
+    help = 'Delete expired checkout stock holds. Run periodically (e.g. every minute from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        purged = reservations.purge_expired(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {purged} expired holds'))
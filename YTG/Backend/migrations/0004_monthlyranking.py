@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum, Window
+from django.db.models.functions import DenseRank, TruncMonth
+from django.utils import timezone
+
+
+def populate_monthly_ranking(apps, schema_editor):
+    TournamentResult = apps.get_model('Backend', 'TournamentResult')
+    MonthlyRanking = apps.get_model('Backend', 'MonthlyRanking')
+
+    aggregated = TournamentResult.objects.annotate(period=TruncMonth('created_at')).values('period', 'user_id').annotate(
+        ranking_earned=Sum('ranking_point_earned')
+    ).order_by()
+    rows = []
+    for row in aggregated.iterator():
+        period = timezone.localtime(row['period']) if timezone.is_aware(row['period']) else row['period']
+        rows.append(MonthlyRanking(user_id=row['user_id'], year=period.year, month=period.month, ranking_earned=row['ranking_earned'] or 0))
+    MonthlyRanking.objects.bulk_create(rows, batch_size=1000)
+
+    months = MonthlyRanking.objects.values_list('year', 'month').distinct()
+    for year, month in list(months):
+        ranked = MonthlyRanking.objects.filter(year=year, month=month).annotate(
+            new_rank=Window(expression=DenseRank(), order_by=F('ranking_earned').desc())
+        )
+        updated = []
+        for row in ranked:
+            row.rank = row.new_rank
+            updated.append(row)
+        MonthlyRanking.objects.bulk_update(updated, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0003_alter_userprofile_nickname'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('ranking_earned', models.IntegerField(default=0)),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month', 'rank'], name='monthly_ranking_rank_idx')],
+                'unique_together': {('year', 'month', 'user')},
+            },
+        ),
+        migrations.RunPython(populate_monthly_ranking, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0004_monthlyranking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyranking',
+            index=models.Index(fields=['year', 'month', '-ranking_earned', 'user'], name='monthly_ranking_seek_idx'),
+        ),
+    ]
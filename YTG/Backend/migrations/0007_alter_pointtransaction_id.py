@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:23
+
+import Backend.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0006_tournamentimportjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pointtransaction',
+            name='id',
+            field=models.CharField(default=Backend.models.generate_id, editable=False, max_length=26, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_content_type(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    OrderItem = apps.get_model('Backend', 'OrderItem')
+    for product_type in ('card', 'booster'):
+        content_type, _created = ContentType.objects.get_or_create(app_label='Backend', model=product_type)
+        OrderItem.objects.filter(product_type=product_type, content_type__isnull=True).update(content_type=content_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0008_ledgersnapshot_pointbalancesnapshot'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='content_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['content_type', 'product_id', 'order'], name='orderitem_product_idx'),
+        ),
+        migrations.RunPython(fill_content_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0009_orderitem_content_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booster',
+            index=models.Index(fields=['booster_code', 'version'], name='booster_code_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booster',
+            index=models.Index(fields=['price'], name='booster_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['rarity', 'price'], name='card_rarity_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['card_code', 'version'], name='card_code_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['price'], name='card_price_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:35
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of Backend.search.trigrams as of this migration, so later changes
+# to the search code cannot alter what this migration writes
+def trigrams(text):
+    grams = set()
+    for word in re.sub(r'[^0-9a-z]+', ' ', text.lower()).split():
+        padded = f' {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def index_catalog(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    SearchEntry = apps.get_model('Backend', 'SearchEntry')
+    SearchTrigram = apps.get_model('Backend', 'SearchTrigram')
+    for model_name, code_field in (('card', 'card_code'), ('booster', 'booster_code')):
+        content_type, _created = ContentType.objects.get_or_create(app_label='Backend', model=model_name)
+        Product = apps.get_model('Backend', model_name)
+        for object_id, name, code in Product.objects.values_list('id', 'name', code_field).iterator():
+            text = ' '.join(str(value or '') for value in (name, code))
+            grams = trigrams(text)
+            entry = SearchEntry.objects.create(content_type=content_type, object_id=object_id, text=text, trigram_count=len(grams))
+            SearchTrigram.objects.bulk_create([SearchTrigram(entry=entry, content_type=content_type, trigram=gram) for gram in grams])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0010_catalog_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('text', models.CharField(max_length=512)),
+                ('trigram_count', models.PositiveIntegerField(default=0)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('content_type', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to='Backend.searchentry')),
+            ],
+            options={
+                'unique_together': {('trigram', 'content_type', 'entry')},
+            },
+        ),
+        migrations.RunPython(index_catalog, migrations.RunPython.noop),
+    ]
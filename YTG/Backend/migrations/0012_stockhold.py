@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0011_catalog_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_type', models.CharField(max_length=50)),
+                ('product_id', models.IntegerField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_type', 'product_id', 'expires_at'], name='stockhold_product_idx'), models.Index(fields=['expires_at'], name='stockhold_expiry_idx')],
+                'unique_together': {('user', 'product_type', 'product_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0013_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rewardredemption',
+            index=models.Index(fields=['status', 'redeemed_at'], name='redemption_queue_idx'),
+        ),
+    ]
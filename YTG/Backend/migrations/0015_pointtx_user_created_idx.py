@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0014_redemption_queue_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['user', 'created_at'], name='pointtx_user_created_idx'),
+        ),
+    ]
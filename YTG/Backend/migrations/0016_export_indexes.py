@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0015_pointtx_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pointtransaction',
+            index=models.Index(fields=['created_at', 'id'], name='pointtx_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rewardredemption',
+            index=models.Index(fields=['redeemed_at', 'id'], name='redemption_redeemed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentresult',
+            index=models.Index(fields=['created_at', 'id'], name='result_created_idx'),
+        ),
+    ]
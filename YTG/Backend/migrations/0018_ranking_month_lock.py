@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0017_user_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'unique_together': {('year', 'month')},
+            },
+        ),
+    ]
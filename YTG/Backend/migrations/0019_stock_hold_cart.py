@@ -0,0 +1,22 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0018_ranking_month_lock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockHoldCart',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hold_cart', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('started_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_content_type(apps, schema_editor):
+    # Lines written without a content type since 0009 are filled before the column becomes required
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    OrderItem = apps.get_model('Backend', 'OrderItem')
+    for product_type in ('card', 'booster'):
+        content_type, _created = ContentType.objects.get_or_create(app_label='Backend', model=product_type)
+        OrderItem.objects.filter(product_type=product_type, content_type__isnull=True).update(content_type=content_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Backend', '0019_stock_hold_cart'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_content_type, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='content_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='contenttypes.contenttype'),
+        ),
+    ]
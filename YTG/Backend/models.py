@@ -1,18 +1,47 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
-import random
-import string
+import os
+import threading
+import time
 
-def generate_id(length=7):
-    """Generate a random alphanumeric ID of specified length."""
-    while True:
-        id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-        if not PointTransaction.objects.filter(id=id).exists():
-            return id
+# Crockford base32, as used by ULIDs
+ID_ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+ID_LENGTH = 26
+
+_id_lock = threading.Lock()
+_last_id = [0, 0] # [timestamp_ms, randomness] of the last generated ID
+
+def generate_id():
+    """
+    Generate a ULID: 48-bit millisecond timestamp followed by 80 random bits,
+    encoded as 26 Crockford base32 characters. IDs sort by creation time and are
+    collision-safe without a database lookup; within the same millisecond the
+    random part is incremented so IDs from one process stay strictly increasing.
+    """
+    with _id_lock:
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp <= _last_id[0]:
+            timestamp = _last_id[0]
+            randomness = _last_id[1] + 1
+            if randomness >= 1 << 80:
+                timestamp += 1
+                randomness = int.from_bytes(os.urandom(10), 'big')
+        else:
+            randomness = int.from_bytes(os.urandom(10), 'big')
+        _last_id[0], _last_id[1] = timestamp, randomness
+
+    value = (timestamp << 80) | randomness
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, digit = divmod(value, 32)
+        chars.append(ID_ALPHABET[digit])
+    return ''.join(reversed(chars))
 
 
 Rarity_CHOICES = [
@@ -40,6 +69,18 @@ Rarity_CHOICES = [
     ('holographic rare', 'Holographic Rare'),
 ]
 
+Import_Status_CHOICES = [
+    ('pending', 'Pending'), #Job created, waiting to be processed
+    ('running', 'Running'),
+    ('completed', 'Completed'), #All rows processed, some may have failed
+    ('failed', 'Failed'), #Import aborted, e.g. unreadable file
+]
+
+Import_Format_CHOICES = [
+    ('csv', 'CSV'),
+    ('ndjson', 'NDJSON'),
+]
+
 Status_CHOICES = [
     ('pending', 'Pending'), #User created order, waiting for confirmation
     ('confirmed', 'Confirmed'), #Admin confirmed the order
@@ -73,10 +114,24 @@ class Card(Product):
     version = models.CharField(max_length=255, default='v1')
     rarity = models.CharField(max_length=50, choices=Rarity_CHOICES)
 
+    class Meta:
+        # Catalog filters (see Backend.catalog)
+        indexes = [
+            models.Index(fields=['rarity', 'price'], name='card_rarity_price_idx'),
+            models.Index(fields=['card_code', 'version'], name='card_code_version_idx'),
+            models.Index(fields=['price'], name='card_price_idx'),
+        ]
+
 class Booster(Product):
     booster_code = models.CharField(max_length=10)
     version = models.CharField(max_length=255, default='v1')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['booster_code', 'version'], name='booster_code_version_idx'),
+            models.Index(fields=['price'], name='booster_price_idx'),
+        ]
+
 # === Order === 
 
 class Order(models.Model):
@@ -102,16 +157,108 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Order, related_name='items', on_delete=models.CASCADE)
     product_type = models.CharField(max_length=50)  # 'card' or 'booster'
     product_id = models.IntegerField()  # ID of the Card or Booster
+    # Generic relation to the Card or Booster; filled from product_type on save
+    content_type = models.ForeignKey(ContentType, on_delete=models.PROTECT)
+    product = GenericForeignKey('content_type', 'product_id')
     quantity = models.IntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
 
+    def save(self, *args, **kwargs):
+        if self.content_type_id is None:
+            from .orders import product_content_types  # orders imports this module
+            content_type = product_content_types().get(self.product_type)
+            if content_type is not None:
+                self.content_type = content_type
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.quantity} x {self.product_type} (ID: {self.product_id}) in Order {self.order.id}"
+    class Meta:
+        indexes = [
+            # Covers "which orders contain this product" without touching the table
+            models.Index(fields=['content_type', 'product_id', 'order'], name='orderitem_product_idx'),
+        ]
     
+class StockHold(models.Model):
+    """Time-limited reservation of product stock by a user's cart; see Backend.reservations."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='stock_holds', on_delete=models.CASCADE)
+    product_type = models.CharField(max_length=50)  # 'card' or 'booster'
+    product_id = models.IntegerField()
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user.username} holds {self.quantity} x {self.product_type} (ID: {self.product_id}) until {self.expires_at}"
+
+    class Meta:
+        unique_together = ('user', 'product_type', 'product_id')
+        indexes = [
+            # Active holds per product: availability checks
+            models.Index(fields=['product_type', 'product_id', 'expires_at'], name='stockhold_product_idx'),
+            # Expired holds: sweeper
+            models.Index(fields=['expires_at'], name='stockhold_expiry_idx'),
+        ]
+
+class StockHoldCart(models.Model):
+    """When a user's current cart of stock holds began; kept across releases, see Backend.reservations."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, primary_key=True, related_name='hold_cart', on_delete=models.CASCADE)
+    started_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.user.username} cart since {self.started_at}"
+
+class IdempotencyKey(models.Model):
+    """Stored response of a write request sent with an Idempotency-Key header; see Backend.idempotency."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    scope = models.CharField(max_length=50) #endpoint the key was used on
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64) #sha256 of method, path and body
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope} {self.key} by {self.user.username}"
+
+    class Meta:
+        unique_together = ('user', 'scope', 'key')
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expiry_idx'),
+        ]
+
+# === Search ===
+
+class SearchEntry(models.Model):
+    """One searchable Card or Booster; see Backend.search."""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    text = models.CharField(max_length=512)
+    trigram_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.content_type.model} {self.object_id}: {self.text}"
+
+    class Meta:
+        unique_together = ('content_type', 'object_id')
+
+
+class SearchTrigram(models.Model):
+    """Inverted index posting: `entry` contains `trigram`."""
+    entry = models.ForeignKey(SearchEntry, related_name='trigrams', on_delete=models.CASCADE)
+    # Copy of entry.content_type so searches by type are served by the posting index alone
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, db_index=False)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        # Leading (trigram, content_type) columns serve the posting list lookups
+        unique_together = ('trigram', 'content_type', 'entry')
+
 # === Transactions ===
 
 class PointTransaction(models.Model):
-    id = models.CharField(primary_key=True, max_length=7, editable=False, default=generate_id)
+    id = models.CharField(primary_key=True, max_length=ID_LENGTH, editable=False, default=generate_id) #ULID, older rows keep their 7-char IDs
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     points = models.IntegerField() #positive or negative
     description = models.CharField(max_length=255, null=True, blank=True)
@@ -121,6 +268,14 @@ class PointTransaction(models.Model):
     def __str__(self):
         return f"{self.user.username} {'earned' if self.points > 0 else 'spent'} {abs(self.points)} points on {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
 
+    class Meta:
+        indexes = [
+            # Point history, newest first per user
+            models.Index(fields=['user', 'created_at'], name='pointtx_user_created_idx'),
+            # Ledger export, in date order across users
+            models.Index(fields=['created_at', 'id'], name='pointtx_created_idx'),
+        ]
+
 
 class TournamentResult(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -133,6 +288,99 @@ class TournamentResult(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.tournament_name} - {self.position} - {self.point_earned} points"
+
+    class Meta:
+        indexes = [
+            # Ledger export, in date order across users
+            models.Index(fields=['created_at', 'id'], name='result_created_idx'),
+        ]
+
+class LedgerSnapshot(models.Model):
+    """
+    A point-in-time cut of the ledger written by the reconciliation job.
+    Only completed snapshots are used as a starting point by later runs.
+    """
+    as_of = models.DateTimeField() #ledger rows created at or before this instant are included
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Ledger snapshot as of {self.as_of.strftime('%Y-%m-%d %H:%M:%S')}"
+    class Meta:
+        ordering = ['-as_of']
+
+class PointBalanceSnapshot(models.Model):
+    """
+    Ledger totals of one user at a LedgerSnapshot. Users without a row had no
+    ledger activity up to the snapshot.
+    """
+    snapshot = models.ForeignKey(LedgerSnapshot, related_name='balances', on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    point = models.IntegerField(default=0)
+    ranking_point = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.point} points, {self.ranking_point} ranking points"
+    class Meta:
+        unique_together = ('snapshot', 'user')
+
+class TournamentImportJob(models.Model):
+    """
+    Progress and per-row errors of a streamed tournament import (see Backend.imports).
+    """
+    tournament_name = models.CharField(max_length=255)
+    source = models.FileField(upload_to='tournament_imports/', null=True, blank=True)
+    file_format = models.CharField(max_length=10, choices=Import_Format_CHOICES)
+    chunk_size = models.PositiveIntegerField(default=500)
+    status = models.CharField(max_length=20, choices=Import_Status_CHOICES, default='pending')
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True) #first errors only, see imports.MAX_REPORTED_ERRORS
+    message = models.TextField(null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.id} - {self.tournament_name} ({self.status})"
+    class Meta:
+        ordering = ['-created_at']
+
+class MonthlyRanking(models.Model):
+    """
+    Materialized monthly ranking aggregate, one row per user and month.
+    Maintained incrementally by tournament writes (see Backend.ranking).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    ranking_earned = models.IntegerField(default=0)
+    rank = models.PositiveIntegerField(default=0) #dense rank within the month
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.year}/{self.month:02d} - #{self.rank} ({self.ranking_earned})"
+    class Meta:
+        unique_together = ('year', 'month', 'user')
+        indexes = [
+            models.Index(fields=['year', 'month', 'rank'], name='monthly_ranking_rank_idx'),
+            models.Index(fields=['year', 'month', '-ranking_earned', 'user'], name='monthly_ranking_seek_idx'),
+        ]
+
+class RankingMonth(models.Model):
+    """
+    One row per ranked month, locked by every writer of that month's MonthlyRanking
+    rows so re-ranking never runs concurrently (see Backend.ranking).
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return f"{self.year}/{self.month:02d}"
+    class Meta:
+        unique_together = ('year', 'month')
     
 class Reward(models.Model):
     id = models.AutoField(primary_key=True)
@@ -156,6 +404,12 @@ class RewardRedemption(models.Model):
     class Meta:
         unique_together = ('user', 'reward', 'status')
         ordering = ['-redeemed_at']
+        indexes = [
+            # Admin redemption queue, oldest first per status
+            models.Index(fields=['status', 'redeemed_at'], name='redemption_queue_idx'),
+            # Ledger export, in date order across statuses
+            models.Index(fields=['redeemed_at', 'id'], name='redemption_redeemed_idx'),
+        ]
 
 class UserProfile(AbstractUser):
     nickname = models.CharField(max_length=30)
@@ -185,4 +439,11 @@ class UserProfile(AbstractUser):
     class Meta:
         verbose_name = 'User Profile'
         verbose_name_plural = 'User Profiles'
-        ordering = ['username']    
+        ordering = ['username']
+        indexes = [
+            # Admin user list: prefix search (username and email are unique, hence indexed) and balance sorts
+            models.Index(fields=['nickname'], name='user_nickname_idx'),
+            models.Index(fields=['phone'], name='user_phone_idx'),
+            models.Index(fields=['point', 'id'], name='user_point_idx'),
+            models.Index(fields=['ranking_point', 'id'], name='user_ranking_point_idx'),
+        ]    
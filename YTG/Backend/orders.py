@@ -0,0 +1,238 @@
+"""
+Order write paths and read helpers.
+
+An order is created in one transaction with a fixed number of queries per
+product type: the cart's products are locked with one id__in SELECT per type,
+stock is decremented with one conditional UPDATE per type and the order lines
+are written with a single bulk INSERT. Any failure rolls back the whole order.
+
+Stock held by other users' carts (models.StockHold, see Backend.reservations)
+is not available to an order; the buyer's own holds on the ordered products
+are consumed by it.
+
+Status changes go through transition_orders(), which enforces TRANSITIONS
+and, when orders are cancelled, returns their stock with one set-based UPDATE
+per product type in the same transaction as the status change.
+
+On the read side, product names of order lines are resolved by prefetching
+their generic product relation: one query per product type rather than one
+per line.
+"""
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, Value, When, prefetch_related_objects
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework import status
+
+from . import catalog
+from . import models
+
+PRODUCT_MODELS = {
+    'card': models.Card,
+    'booster': models.Booster,
+}
+
+
+def product_content_types():
+    """Map product types to their ContentType, served from the content type cache."""
+    by_model = ContentType.objects.get_for_models(*PRODUCT_MODELS.values())
+    return {product_type: by_model[model] for product_type, model in PRODUCT_MODELS.items()}
+
+
+class OrderError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def parse_items(items_data):
+    """
+    Validate raw cart items and return an ordered {(product_type, product_id): quantity}
+    mapping, merging repeated lines for the same product.
+    """
+    if not isinstance(items_data, list):
+        raise OrderError(_('Items must be a list'))
+    cart = OrderedDict()
+    for item in items_data:
+        if not isinstance(item, dict):
+            raise OrderError(_('Invalid item'))
+        product_type = item.get('product_type')
+        if product_type not in PRODUCT_MODELS:
+            raise OrderError(_('Invalid product type'))
+        try:
+            product_id = int(item.get('product_id'))
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise OrderError(_('Invalid product or quantity'))
+        if quantity < 1:
+            raise OrderError(_('Quantity must be at least 1'))
+        key = (product_type, product_id)
+        cart[key] = cart.get(key, 0) + quantity
+    return cart
+
+
+def held_quantities(product_type, product_ids, exclude_user=None):
+    """Return {product_id: units held by active holds}, one aggregate over the holds index."""
+    holds = models.StockHold.objects.filter(
+        product_type=product_type, product_id__in=product_ids, expires_at__gt=timezone.now()
+    )
+    if exclude_user is not None:
+        holds = holds.exclude(user=exclude_user)
+    return dict(holds.values('product_id').annotate(held=Sum('quantity')).order_by().values_list('product_id', 'held'))
+
+
+def decrement_stock(model, quantities):
+    """
+    Decrement stock for {product_id: quantity} with one conditional UPDATE.
+    Returns False, changing nothing, if any product lacks the stock.
+    """
+    if not quantities:
+        return True
+    enough = Q()
+    for product_id, quantity in quantities.items():
+        enough |= Q(id=product_id, stock__gte=quantity)
+    updated = model.objects.filter(enough).update(
+        stock=F('stock') - Case(
+            *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            default=Value(0),
+        ),
+        # update() skips auto_now and save signals; catalog ETags and cache depend on both
+        updated_at=timezone.now(),
+    )
+    transaction.on_commit(catalog.invalidate)
+    return updated == len(quantities)
+
+
+def restore_stock(model, quantities):
+    """Add {product_id: quantity} back to stock with one UPDATE."""
+    if not quantities:
+        return
+    model.objects.filter(id__in=quantities.keys()).update(
+        stock=F('stock') + Case(
+            *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+            default=Value(0),
+        ),
+        updated_at=timezone.now(),
+    )
+    transaction.on_commit(catalog.invalidate)
+
+
+def create_order(user, items_data):
+    """
+    Create an order for `user` from raw cart items. Raises OrderError, leaving
+    stock untouched, if a product is unknown or short on stock.
+    Returns (order, order_items).
+    """
+    cart = parse_items(items_data)
+    by_type = {product_type: {} for product_type in PRODUCT_MODELS}
+    for (product_type, product_id), quantity in cart.items():
+        by_type[product_type][product_id] = quantity
+
+    with transaction.atomic():
+        products = {}
+        for product_type, quantities in by_type.items():
+            if not quantities:
+                continue
+            found = PRODUCT_MODELS[product_type].objects.select_for_update().only('id', 'price', 'stock').in_bulk(quantities.keys())
+            if len(found) != len(quantities):
+                raise OrderError(_('Product not found'), status.HTTP_404_NOT_FOUND)
+            held = held_quantities(product_type, quantities.keys(), exclude_user=user)
+            for product_id, product in found.items():
+                if product.stock - held.get(product_id, 0) < quantities[product_id]:
+                    raise OrderError(_('Insufficient stock for product'))
+                products[(product_type, product_id)] = product
+
+        for product_type, quantities in by_type.items():
+            if not decrement_stock(PRODUCT_MODELS[product_type], quantities):
+                raise OrderError(_('Insufficient stock for product'))
+
+        lines = []
+        total_price = Decimal('0')
+        for (product_type, product_id), quantity in cart.items():
+            price = products[(product_type, product_id)].price * quantity
+            total_price += price
+            lines.append((product_type, product_id, quantity, price))
+
+        # The order converts the buyer's holds on these products into the decrement above
+        if cart:
+            consumed = Q()
+            for product_type, product_id in cart:
+                consumed |= Q(product_type=product_type, product_id=product_id)
+            models.StockHold.objects.filter(consumed, user=user).delete()
+
+        content_types = product_content_types()
+        order = models.Order.objects.create(user=user, total_price=total_price)
+        order_items = models.OrderItem.objects.bulk_create([
+            models.OrderItem(order=order, product_type=product_type, product_id=product_id,
+                             content_type=content_types[product_type], quantity=quantity, price=price)
+            for product_type, product_id, quantity, price in lines
+        ])
+    return order, order_items
+
+
+# Order status -> statuses it may move to
+TRANSITIONS = {
+    'pending': {'confirmed', 'cancelled'},
+    'confirmed': {'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': set(),
+}
+
+
+def transition_orders(queryset, new_status):
+    """
+    Move the orders of a queryset to `new_status` in one transaction: the orders
+    are locked, each transition is checked against TRANSITIONS, the valid ones
+    are updated together and, on cancellation, their stock is restored.
+    Returns (changed_ids, errors) where errors maps order id to a message.
+    """
+    with transaction.atomic():
+        current = dict(queryset.select_for_update().order_by('id').values_list('id', 'status'))
+        changed_ids = []
+        errors = {}
+        for order_id, old_status in current.items():
+            if new_status in TRANSITIONS.get(old_status, ()):
+                changed_ids.append(order_id)
+            elif old_status == new_status:
+                errors[order_id] = _('Order is already %(status)s') % {'status': new_status}
+            else:
+                errors[order_id] = _('Cannot change order from %(old)s to %(new)s') % {'old': old_status, 'new': new_status}
+        if not changed_ids:
+            return changed_ids, errors
+
+        models.Order.objects.filter(id__in=changed_ids).update(status=new_status, updated_at=timezone.now())
+        if new_status == 'cancelled':
+            returned = (
+                models.OrderItem.objects.filter(order_id__in=changed_ids)
+                .values('product_type', 'product_id').annotate(units=Sum('quantity')).order_by()
+            )
+            by_type = {}
+            for row in returned:
+                by_type.setdefault(row['product_type'], {})[row['product_id']] = row['units']
+            for product_type, quantities in by_type.items():
+                if product_type in PRODUCT_MODELS:
+                    restore_stock(PRODUCT_MODELS[product_type], quantities)
+    return changed_ids, errors
+
+
+def product_names(order_items):
+    """Resolve the product names of order lines with one query per product type."""
+    order_items = list(order_items)
+    prefetch_related_objects(order_items, 'product')
+    return {
+        (item.product_type, item.product_id): item.product.name
+        for item in order_items if item.product is not None
+    }
+
+
+def serializer_context(orders):
+    """
+    Serializer context for OrderSerializer over orders whose items were
+    prefetched, so product names are resolved in bulk instead of per item.
+    """
+    return {'product_names': product_names(item for order in orders for item in order.items.all())}
@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque url-safe token carrying the sort key of the last row of
+a page. The next page seeks past it with keyset_filter() instead of an OFFSET,
+so deep pages cost the same as the first one and rows inserted mid-scroll do
+not shift the window.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder truncates datetimes to milliseconds, which would re-serve rows on the next page
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row of a page into an opaque token."""
+    raw = json.dumps(list(values), cls=_CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Decode a token produced by encode_cursor(). Raises InvalidCursor on tampered input."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(token)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(token)
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the seek predicate for rows strictly after `values` in `ordering`.
+    `ordering` uses order_by() syntax, e.g. ['-ranking_earned', 'user_id'];
+    the last field must be unique to give a stable tie-break.
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _sort_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def cursor_values(model, ordering, token):
+    """
+    Decode a cursor of `ordering` on `model` and convert each value with its
+    model field, so a forged token fails here instead of in the query.
+    Raises InvalidCursor on any value the field does not accept.
+    """
+    values = []
+    for field, value in zip(ordering, decode_cursor(token, len(ordering))):
+        if value is None or isinstance(value, (list, dict)):
+            raise InvalidCursor(token)
+        try:
+            value = model._meta.get_field(field.lstrip('-')).to_python(value)
+        except FieldDoesNotExist:
+            # Annotations have no field to convert with; plain JSON scalars are passed through
+            pass
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor(token)
+        if value is None:
+            raise InvalidCursor(token)
+        values.append(value)
+    return values
+
+
+def paginate(queryset, ordering, cursor, page_size):
+    """
+    Return (rows, next_cursor) for one keyset page of `queryset` in `ordering`.
+    Raises InvalidCursor if `cursor` does not decode to a sort key of this ordering.
+    """
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, cursor_values(queryset.model, ordering, cursor)))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(*[_sort_value(rows[-1], field.lstrip('-')) for field in ordering])
+    return rows, next_cursor
+
+
+def get_page_size(query_params, default=20, maximum=100, param='page_size'):
+    """Read ?page_size= (or `param`), clamped to `maximum`. Raises ValueError on non-numeric input."""
+    page_size = int(query_params.get(param, default))
+    if page_size < 1:
+        raise ValueError(page_size)
+    return min(page_size, maximum)
@@ -5,4 +5,11 @@ class IsStaffUser(BasePermission):
     Custom permission to only allow staff users to access certain views.
     """
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.is_staff)
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated and request.user.is_staff)
+
+class CanConfirmOrder(BasePermission):
+    """
+    Allows users holding the Backend.can_confirm_order permission (and superusers).
+    """
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.has_perm('Backend.can_confirm_order'))
@@ -0,0 +1,187 @@
+"""
+Monthly ranking aggregate maintenance.
+
+The public ranking reads from models.MonthlyRanking instead of grouping every
+TournamentResult of the month on each request. Tournament writes fold their
+ranking points into the table with record_results(), and rebuild() recomputes
+it from history.
+
+Writers of a month lock its RankingMonth row first, in (year, month) order, so
+re-ranking always starts from the month's committed state and two writers
+never update the same rank rows at once.
+"""
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, Sum, Value, When, Window
+from django.db.models.functions import DenseRank, TruncMonth
+from django.utils import timezone
+
+from . import catalog
+from . import leaderboard
+from . import models
+
+# Counting a month's participants costs as much as reading a page, so the
+# total is cached and dropped whenever the month's table changes. The drop only
+# reaches other workers through a shared cache, hence the short local timeout.
+COUNT_CACHE_TIMEOUT = catalog.cache_timeout(300)
+
+# Keyset ordering of the ranking; user_id breaks ties between equal scores.
+ORDERING = ['-ranking_earned', 'user_id']
+
+
+def month_bounds(year, month):
+    """Return the [start, end) datetimes of a month. Raises ValueError on invalid input."""
+    tz = timezone.get_current_timezone()
+    start = timezone.datetime(year, month, 1, tzinfo=tz)
+    if month == 12:
+        end = timezone.datetime(year + 1, 1, 1, tzinfo=tz)
+    else:
+        end = timezone.datetime(year, month + 1, 1, tzinfo=tz)
+    return start, end
+
+
+def _count_cache_key(year, month):
+    return f'monthly_ranking_count:{year}:{month}'
+
+
+def lock_month(year, month):
+    """Lock a month against other ranking writers until the current transaction ends."""
+    models.RankingMonth.objects.bulk_create([models.RankingMonth(year=year, month=month)], ignore_conflicts=True)
+    models.RankingMonth.objects.select_for_update().get(year=year, month=month)
+
+
+def ranked_count(year, month):
+    """Number of ranked users in a month, served from cache when possible."""
+    return cache.get_or_set(
+        _count_cache_key(year, month),
+        lambda: models.MonthlyRanking.objects.filter(year=year, month=month).count(),
+        COUNT_CACHE_TIMEOUT,
+    )
+
+
+def record_results(results):
+    """
+    Fold freshly created TournamentResult rows into the monthly ranking table.
+    Must be called inside the transaction that created the results.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for result in results:
+        created_at = timezone.localtime(result.created_at)
+        deltas[(created_at.year, created_at.month)][result.user_id] += result.ranking_point_earned
+
+    for (year, month), user_deltas in sorted(deltas.items()):
+        lock_month(year, month)
+        month_rows = models.MonthlyRanking.objects.filter(year=year, month=month)
+        before = dict(month_rows.filter(user_id__in=user_deltas.keys()).values_list('user_id', 'ranking_earned'))
+        # Scores that appear or disappear; ranks only move inside this range, and shift below it
+        scores = list(before.values()) + [before.get(user_id, 0) + delta for user_id, delta in user_deltas.items()]
+
+        # Make sure every participant has a row, then apply all deltas in one UPDATE
+        models.MonthlyRanking.objects.bulk_create(
+            [models.MonthlyRanking(user_id=user_id, year=year, month=month) for user_id in user_deltas],
+            ignore_conflicts=True,
+        )
+        changed = {user_id: delta for user_id, delta in user_deltas.items() if delta}
+        if changed:
+            month_rows.filter(user_id__in=changed.keys()).update(
+                ranking_earned=F('ranking_earned') + Case(
+                    *[When(user_id=user_id, then=Value(delta)) for user_id, delta in changed.items()],
+                    default=Value(0),
+                ),
+                updated_at=timezone.now(),
+            )
+        refresh_ranks(year, month, min(scores), max(scores))
+        transaction.on_commit(lambda year=year, month=month: cache.delete(_count_cache_key(year, month)))
+        transaction.on_commit(
+            lambda year=year, month=month, user_deltas=dict(user_deltas): leaderboard.apply_deltas(year, month, user_deltas)
+        )
+
+
+def refresh_ranks(year, month, low=None, high=None):
+    """
+    Recompute the stored dense rank for a month, writing only the rows that moved.
+
+    When only scores within [low, high] appeared or disappeared, rows above
+    the range keep their rank, rows inside it are re-ranked behind the
+    distinct scores above it, and rows below it all shift by the same amount
+    in one UPDATE. Without a range the whole month is re-ranked.
+    """
+    rows = models.MonthlyRanking.objects.filter(year=year, month=month)
+    above = 0
+    if low is not None:
+        above = rows.filter(ranking_earned__gt=high).values('ranking_earned').distinct().count()
+        rows = rows.filter(ranking_earned__gte=low, ranking_earned__lte=high)
+    ranked = rows.annotate(
+        new_rank=Window(expression=DenseRank(), order_by=F('ranking_earned').desc())
+    ).only('id', 'rank')
+
+    moved = []
+    lowest = above
+    for row in ranked:
+        new_rank = above + row.new_rank
+        lowest = max(lowest, new_rank)
+        if row.rank != new_rank:
+            row.rank = new_rank
+            moved.append(row)
+    models.MonthlyRanking.objects.bulk_update(moved, ['rank'], batch_size=500)
+    written = len(moved)
+
+    if low is not None:
+        below = models.MonthlyRanking.objects.filter(year=year, month=month, ranking_earned__lt=low)
+        # The best score below the range ranks right after the lowest one in it
+        anchor = below.order_by('-ranking_earned').values_list('rank', flat=True).first()
+        if anchor is not None and anchor != lowest + 1:
+            written += below.update(rank=F('rank') + (lowest + 1 - anchor))
+    return written
+
+
+def rebuild(year=None, month=None, batch_size=1000):
+    """
+    Rebuild the monthly ranking table from TournamentResult history.
+    Limited to a single month when year and month are given.
+    Returns the number of ranking rows written.
+    """
+    results = models.TournamentResult.objects.all()
+    existing = models.MonthlyRanking.objects.all()
+    if year and month:
+        start, end = month_bounds(year, month)
+        results = results.filter(created_at__gte=start, created_at__lt=end)
+        existing = existing.filter(year=year, month=month)
+
+    aggregated = results.annotate(period=TruncMonth('created_at')).values('period', 'user_id').annotate(
+        ranking_earned=Sum('ranking_point_earned')
+    ).order_by()
+
+    written = 0
+    months = set(existing.values_list('year', 'month').distinct())
+    with transaction.atomic():
+        for period in sorted(months):
+            lock_month(*period)
+        existing.delete()
+        batch = []
+        for row in aggregated.iterator(chunk_size=batch_size):
+            period = timezone.localtime(row['period']) if timezone.is_aware(row['period']) else row['period']
+            months.add((period.year, period.month))
+            batch.append(models.MonthlyRanking(
+                user_id=row['user_id'],
+                year=period.year,
+                month=period.month,
+                ranking_earned=row['ranking_earned'] or 0,
+            ))
+            if len(batch) >= batch_size:
+                models.MonthlyRanking.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            models.MonthlyRanking.objects.bulk_create(batch)
+            written += len(batch)
+
+        for period_year, period_month in sorted(months):
+            lock_month(period_year, period_month)
+            refresh_ranks(period_year, period_month)
+    transaction.on_commit(lambda: cache.delete_many([_count_cache_key(*period) for period in months]))
+    for period in months:
+        transaction.on_commit(lambda period=period: leaderboard.invalidate(*period))
+    return written
@@ -0,0 +1,163 @@
+"""
+Ledger reconciliation.
+
+UserProfile.point and ranking_point are denormalized counters of the ledger:
+  point         = sum(PointTransaction.points) + sum(TournamentResult.point_earned)
+  ranking_point = sum(TournamentResult.ranking_point_earned)
+
+reconcile() walks users in primary-key chunks. For each chunk it locks the
+users' rows (SELECT ... FOR UPDATE, in id order like every other writer), then
+reads the latest completed LedgerSnapshot totals and the ledger rows created
+after that snapshot. Every ledger writer updates the user row in the same
+transaction as its ledger row, so while the lock is held no write can land
+between the balance read and the ledger sums, even though each statement
+reads its own READ COMMITTED snapshot. As a second guard, drifted balances
+are re-read before they are reported, and a repair sets the ledger total only
+WHERE the balance is still the one compared. Memory is bounded by the chunk
+size, and with a recent snapshot only the tail of the ledger is scanned.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from . import models
+
+# Ledger rows newer than this may still belong to uncommitted transactions,
+# so new snapshots stop short of the present by this margin.
+SNAPSHOT_LAG = timedelta(minutes=5)
+
+# Completed snapshots kept after a new one is taken
+SNAPSHOTS_KEPT = 2
+
+
+def latest_snapshot():
+    return models.LedgerSnapshot.objects.filter(completed_at__isnull=False).order_by('-as_of').first()
+
+
+def _ledger_totals(queryset, value_fields, since, cutoff):
+    """
+    Sum ledger values per user for rows after `since`, split at `cutoff`.
+    Returns {user_id: {f'total_{field}': total, f'cut_{field}': total up to cutoff}}.
+    """
+    if since is not None:
+        queryset = queryset.filter(created_at__gt=since)
+    aggregates = {}
+    for field in value_fields:
+        aggregates[f'total_{field}'] = Sum(field)
+        if cutoff is not None:
+            aggregates[f'cut_{field}'] = Sum(Case(
+                When(created_at__lte=cutoff, then=F(field)), default=Value(0), output_field=IntegerField()
+            ))
+    rows = queryset.values('user_id').annotate(**aggregates).order_by()
+    return {row.pop('user_id'): row for row in rows.iterator(chunk_size=2000)}
+
+
+def reconcile(chunk_size=1000, repair=False, take_snapshot=False, full=False):
+    """
+    Compare every user's stored balances against the ledger.
+
+    Yields a diff dict for each user whose stored balance drifted. With repair,
+    the balance is set to the ledger total if it has not changed since it was read.
+    With take_snapshot, the ledger totals as of now - SNAPSHOT_LAG are stored
+    for later runs. With full, existing snapshots are ignored and all history is scanned.
+    """
+    base = None if full else latest_snapshot()
+    since = base.as_of if base else None
+    new_snapshot = None
+    cutoff = None
+    if take_snapshot:
+        cutoff = timezone.now() - SNAPSHOT_LAG
+        if since and cutoff <= since:
+            cutoff = None
+        else:
+            new_snapshot = models.LedgerSnapshot.objects.create(as_of=cutoff)
+
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            users = list(
+                models.UserProfile.objects.select_for_update().filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'username', 'point', 'ranking_point')[:chunk_size]
+            )
+            if not users:
+                break
+            first_id, last_id = users[0][0], users[-1][0]
+
+            base_totals = {}
+            if base:
+                base_totals = {
+                    user_id: (point, ranking_point)
+                    for user_id, point, ranking_point in base.balances.filter(
+                        user_id__gte=first_id, user_id__lte=last_id
+                    ).values_list('user_id', 'point', 'ranking_point')
+                }
+            transactions = _ledger_totals(
+                models.PointTransaction.objects.filter(user_id__gte=first_id, user_id__lte=last_id),
+                ['points'], since, cutoff,
+            )
+            results = _ledger_totals(
+                models.TournamentResult.objects.filter(user_id__gte=first_id, user_id__lte=last_id),
+                ['point_earned', 'ranking_point_earned'], since, cutoff,
+            )
+
+            snapshot_rows = []
+            drifted = []
+            for user_id, username, stored_point, stored_ranking_point in users:
+                base_point, base_ranking_point = base_totals.get(user_id, (0, 0))
+                spent = transactions.get(user_id, {})
+                earned = results.get(user_id, {})
+                ledger_point = base_point + (spent.get('total_points') or 0) + (earned.get('total_point_earned') or 0)
+                ledger_ranking_point = base_ranking_point + (earned.get('total_ranking_point_earned') or 0)
+
+                if new_snapshot:
+                    cut_point = base_point + (spent.get('cut_points') or 0) + (earned.get('cut_point_earned') or 0)
+                    cut_ranking_point = base_ranking_point + (earned.get('cut_ranking_point_earned') or 0)
+                    if cut_point or cut_ranking_point or user_id in base_totals:
+                        snapshot_rows.append(models.PointBalanceSnapshot(
+                            snapshot=new_snapshot, user_id=user_id, point=cut_point, ranking_point=cut_ranking_point
+                        ))
+
+                if (stored_point, stored_ranking_point) != (ledger_point, ledger_ranking_point):
+                    drifted.append((user_id, username, stored_point, stored_ranking_point, ledger_point, ledger_ranking_point))
+
+            diffs = []
+            if drifted:
+                # A balance that moved since it was read was compared against the wrong ledger
+                # sums; it is left to the next run instead of being reported or repaired
+                current = {
+                    user_id: (point, ranking_point)
+                    for user_id, point, ranking_point in models.UserProfile.objects.filter(
+                        id__in=[row[0] for row in drifted]
+                    ).values_list('id', 'point', 'ranking_point')
+                }
+            for user_id, username, stored_point, stored_ranking_point, ledger_point, ledger_ranking_point in drifted:
+                if current.get(user_id) != (stored_point, stored_ranking_point):
+                    continue
+                repaired = repair and bool(
+                    models.UserProfile.objects.filter(
+                        id=user_id, point=stored_point, ranking_point=stored_ranking_point
+                    ).update(point=ledger_point, ranking_point=ledger_ranking_point)
+                )
+                diffs.append({
+                    'user_id': user_id,
+                    'username': username,
+                    'stored_point': stored_point,
+                    'ledger_point': ledger_point,
+                    'stored_ranking_point': stored_ranking_point,
+                    'ledger_ranking_point': ledger_ranking_point,
+                    'repaired': repaired,
+                })
+
+            models.PointBalanceSnapshot.objects.bulk_create(snapshot_rows, batch_size=1000)
+        # Yield outside the transaction so a slow consumer never holds it open
+        yield from diffs
+
+    if new_snapshot:
+        new_snapshot.completed_at = timezone.now()
+        new_snapshot.save(update_fields=['completed_at'])
+        stale = models.LedgerSnapshot.objects.filter(completed_at__isnull=False).order_by('-as_of')[SNAPSHOTS_KEPT:]
+        models.LedgerSnapshot.objects.filter(id__in=list(stale.values_list('id', flat=True))).delete()
+        # Snapshots of interrupted runs are never used
+        models.LedgerSnapshot.objects.filter(completed_at__isnull=True).exclude(id=new_snapshot.id).delete()
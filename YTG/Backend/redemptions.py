@@ -0,0 +1,132 @@
+"""
+Reward redemption confirmation.
+
+confirm_redemption() runs entirely in one transaction of conditional UPDATEs:
+the redemption moves from pending only if it is still pending, reward stock is
+decremented only WHERE stock > 0 and the user is debited through the ledger
+only WHERE point >= cost. If any step matches no row, everything rolls back, so
+concurrent confirmations can neither oversell a reward nor overdraw a user.
+
+confirm_queue() confirms many pending redemptions, oldest first, with a fixed
+number of queries: the rewards and users involved are locked once, stock and
+balances are allocated in memory in queue order, and the results are written
+with one UPDATE per table and a bulk INSERT of the ledger rows.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
+from django.utils.translation import gettext as _
+
+from . import ledger
+from . import models
+from . import rewards
+
+# Redemptions confirmed per bulk request at most
+MAX_BATCH = 500
+
+
+class RedemptionError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def _description(reward):
+    return f"Redeemed: {reward.name}"
+
+
+def confirm_redemption(redemption_id):
+    """Confirm one pending redemption. Raises RedemptionError, changing nothing, if it cannot be."""
+    redemption = models.RewardRedemption.objects.select_related('reward', 'user').filter(id=redemption_id).first()
+    if redemption is None:
+        raise RedemptionError(_('Redemption not found'))
+    reward = redemption.reward
+
+    try:
+        with transaction.atomic():
+            if not models.RewardRedemption.objects.filter(id=redemption.id, status='pending').update(status='completed'):
+                raise RedemptionError(_('This redemption has already been processed'))
+            if not models.Reward.objects.filter(id=reward.id, stock__gt=0).update(stock=F('stock') - 1):
+                raise RedemptionError(_('This reward is out of stock'))
+            try:
+                ledger.adjust_points(redemption.user, -reward.cost, _description(reward), require_balance=True)
+            except ledger.InsufficientPoints:
+                raise RedemptionError(_('User does not have enough points to redeem this reward'))
+            transaction.on_commit(rewards.invalidate)
+    except IntegrityError:
+        # RewardRedemption is unique on (user, reward, status)
+        raise RedemptionError(_('User already has a completed redemption of this reward'))
+    redemption.status = 'completed'
+    return redemption
+
+
+def confirm_queue(redemption_ids=None, limit=MAX_BATCH):
+    """
+    Confirm pending redemptions in redeemed_at order: the given ids, all of
+    them, or else the oldest `limit` pending ones. Returns (confirmed_ids, errors)
+    where errors maps redemption id to the reason it stayed pending.
+    """
+    with transaction.atomic():
+        pending = models.RewardRedemption.objects.filter(status='pending').select_for_update().order_by(
+            'redeemed_at', 'id'
+        ).values_list('id', 'user_id', 'reward_id')
+        if redemption_ids is not None:
+            # Every given id gets an outcome; callers bound the list (MAX_BATCH in the API)
+            queue = list(pending.filter(id__in=redemption_ids))
+        else:
+            queue = list(pending[:limit])
+        errors = {}
+        if redemption_ids is not None:
+            found = {redemption_id for redemption_id, _user_id, _reward_id in queue}
+            for redemption_id in set(redemption_ids) - found:
+                errors[redemption_id] = _('This redemption has already been processed')
+        if not queue:
+            return [], errors
+
+        user_ids = sorted({user_id for _id, user_id, _reward_id in queue})
+        reward_ids = sorted({reward_id for _id, _user_id, reward_id in queue})
+        # Locked in id order, like every other writer of these rows
+        locked_rewards = models.Reward.objects.select_for_update().order_by('id').only('id', 'name', 'cost', 'stock').in_bulk(reward_ids)
+        balances = dict(models.UserProfile.objects.select_for_update().filter(id__in=user_ids).order_by('id').values_list('id', 'point'))
+        completed = set(
+            models.RewardRedemption.objects.filter(status='completed', user_id__in=user_ids, reward_id__in=reward_ids)
+            .values_list('user_id', 'reward_id')
+        )
+
+        stock = {reward_id: reward.stock for reward_id, reward in locked_rewards.items()}
+        confirmed = []
+        for redemption_id, user_id, reward_id in queue:
+            reward = locked_rewards[reward_id]
+            if (user_id, reward_id) in completed:
+                errors[redemption_id] = _('User already has a completed redemption of this reward')
+            elif stock[reward_id] <= 0:
+                errors[redemption_id] = _('This reward is out of stock')
+            elif balances[user_id] < reward.cost:
+                errors[redemption_id] = _('User does not have enough points to redeem this reward')
+            else:
+                stock[reward_id] -= 1
+                balances[user_id] -= reward.cost
+                completed.add((user_id, reward_id))
+                confirmed.append((redemption_id, user_id, reward_id))
+        if not confirmed:
+            return [], errors
+
+        taken = {}
+        point_deltas = {}
+        for _id, user_id, reward_id in confirmed:
+            taken[reward_id] = taken.get(reward_id, 0) + 1
+            point_deltas[user_id] = point_deltas.get(user_id, 0) - locked_rewards[reward_id].cost
+        models.Reward.objects.filter(id__in=taken.keys()).update(
+            stock=F('stock') - Case(
+                *[When(id=reward_id, then=Value(count)) for reward_id, count in taken.items()],
+                default=Value(0),
+            )
+        )
+        ledger.apply_bulk_deltas(point_deltas, {})
+        models.PointTransaction.objects.bulk_create([
+            models.PointTransaction(user_id=user_id, points=-locked_rewards[reward_id].cost, description=_description(locked_rewards[reward_id]))
+            for _id, user_id, reward_id in confirmed
+        ], batch_size=1000)
+        confirmed_ids = [redemption_id for redemption_id, _user_id, _reward_id in confirmed]
+        models.RewardRedemption.objects.filter(id__in=confirmed_ids).update(status='completed')
+        transaction.on_commit(rewards.invalidate)
+    return confirmed_ids, errors
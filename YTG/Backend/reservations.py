@@ -0,0 +1,144 @@
+"""
+Checkout stock reservations.
+
+A cart places StockHold rows on products instead of decrementing stock. A
+product's available stock is its stock minus the units held by other users'
+active (unexpired) holds, read with one aggregate over the
+(product_type, product_id, expires_at) index. Product rows are locked only
+while holds are placed or an order is written, never for the whole checkout.
+
+Holds expire on their own: expired rows stop counting immediately and are
+deleted later by purge_expired() (the release_expired_holds command). A cart
+cannot sit on stock indefinitely: it holds at most MAX_HELD_UNITS units in
+total, and renewals never push its expiry past MAX_HOLD_LIFETIME after the
+cart started. The start is kept in a StockHoldCart row that releasing the
+holds leaves in place, and once a cart's lifetime is over its user can start
+the next one only after HOLD_COOLDOWN. Checking out ends the cart.
+checkout() turns the cart's active holds into an order, which performs the
+permanent stock decrement and consumes the holds.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework import status
+
+from . import models
+from . import orders
+
+# How long a cart keeps its stock
+HOLD_TTL = timedelta(minutes=getattr(settings, 'STOCK_HOLD_MINUTES', 15))
+
+# Longest a cart keeps its stock however often it is renewed
+MAX_HOLD_LIFETIME = timedelta(minutes=getattr(settings, 'STOCK_HOLD_MAX_MINUTES', 60))
+
+# Units one user may hold across all products
+MAX_HELD_UNITS = getattr(settings, 'STOCK_HOLD_MAX_UNITS', 20)
+
+# Wait between the end of a cart's lifetime and the user's next cart
+HOLD_COOLDOWN = timedelta(minutes=getattr(settings, 'STOCK_HOLD_COOLDOWN_MINUTES', 15))
+
+
+def active_holds(user):
+    return models.StockHold.objects.filter(user=user, expires_at__gt=timezone.now()).order_by('product_type', 'product_id')
+
+
+def place_holds(user, items_data):
+    """
+    Hold stock for raw cart items, replacing the user's previous holds on the
+    same products. Every active hold of the user is renewed to one expiry,
+    HOLD_TTL from now but no later than MAX_HOLD_LIFETIME after the cart started.
+    Raises orders.OrderError, holding nothing, if a product is unknown or short,
+    if the cart would hold more than MAX_HELD_UNITS units, or during the
+    user's HOLD_COOLDOWN.
+    Returns the expiry.
+    """
+    cart = orders.parse_items(items_data)
+    if not cart:
+        raise orders.OrderError(_('Items must not be empty'))
+    # Product tables are locked in PRODUCT_MODELS order, like orders.create_order does
+    by_type = {product_type: {} for product_type in orders.PRODUCT_MODELS}
+    for (product_type, product_id), quantity in cart.items():
+        by_type[product_type][product_id] = quantity
+
+    now = timezone.now()
+    with transaction.atomic():
+        # Serializes the user's concurrent carts so the unit cap holds
+        models.UserProfile.objects.select_for_update().only('id').get(id=user.id)
+        started_at = models.StockHoldCart.objects.filter(user=user).values_list('started_at', flat=True).first()
+        if started_at is None or started_at + MAX_HOLD_LIFETIME <= now:
+            if started_at is not None and now < started_at + MAX_HOLD_LIFETIME + HOLD_COOLDOWN:
+                raise orders.OrderError(_('Stock cannot be held again until %(time)s') % {
+                    'time': timezone.localtime(started_at + MAX_HOLD_LIFETIME + HOLD_COOLDOWN).isoformat(timespec='seconds'),
+                })
+            started_at = now
+            models.StockHoldCart.objects.update_or_create(user=user, defaults={'started_at': started_at})
+        expires_at = min(now + HOLD_TTL, started_at + MAX_HOLD_LIFETIME)
+
+        # Holds on products in this cart are replaced, the other active ones are kept
+        kept = sum(
+            quantity for product_type, product_id, quantity
+            in models.StockHold.objects.filter(user=user, expires_at__gt=now).values_list('product_type', 'product_id', 'quantity')
+            if (product_type, product_id) not in cart
+        )
+        if kept + sum(cart.values()) > MAX_HELD_UNITS:
+            raise orders.OrderError(_('Cannot hold more than %(count)d units') % {'count': MAX_HELD_UNITS})
+
+        for product_type, quantities in by_type.items():
+            if not quantities:
+                continue
+            # Short lock so concurrent carts cannot both take the last units
+            found = orders.PRODUCT_MODELS[product_type].objects.select_for_update().only('id', 'stock').in_bulk(quantities.keys())
+            if len(found) != len(quantities):
+                raise orders.OrderError(_('Product not found'), status.HTTP_404_NOT_FOUND)
+            held = orders.held_quantities(product_type, quantities.keys(), exclude_user=user)
+            for product_id, product in found.items():
+                if product.stock - held.get(product_id, 0) < quantities[product_id]:
+                    raise orders.OrderError(_('Insufficient stock for product'))
+
+            models.StockHold.objects.filter(user=user, product_type=product_type, product_id__in=quantities.keys()).delete()
+            models.StockHold.objects.bulk_create([
+                models.StockHold(user=user, product_type=product_type, product_id=product_id,
+                                 quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in quantities.items()
+            ])
+        models.StockHold.objects.filter(user=user, expires_at__gt=now).update(expires_at=expires_at)
+    return expires_at
+
+
+def release_holds(user):
+    """Drop all of the user's holds. Returns the number of holds released."""
+    released, _by_model = models.StockHold.objects.filter(user=user).delete()
+    return released
+
+
+def checkout(user):
+    """
+    Create an order from the user's active holds. Raises orders.OrderError if
+    the cart holds nothing. Returns (order, order_items) as orders.create_order.
+    """
+    with transaction.atomic():
+        items = [
+            {'product_type': product_type, 'product_id': product_id, 'quantity': quantity}
+            for product_type, product_id, quantity in active_holds(user).values_list('product_type', 'product_id', 'quantity')
+        ]
+        if not items:
+            raise orders.OrderError(_('No active holds to check out'))
+        created = orders.create_order(user, items)
+        # The cart is bought; the user's next one starts afresh
+        models.StockHoldCart.objects.filter(user=user).delete()
+        return created
+
+
+def purge_expired(batch_size=1000):
+    """Delete expired holds in primary-key batches. Returns the number deleted."""
+    purged = 0
+    now = timezone.now()
+    while True:
+        ids = list(models.StockHold.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return purged
+        models.StockHold.objects.filter(id__in=ids).delete()
+        purged += len(ids)
@@ -0,0 +1,243 @@
+"""
+Refresh token revocation.
+
+simplejwt checks every refreshed token against its blacklist tables with a
+join on OutstandingToken. Those tables also grow without bound. Here, revoked
+JTIs are mirrored into a per-process bloom filter instead:
+
+- A JTI the filter has never seen is not revoked, with no query at all.
+- A filter hit is confirmed against the blacklist, since bloom filters give
+  false positives.
+- At most every SYNC_SECONDS, one check reads the blacklist rows added since
+  the previous read: the rows above the newest id seen, and the ids found
+  missing below it, since concurrent inserts may commit out of id order.
+  Both are primary-key seeks. Missing ids are given up after GAP_SECONDS.
+  Other checks never wait for the read.
+
+Tokens blacklisted through this module are added to the process's filter at
+once. A revocation made by another process is seen here within SYNC_SECONDS
+of its commit, unless its transaction took longer than GAP_SECONDS to commit.
+
+The filter is replaced once it outgrows its capacity or gets older than
+REBUILD_SECONDS, which drops tokens that have expired meanwhile. The
+replacement is read from the unexpired blacklist REBUILD_CHUNK rows per
+check while the current filter keeps serving. Until a process has its first
+filter, checks use the indexed jti lookup instead. No request reads more
+than one chunk of the blacklist.
+
+purge_expired() (the purge_expired_tokens command) deletes expired
+outstanding tokens, and their blacklist rows with them, in primary-key
+chunks. This keeps both tables bounded by the refresh token lifetime.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+# Target false positive rate of the filter
+FALSE_POSITIVE_RATE = 0.01
+
+# Smallest number of JTIs a filter is sized for
+MIN_CAPACITY = 10000
+
+# Seconds before the filter is replaced to drop expired tokens
+REBUILD_SECONDS = 3600
+
+# Blacklist rows read per check while a filter is being built
+REBUILD_CHUNK = 2000
+
+# Seconds between reads of new blacklist rows: how long another process's revocation can go unseen
+SYNC_SECONDS = getattr(settings, 'TOKEN_REVOCATION_SYNC_SECONDS', 5)
+
+# Seconds a missing blacklist id is re-read, waiting for its insert to commit
+GAP_SECONDS = 60
+
+# Ids below the newest blacklist row treated as possibly uncommitted when a process starts
+START_GAP_IDS = 1000
+
+
+class BloomFilter:
+    """Fixed-size bloom filter over strings, sized for `capacity` items at FALSE_POSITIVE_RATE."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(FALSE_POSITIVE_RATE) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class _RevokedSet:
+    """
+    The process-wide filter, the replacement being built, and the blacklist
+    tail: the newest row id read and the missing ids below it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.building = None
+        self.last_id = None
+        self.gaps = {}
+        self.synced_at = 0
+        self.built_at = 0
+
+    def _start(self, now):
+        span = BlacklistedToken.objects.aggregate(first_id=Min('id'), last_id=Max('id'))
+        self.last_id = span['last_id'] or 0
+        present = set(BlacklistedToken.objects.filter(id__gt=self.last_id - START_GAP_IDS).values_list('id', flat=True))
+        self.gaps = {
+            row_id: now for row_id in range(max(1, self.last_id - START_GAP_IDS + 1), self.last_id) if row_id not in present
+        }
+        # The id span bounds the row count without counting them; room is left for new rows
+        self.building = [BloomFilter(max(MIN_CAPACITY, (self.last_id - (span['first_id'] or 0) + 1) * 2)), 0]
+
+    def _sync(self, now):
+        rows = BlacklistedToken.objects.filter(Q(id__gt=self.last_id) | Q(id__in=list(self.gaps)))
+        filters = [bloom for bloom in (self.filter, self.building and self.building[0]) if bloom is not None]
+        for row_id, jti in rows.order_by('id').values_list('id', 'token__jti'):
+            for bloom in filters:
+                bloom.add(jti)
+            self.gaps.pop(row_id, None)
+            if row_id > self.last_id:
+                self.gaps.update((missing, now) for missing in range(self.last_id + 1, row_id))
+                self.last_id = row_id
+        self.gaps = {row_id: noticed for row_id, noticed in self.gaps.items() if now - noticed < GAP_SECONDS}
+        self.synced_at = now
+
+    def _build_step(self, now):
+        bloom, cursor = self.building
+        # The tail read adds every row above last_id, so the build stops there
+        chunk = list(
+            BlacklistedToken.objects.filter(id__gt=cursor, id__lte=self.last_id).order_by('id')
+            .values_list('id', 'token__jti', 'token__expires_at')[:REBUILD_CHUNK]
+        )
+        expired_before = timezone.now()
+        for _row_id, jti, expires_at in chunk:
+            if expires_at > expired_before:
+                bloom.add(jti)
+        if bloom.count > bloom.capacity:
+            # Sized too small; start over with twice the room
+            self.building = [BloomFilter(bloom.capacity * 2), 0]
+        elif len(chunk) < REBUILD_CHUNK:
+            self.filter = bloom
+            self.building = None
+            self.built_at = now
+        else:
+            self.building[1] = chunk[-1][0]
+
+    def refresh(self):
+        """Advance the tail and any build by at most one read each. Returns the serving filter, or None."""
+        # A check that finds another thread reading goes on with the current filter
+        if self.lock.acquire(blocking=False):
+            try:
+                now = time.monotonic()
+                if self.last_id is None:
+                    self._start(now)
+                if now - self.synced_at >= SYNC_SECONDS:
+                    self._sync(now)
+                if self.building is None and (
+                    now - self.built_at > REBUILD_SECONDS or self.filter.count > self.filter.capacity
+                ):
+                    self.building = [BloomFilter(max(MIN_CAPACITY, self.filter.count * 2)), 0]
+                if self.building is not None:
+                    self._build_step(now)
+            finally:
+                self.lock.release()
+        return self.filter
+
+    def add(self, jti):
+        # Without the lock: the rows are read again by the next sync anyway
+        for bloom in (self.filter, self.building and self.building[0]):
+            if bloom is not None:
+                bloom.add(jti)
+
+    def reset(self):
+        with self.lock:
+            self.filter = None
+            self.building = None
+            self.last_id = None
+            self.gaps = {}
+            self.synced_at = 0
+
+
+_revoked = _RevokedSet()
+
+
+def reset():
+    """Forget the process filter; the next checks build it again."""
+    _revoked.reset()
+
+
+def ready():
+    """Whether this process has a filter to check tokens against."""
+    return _revoked.filter is not None
+
+
+def is_revoked(jti):
+    """Whether the refresh token with `jti` has been blacklisted."""
+    bloom = _revoked.refresh()
+    if bloom is not None and jti not in bloom:
+        return False
+    return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+class RefreshToken(tokens.RefreshToken):
+    """simplejwt RefreshToken whose blacklist goes through the revocation filter."""
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        _revoked.add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
+
+
+def purge_expired(batch_size=1000):
+    """
+    Delete expired outstanding tokens and their blacklist rows in primary-key
+    chunks, scanning the table once. Returns the number of tokens deleted.
+    """
+    purged = 0
+    last_id = 0
+    now = timezone.now()
+    while True:
+        ids = list(
+            OutstandingToken.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'expires_at')[:batch_size]
+        )
+        if not ids:
+            return purged
+        last_id = ids[-1][0]
+        expired = [token_id for token_id, expires_at in ids if expires_at <= now]
+        if expired:
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=expired).delete()
+                OutstandingToken.objects.filter(id__in=expired).delete()
+            purged += len(expired)
@@ -0,0 +1,50 @@
+"""
+Public reward catalog.
+
+Rewards are few and change only when an admin edits one or a redemption is
+confirmed, so the whole catalog is kept as one snapshot in the Django cache.
+Responses combine the snapshot with the requesting user's balance, read from
+the per-process user row cache of Backend.authentication, so listing rewards
+with their stock and "affordable" flags usually needs no queries at all.
+
+The snapshot is dropped after every committed redemption confirmation
+(Backend.redemptions) and Reward save or delete (Backend.signals). The drop
+only reaches other workers through a shared cache backend; with a per-process
+one (the LocMemCache default), the snapshot is kept for
+catalog.LOCAL_CACHE_TIMEOUT seconds only.
+"""
+from django.core.cache import cache
+
+from . import catalog
+from . import models
+
+SNAPSHOT_KEY = 'reward_snapshot'
+
+# Upper bound on staleness should an invalidation race with a rebuild or miss a worker
+SNAPSHOT_TIMEOUT = catalog.cache_timeout(300)
+
+
+def _image_url(name):
+    return models.Reward._meta.get_field('image').storage.url(name) if name else None
+
+
+def _build_snapshot():
+    rows = models.Reward.objects.order_by('id').values('id', 'name', 'description', 'cost', 'stock', 'image')
+    return [dict(row, image=_image_url(row['image'])) for row in rows]
+
+
+def snapshot():
+    """Return every reward as a list of dicts, in id order."""
+    return cache.get_or_set(SNAPSHOT_KEY, _build_snapshot, SNAPSHOT_TIMEOUT)
+
+
+def invalidate():
+    cache.delete(SNAPSHOT_KEY)
+
+
+def with_flags(reward, user):
+    """Copy of a snapshot reward with in_stock and, for authenticated users, affordable."""
+    flagged = dict(reward, in_stock=reward['stock'] > 0)
+    if user.is_authenticated:
+        flagged['affordable'] = flagged['in_stock'] and user.point >= reward['cost']
+    return flagged
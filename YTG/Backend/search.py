@@ -0,0 +1,170 @@
+"""
+Trigram search over the Card and Booster catalog.
+
+Each product's name and set code are normalized, split into words and broken
+into padded trigrams ("blue" -> " bl", "blu", "lue", "ue "), stored as
+SearchTrigram postings of its SearchEntry. A query is broken up the same way;
+entries are ranked by how many of the query's trigrams they contain, so
+partial words, set codes and small typos still match, with shorter documents
+first on ties. Matching reads only the postings of the query's trigrams;
+product rows are loaded for the returned results alone.
+
+Entries are refreshed on save and delete by Backend.signals. Bulk writes
+bypass signals, so they must be followed by reindex() (or the
+rebuild_search_index command).
+"""
+import math
+import re
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+
+from . import catalog
+from . import models
+
+# Model -> fields making up its search document
+SEARCH_FIELDS = {
+    models.Card: ['name', 'card_code'],
+    models.Booster: ['name', 'booster_code'],
+}
+
+# Share of the query's trigrams an entry must contain to match
+MIN_COVERAGE = 0.5
+
+# Candidates read per requested result when breaking ties on document length
+CANDIDATES_PER_RESULT = 5
+
+# Longer queries are truncated to keep the posting scan bounded
+MAX_QUERY_TRIGRAMS = 64
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Return the set of padded word trigrams of `text`."""
+    grams = set()
+    for word in normalize(text).split():
+        # One leading pad only: single-letter "  b" grams match a large share of the catalog and rank nothing
+        padded = f' {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def document_text(instance):
+    return ' '.join(str(getattr(instance, field) or '') for field in SEARCH_FIELDS[type(instance)])
+
+
+def index_object(instance):
+    """Create or refresh the search entry of one product, writing only changed postings."""
+    text = document_text(instance)
+    grams = trigrams(text)
+    content_type = ContentType.objects.get_for_model(instance)
+    with transaction.atomic():
+        entry, created = models.SearchEntry.objects.get_or_create(
+            content_type=content_type, object_id=instance.pk,
+            defaults={'text': text, 'trigram_count': len(grams)},
+        )
+        existing = set()
+        if not created:
+            if entry.text == text:
+                return entry
+            existing = set(entry.trigrams.values_list('trigram', flat=True))
+            entry.text = text
+            entry.trigram_count = len(grams)
+            entry.save(update_fields=['text', 'trigram_count'])
+        if existing - grams:
+            entry.trigrams.filter(trigram__in=existing - grams).delete()
+        models.SearchTrigram.objects.bulk_create(
+            [models.SearchTrigram(entry=entry, content_type=content_type, trigram=gram) for gram in grams - existing]
+        )
+    return entry
+
+
+def remove_object(instance):
+    content_type = ContentType.objects.get_for_model(instance)
+    models.SearchEntry.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+
+
+def reindex(model, batch_size=1000):
+    """Rebuild the search entries of every `model` row in primary-key batches. Returns the rows indexed."""
+    content_type = ContentType.objects.get_for_model(model)
+    fields = SEARCH_FIELDS[model]
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = list(model.objects.filter(id__gt=last_id).order_by('id').values_list('id', *fields)[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        texts = {row[0]: ' '.join(str(value or '') for value in row[1:]) for row in rows}
+        grams = {object_id: trigrams(text) for object_id, text in texts.items()}
+
+        with transaction.atomic():
+            models.SearchEntry.objects.filter(content_type=content_type, object_id__in=texts.keys()).delete()
+            models.SearchEntry.objects.bulk_create([
+                models.SearchEntry(content_type=content_type, object_id=object_id, text=text,
+                                   trigram_count=len(grams[object_id]))
+                for object_id, text in texts.items()
+            ])
+            # bulk_create does not return ids on every backend
+            entry_ids = dict(
+                models.SearchEntry.objects.filter(content_type=content_type, object_id__in=texts.keys())
+                .values_list('object_id', 'id')
+            )
+            models.SearchTrigram.objects.bulk_create([
+                models.SearchTrigram(entry_id=entry_ids[object_id], content_type=content_type, trigram=gram)
+                for object_id, entry_grams in grams.items() for gram in entry_grams
+            ], batch_size=5000)
+        indexed += len(rows)
+    if indexed:
+        transaction.on_commit(catalog.invalidate)
+    return indexed
+
+
+def search(query, models_to_search=None, limit=20):
+    """
+    Return up to `limit` (instance, score) pairs for `query`, best first.
+    `score` is the share of the query's trigrams found in the product.
+    """
+    grams = sorted(trigrams(query))[:MAX_QUERY_TRIGRAMS]
+    if not grams:
+        return []
+    models_to_search = models_to_search or list(SEARCH_FIELDS)
+    content_types = ContentType.objects.get_for_models(*models_to_search)
+    model_by_type_id = {content_type.id: model for model, content_type in content_types.items()}
+
+    # Postings alone are grouped, on the (trigram, content_type, entry) index; only the
+    # best candidates are then read from SearchEntry to break ties on document length
+    candidates = list(
+        models.SearchTrigram.objects
+        .filter(trigram__in=grams, content_type_id__in=model_by_type_id.keys())
+        .values('entry_id')
+        .annotate(hits=Count('id'))
+        .filter(hits__gte=math.ceil(len(grams) * MIN_COVERAGE))
+        .order_by('-hits', 'entry_id')
+        .values_list('entry_id', 'hits')[:limit * CANDIDATES_PER_RESULT]
+    )
+    entries = models.SearchEntry.objects.only('content_type_id', 'object_id', 'trigram_count').in_bulk(
+        [entry_id for entry_id, _hits in candidates]
+    )
+    candidates.sort(key=lambda candidate: (-candidate[1], entries[candidate[0]].trigram_count, candidate[0]))
+    ranked = [(entries[entry_id], hits) for entry_id, hits in candidates[:limit]]
+
+    ids_by_type = {}
+    for entry, _hits in ranked:
+        ids_by_type.setdefault(entry.content_type_id, []).append(entry.object_id)
+    instances = {
+        (content_type_id, object_id): instance
+        for content_type_id, ids in ids_by_type.items()
+        for object_id, instance in model_by_type_id[content_type_id].objects.in_bulk(ids).items()
+    }
+    return [
+        (instances[(entry.content_type_id, entry.object_id)], hits / len(grams))
+        for entry, hits in ranked
+        if (entry.content_type_id, entry.object_id) in instances
+    ]
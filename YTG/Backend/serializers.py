@@ -2,9 +2,12 @@ from rest_framework import serializers
 from rest_framework.serializers import ValidationError
 from django.utils import timezone
 from . import models
+from . import orders
+from . import redemptions
+from . import revocation
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext as _
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 
 User = get_user_model()
 
@@ -14,6 +17,13 @@ class UserListSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'nickname', 'point', 'ranking_point', 'is_staff', 'is_active']
         read_only_fields = ['id', 'username', 'email', 'point', 'ranking_point', 'is_staff', 'is_active']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        # Sparse fieldset: keep only the requested columns
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
 
@@ -51,6 +61,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         user.save()
         return user
     
+class PointHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.PointTransaction
+        fields = ['id', 'points', 'description', 'created_at']
+        read_only_fields = fields
+
 class PointTransactionSerializer(serializers.ModelSerializer):
     user = serializers.SlugRelatedField(slug_field='username', queryset=models.UserProfile.objects.all())
 
@@ -87,16 +103,61 @@ class TournamentBulkItemSerializer(serializers.Serializer):
     position = serializers.CharField(max_length=255)  # Changed to CharField to accept strings like "1st", "2nd"
     point_earned = serializers.IntegerField(min_value=0, default=0)
     ranking_point_earned = serializers.IntegerField(min_value=0, default=0)
-
-    def validate_username(self, value):
-        if not models.UserProfile.objects.filter(username=value).exists():
-            raise serializers.ValidationError(_("User with this username does not exist"))
-        return value
+    # Usernames are resolved in one query by the bulk ingestion, which reports unknown users per row
 
 class TournamentBulkSerializer(serializers.Serializer):
     tournament_name = serializers.CharField(max_length=255)
     results = TournamentBulkItemSerializer(many=True)
+    all_or_nothing = serializers.BooleanField(default=False)
+
+class TournamentImportSerializer(serializers.Serializer):
+    tournament_name = serializers.CharField(max_length=255)
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=models.Import_Format_CHOICES, required=False)  # guessed from the file name if omitted
+    chunk_size = serializers.IntegerField(min_value=1, max_value=5000, default=500)
+
+class TournamentImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.TournamentImportJob
+        fields = ['id', 'tournament_name', 'file_format', 'chunk_size', 'status', 'rows_processed', 'rows_imported',
+                  'error_count', 'errors', 'message', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
     
+class OrderBulkStatusSerializer(serializers.Serializer):
+    # Bulk action -> order status
+    ACTIONS = {
+        'confirm': 'confirmed',
+        'complete': 'completed',
+        'cancel': 'cancelled',
+    }
+
+    order_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000)
+    action = serializers.ChoiceField(choices=list(ACTIONS))
+
+class RedemptionBulkConfirmSerializer(serializers.Serializer):
+    redemption_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=redemptions.MAX_BATCH
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=redemptions.MAX_BATCH, default=redemptions.MAX_BATCH)
+
+class StockHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.StockHold
+        fields = ['product_type', 'product_id', 'quantity', 'expires_at']
+        read_only_fields = fields
+
+class CardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Card
+        fields = ['id', 'name', 'card_code', 'version', 'rarity', 'price', 'stock', 'description', 'image', 'updated_at']
+        read_only_fields = fields
+
+class BoosterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Booster
+        fields = ['id', 'name', 'booster_code', 'version', 'price', 'stock', 'description', 'image', 'updated_at']
+        read_only_fields = fields
+
 class RewardSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Reward
@@ -119,6 +180,16 @@ class RewardRedemptionSerializer(serializers.ModelSerializer):
         validated_data['status'] = 'pending'
         return models.RewardRedemption.objects.create(**validated_data)
 
+class AdminRedemptionSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+    reward_name = serializers.CharField(source='reward.name', read_only=True)
+    reward_cost = serializers.IntegerField(source='reward.cost', read_only=True)
+
+    class Meta:
+        model = models.RewardRedemption
+        fields = ['id', 'user_id', 'username', 'reward_id', 'reward_name', 'reward_cost', 'redeemed_at', 'status']
+        read_only_fields = fields
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product_name = serializers.SerializerMethodField()
 
@@ -127,11 +198,11 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product_type', 'product_id', 'quantity', 'product_name', 'price']
 
     def get_product_name(self, obj):
-        if obj.product_type == 'card':
-            return models.Card.objects.get(id=obj.product_id).name
-        elif obj.product_type == 'booster':
-            return models.Booster.objects.get(id=obj.product_id).name
-        return None
+        # Names resolved in bulk by the view (see orders.serializer_context)
+        names = self.context.get('product_names')
+        if names is None:
+            names = orders.product_names([obj])
+        return names.get((obj.product_type, obj.product_id))
     
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
@@ -143,6 +214,7 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at', 'updated_at']
 
     def get_total_price(self, obj):
+        # Served from the prefetched items when the view used prefetch_related('items')
         return sum(item.price * item.quantity for item in obj.items.all())
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -153,8 +225,13 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         # Add custom claims
         token['username'] = user.username
         token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
         token['nickname'] = user.userprofile.nickname if hasattr(user, 'userprofile') else ""
         token['point'] = user.userprofile.point if hasattr(user, 'userprofile') else 0
         token['ranking_point'] = user.userprofile.ranking_point if hasattr(user, 'userprofile') else 0
 
-        return token
\ No newline at end of file
+        return token
+
+class RevocationTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh serializer checking the refresh token through Backend.revocation instead of the blacklist join."""
+    token_class = revocation.RefreshToken
\ No newline at end of file
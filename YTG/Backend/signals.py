@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog
+from . import models
+from . import rewards
+from . import search
+
+
+@receiver(post_save, sender=models.Card)
+@receiver(post_save, sender=models.Booster)
+def index_product(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Stock-only saves leave the search document unchanged
+    if raw or (update_fields is not None and not set(update_fields) & set(search.SEARCH_FIELDS[sender])):
+        return
+    search.index_object(instance)
+
+
+@receiver(post_delete, sender=models.Card)
+@receiver(post_delete, sender=models.Booster)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+@receiver(post_save, sender=models.Card)
+@receiver(post_save, sender=models.Booster)
+@receiver(post_delete, sender=models.Card)
+@receiver(post_delete, sender=models.Booster)
+def invalidate_catalog(sender, **kwargs):
+    transaction.on_commit(catalog.invalidate)
+
+
+@receiver(post_save, sender=models.Reward)
+@receiver(post_delete, sender=models.Reward)
+def invalidate_rewards(sender, **kwargs):
+    transaction.on_commit(rewards.invalidate)
@@ -71,3 +71,79 @@ class AdminEndpointsTests(APITestCase):
         r2 = self.client.post(url_bulk, [], format='json')
         self.assertEqual(r2.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_tournament_bulk_set_based(self):
+        self.client.force_authenticate(self.admin)
+        url_bulk = reverse('tournament_bulk')
+        players = [
+            models.UserProfile.objects.create_user(username=f'p{i}', password='Pass12345', nickname=f'p{i}')
+            for i in range(20)
+        ]
+        payload = {
+            'tournament_name': 'Regional',
+            'results': [
+                {'username': p.username, 'position': str(i + 1), 'point_earned': 5, 'ranking_point_earned': 10}
+                for i, p in enumerate(players)
+            ] + [
+                {'username': 'ghost', 'position': '21', 'point_earned': 5},
+                {'username': 'p0', 'position': 'side event', 'point_earned': 1},
+            ],
+        }
+
+        # Query count does not grow with the number of participants
+        with self.assertNumQueries(14):
+            r1 = self.client.post(url_bulk, payload, format='json')
+        self.assertEqual(r1.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(r1.data['total_processed'], 21)
+        self.assertEqual([e['index'] for e in r1.data['errors']], [20])
+        players[0].refresh_from_db()
+        self.assertEqual((players[0].point, players[0].ranking_point), (6, 10))
+
+        # all_or_nothing rejects the whole batch
+        payload['all_or_nothing'] = True
+        r2 = self.client.post(url_bulk, payload, format='json')
+        self.assertEqual(r2.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(models.TournamentResult.objects.filter(tournament_name='Regional').count(), 21)
+
+
+class UserListTests(APITestCase):
+    def setUp(self):
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        for i in range(7):
+            models.UserProfile.objects.create_user(
+                username=f'player{i}', password='Pass12345', nickname=f'Nick{i}', email=f'p{i}@example.com',
+                phone=f'0900{i}', point=(i * 10) % 40, ranking_point=i,
+            )
+        self.client.force_authenticate(self.admin)
+
+    def walk(self, **params):
+        seen = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=3, **({'cursor': cursor} if cursor else {}))
+            resp = self.client.get(reverse('user_list'), query)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen += resp.data['results']
+            cursor = resp.data['next_cursor']
+            if cursor is None:
+                return seen
+
+    def test_pages_sorted_by_point(self):
+        rows = self.walk(ordering='-point', search='player')
+        self.assertEqual([row['point'] for row in rows], [30, 20, 20, 10, 10, 0, 0])
+        # Ties on point fall back to id, so every user appears once
+        self.assertEqual(len({row['id'] for row in rows}), 7)
+        self.assertEqual([row['username'] for row in self.walk(ordering='ranking_point')][:2], ['admin', 'player0'])
+
+    def test_prefix_search(self):
+        self.assertEqual([row['username'] for row in self.walk(search='nick3')], ['player3'])
+        self.assertEqual([row['username'] for row in self.walk(search='P5@')], ['player5'])
+        self.assertEqual([row['username'] for row in self.walk(search='09006')], ['player6'])
+        # Prefix only: the middle of a value does not match
+        self.assertEqual(self.walk(search='layer'), [])
+
+    def test_sparse_fields(self):
+        resp = self.client.get(reverse('user_list'), {'fields': 'username,point', 'ordering': '-point'})
+        self.assertEqual(set(resp.data['results'][0]), {'username', 'point'})
+
+        for params in ({'fields': 'password'}, {'ordering': 'email'}, {'cursor': 'x'}, {'page_size': 'all'}):
+            self.assertEqual(self.client.get(reverse('user_list'), params).status_code, status.HTTP_400_BAD_REQUEST, params)
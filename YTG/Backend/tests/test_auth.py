@@ -1,7 +1,21 @@
+import io
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+from Backend import authentication
 from Backend import models
+from Backend import revocation
+from Backend import serializers
 
 
 class AuthTests(APITestCase):
@@ -49,3 +63,172 @@ class AuthTests(APITestCase):
 
 
 
+
+
+class StatelessAuthTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        authentication.forget()
+        self.user = models.UserProfile.objects.create_user(username='user1', password='StrongPass123!', nickname='n1', point=40)
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        models.PointTransaction.objects.create(user=self.user, points=40, description='seed')
+        models.Reward.objects.create(name='Mat', cost=30, stock=2)
+
+    def authorize(self, user):
+        token = serializers.CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_reads_use_the_cached_row(self):
+        self.authorize(self.user)
+        # Cold: the user row, then the history page
+        with self.assertNumQueries(2):
+            self.client.get(reverse('point_transaction_history'))
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('point_transaction_history'))
+        self.assertEqual((resp.data['username'], len(resp.data['results'])), ('user1', 1))
+
+        self.authorize(self.admin)
+        self.client.get(reverse('point_transaction_history'))
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('point_transaction_history'), {'user_id': self.user.id})
+        self.assertEqual(resp.data['username'], 'user1')
+
+    def test_row_is_loaded_on_demand_and_cached(self):
+        self.authorize(self.user)
+        # Cold: the user row and the reward snapshot
+        with self.assertNumQueries(2):
+            self.client.get(reverse('reward_list'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('reward_list'))
+        self.assertEqual((resp.data['balance'], resp.data['results'][0]['affordable']), (40, True))
+
+        # The cached row is reused until it expires
+        models.UserProfile.objects.filter(id=self.user.id).update(point=10)
+        self.assertEqual(self.client.get(reverse('reward_list')).data['balance'], 40)
+        authentication.forget(self.user.id)
+        self.assertEqual(self.client.get(reverse('reward_list')).data['balance'], 10)
+
+    def test_demoted_and_deactivated_users_lose_access(self):
+        self.authorize(self.admin)
+        url = reverse('point_transaction_history')
+        self.assertEqual(self.client.get(url, {'user_id': self.user.id}).data['username'], 'user1')
+
+        # Privileges come from the row, not from the is_staff claim still in the token
+        models.UserProfile.objects.filter(id=self.admin.id).update(is_staff=False)
+        authentication.forget(self.admin.id)
+        resp = self.client.get(url, {'user_id': self.user.id})
+        self.assertEqual((resp.data['username'], resp.data['results']), ('admin', []))
+
+        models.UserProfile.objects.filter(id=self.admin.id).update(is_active=False)
+        authentication.forget(self.admin.id)
+        self.assertEqual(self.client.get(url, {'user_id': self.user.id}).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.get(reverse('reward_list')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        token = AccessToken.for_user(self.admin)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        resp = self.client.get(reverse('point_transaction_history'), {'user': 'user1'})
+        self.assertEqual(resp.data['username'], 'user1')
+
+        self.authorize(self.user)
+        self.user.delete()
+        self.assertEqual(self.client.get(reverse('reward_list')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RevocationTests(APITestCase):
+    def setUp(self):
+        # Ids are reused once a test rolls back; the filter must not outlive them
+        revocation.reset()
+        self.password = 'StrongPass123!'
+        self.user = models.UserProfile.objects.create_user(username='user1', password=self.password, nickname='n1')
+
+    def login(self):
+        resp = self.client.post(reverse('login'), {'username': 'user1', 'password': self.password}, format='json')
+        return resp.data['refresh']
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, format='json')
+
+    def test_rotated_and_logged_out_tokens_are_rejected(self):
+        first = self.login()
+        resp = self.refresh(first)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        second = resp.data['refresh']
+        self.assertIn('access', resp.data)
+        # The rotated token is blacklisted
+        self.assertEqual(self.refresh(first).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual(self.client.post(reverse('logout'), {'refresh': second}, format='json').status_code, status.HTTP_205_RESET_CONTENT)
+        self.assertEqual(self.refresh(second).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def outstanding(self, jti):
+        return OutstandingToken.objects.create(
+            user=self.user, jti=jti, token='x', created_at=timezone.now(), expires_at=timezone.now() + timedelta(days=1)
+        )
+
+    def test_unrevoked_check_skips_the_blacklist(self):
+        revoked = revocation.RefreshToken.for_user(self.user)
+        revoked.blacklist()
+        live = revocation.RefreshToken.for_user(self.user)
+        revocation.is_revoked('warm-up')
+        self.assertTrue(revocation.ready())
+        # Between syncs a miss costs no query, and a hit one indexed jti lookup
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation.is_revoked(live['jti']))
+        with self.assertNumQueries(1):
+            self.assertTrue(revocation.is_revoked(revoked['jti']))
+        # Blacklisted in this process: seen before the next sync
+        live.blacklist()
+        with self.assertNumQueries(1):
+            self.assertTrue(revocation.is_revoked(live['jti']))
+
+    def test_other_processes_revocations_are_seen_after_a_sync(self):
+        revocation.is_revoked('warm-up')
+        BlacklistedToken.objects.create(token=self.outstanding('elsewhere'))
+        self.assertFalse(revocation.is_revoked('elsewhere'))
+        with mock.patch('Backend.revocation.time.monotonic', return_value=time.monotonic() + revocation.SYNC_SECONDS):
+            with self.assertNumQueries(2):
+                self.assertTrue(revocation.is_revoked('elsewhere'))
+
+    @mock.patch('Backend.revocation.SYNC_SECONDS', 0)
+    def test_late_commit_behind_newer_rows_is_seen(self):
+        BlacklistedToken.objects.create(id=10, token=self.outstanding('first'))
+        self.assertFalse(revocation.is_revoked('late'))
+        BlacklistedToken.objects.create(id=1000, token=self.outstanding('newer'))
+        self.assertFalse(revocation.is_revoked('late'))
+        # A row whose id was taken before 1000 but committed afterwards
+        BlacklistedToken.objects.create(id=500, token=self.outstanding('late'))
+        self.assertTrue(revocation.is_revoked('late'))
+
+    @mock.patch('Backend.revocation.REBUILD_CHUNK', 2)
+    def test_filter_is_built_a_chunk_per_check(self):
+        for i in range(5):
+            BlacklistedToken.objects.create(token=self.outstanding(f'jti-{i}'))
+        # Until the filter is ready, checks use the jti lookup; none reads more than a chunk
+        checks = 0
+        while not revocation.ready():
+            self.assertTrue(revocation.is_revoked(f'jti-{checks}'))
+            checks += 1
+        self.assertEqual(checks, 3)
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation.is_revoked('live'))
+        self.assertTrue(all(revocation.is_revoked(f'jti-{i}') for i in range(5)))
+
+    def test_bloom_filter_false_positive_rate(self):
+        bloom = revocation.BloomFilter(10000)
+        for _ in range(10000):
+            bloom.add(uuid.uuid4().hex)
+        false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_purge_expired_tokens(self):
+        now = timezone.now()
+        for i, expires_at in enumerate([now - timedelta(days=1), now - timedelta(seconds=1), now + timedelta(days=1)]):
+            token = OutstandingToken.objects.create(user=self.user, jti=f'jti-{i}', token='x', created_at=now, expires_at=expires_at)
+            BlacklistedToken.objects.create(token=token)
+
+        out = io.StringIO()
+        call_command('purge_expired_tokens', '--batch-size', '1', stdout=out)
+        self.assertIn('Purged 2', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['jti-2'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import catalog
+from Backend import models
+
+
+class CatalogTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        models.Card.objects.bulk_create([
+            models.Card(name=f'Card {i}', price=i % 5 + 1, stock=i % 3, card_code=f'LOB-{i:03d}',
+                        rarity='common' if i % 2 else 'rare')
+            for i in range(30)
+        ])
+        models.Booster.objects.create(name='Legend of Blue Eyes', price=4, stock=2, booster_code='LOB')
+        models.Booster.objects.create(name='Metal Raiders', price=4, stock=0, booster_code='MRD')
+
+    def walk(self, url, params):
+        seen = []
+        cursor = None
+        while True:
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            resp = self.client.get(url, query)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen += resp.data['results']
+            cursor = resp.data['next_cursor']
+            if cursor is None:
+                return seen
+
+    def test_filtered_pages_follow_price_order(self):
+        rows = self.walk(reverse('card_list'), {'rarity': 'rare', 'in_stock': 'true', 'ordering': '-price', 'page_size': 4})
+        expected = models.Card.objects.filter(rarity='rare', stock__gt=0).order_by('-price', '-id')
+        self.assertEqual([row['id'] for row in rows], list(expected.values_list('id', flat=True)))
+
+    def test_price_range_and_code_filters(self):
+        resp = self.client.get(reverse('card_list'), {'min_price': 2, 'max_price': 3})
+        self.assertTrue(all(2 <= float(row['price']) <= 3 for row in resp.data['results']))
+        resp = self.client.get(reverse('booster_list'), {'booster_code': 'LOB'})
+        self.assertEqual([row['name'] for row in resp.data['results']], ['Legend of Blue Eyes'])
+        resp = self.client.get(reverse('booster_list'), {'in_stock': 'false'})
+        self.assertEqual([row['name'] for row in resp.data['results']], ['Metal Raiders'])
+
+    def test_invalid_parameters(self):
+        for params in ({'ordering': 'name'}, {'min_price': 'abc'}, {'cursor': '!!'}, {'page_size': 0}, {'in_stock': 'maybe'}):
+            resp = self.client.get(reverse('card_list'), params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = models.UserProfile.objects.create_user(username='buyer', password='Pass12345', nickname='buyer')
+        self.card = models.Card.objects.create(name='Blue-Eyes', price=10, stock=5, card_code='LOB-001', rarity='ultra rare')
+
+    def test_cached_responses_and_conditional_get(self):
+        url = reverse('card_detail', args=[self.card.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        etag = first['ETag']
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((cached.data, cached['ETag']), (first.data, etag))
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Query parameters are part of the key
+        self.assertEqual(len(self.client.get(reverse('card_list'), {'rarity': 'common'}).data['results']), 0)
+        self.assertEqual(len(self.client.get(reverse('card_list'), {'rarity': 'ultra rare'}).data['results']), 1)
+        self.assertEqual(self.client.get(reverse('card_detail', args=[999])).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_invalidate_cached_responses(self):
+        url = reverse('card_detail', args=[self.card.id])
+        etag = self.client.get(url)['ETag']
+        list_url = reverse('card_list')
+        self.client.get(list_url)
+
+        # Orders decrement stock with a set-based UPDATE, bypassing save signals
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(reverse('create_order'), {'items': [
+                {'product_type': 'card', 'product_id': self.card.id, 'quantity': 2},
+            ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['stock'], 3)
+        self.assertNotEqual(resp['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.card.price = 12
+            self.card.save()
+        self.assertEqual(self.client.get(list_url).data['results'][0]['price'], '12.00')
+
+    def test_per_process_cache_keeps_pages_briefly(self):
+        # Tests run on LocMemCache, whose invalidations other workers never see
+        with mock.patch('Backend.views.cache.set', wraps=cache.set) as cache_set:
+            self.client.get(reverse('card_list'))
+        self.assertEqual(cache_set.call_args.args[2], catalog.LOCAL_CACHE_TIMEOUT)
+        self.assertLess(catalog.LOCAL_CACHE_TIMEOUT, catalog.SHARED_CACHE_TIMEOUT)
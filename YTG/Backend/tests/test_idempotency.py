@@ -0,0 +1,63 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import models
+
+
+class IdempotencyTests(APITestCase):
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(username='buyer', password='Pass12345', nickname='buyer')
+        self.card = models.Card.objects.create(name='Blue-Eyes', price=10, stock=5, card_code='LOB-001', rarity='ultra rare')
+        self.reward = models.Reward.objects.create(name='Sleeves', cost=10, stock=2)
+        self.client.force_authenticate(self.user)
+
+    def order(self, key, quantity=2):
+        return self.client.post(reverse('create_order'), {'items': [
+            {'product_type': 'card', 'product_id': self.card.id, 'quantity': quantity},
+        ]}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_order_is_created_once(self):
+        first = self.order('order-1')
+        retry = self.order('order-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(models.Order.objects.count(), 1)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.stock, 3)
+
+        # A new key is a new order; a reused key with another body is refused
+        self.assertEqual(self.order('order-2').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.order('order-1', quantity=1).status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(models.Order.objects.count(), 2)
+
+    def test_errors_are_replayed_and_keys_expire(self):
+        self.assertEqual(self.order('big', quantity=9).status_code, status.HTTP_400_BAD_REQUEST)
+        self.card.stock = 10
+        self.card.save()
+        self.assertEqual(self.order('big', quantity=9).status_code, status.HTTP_400_BAD_REQUEST)
+
+        models.IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.order('big', quantity=9).status_code, status.HTTP_201_CREATED)
+
+        models.IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('Purged 1 expired idempotency keys', out.getvalue())
+
+    def test_retried_redemption_is_created_once(self):
+        url = reverse('point_redeem')
+        first = self.client.post(url, {'reward': self.reward.id}, format='json', HTTP_IDEMPOTENCY_KEY='redeem-1')
+        retry = self.client.post(url, {'reward': self.reward.id}, format='json', HTTP_IDEMPOTENCY_KEY='redeem-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(models.RewardRedemption.objects.count(), 1)
+
+        # Keys are scoped per endpoint
+        self.assertEqual(self.order('redeem-1').status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import imports
+from Backend import models
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(TOURNAMENT_IMPORT_ASYNC=False, MEDIA_ROOT=MEDIA_ROOT)
+class TournamentImportTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.admin = models.UserProfile.objects.create_user(
+            username='admin', password='AdminPass123', nickname='adm', is_staff=True
+        )
+        for i in range(5):
+            models.UserProfile.objects.create_user(username=f'p{i}', password='Pass12345', nickname=f'p{i}')
+
+    def test_csv_import_job(self):
+        lines = ['username,position,point_earned,ranking_point_earned']
+        lines += [f'p{i},{i + 1},3,{10 - i}' for i in range(5)]
+        lines += ['ghost,6,3,1', 'p0,7,not-a-number,1']
+        upload = SimpleUploadedFile('regional.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+        self.client.force_authenticate(self.admin)
+        resp = self.client.post(reverse('tournament_import'), {
+            'tournament_name': 'Regional', 'file': upload, 'chunk_size': 2,
+        }, format='multipart')
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+
+        poll = self.client.get(reverse('tournament_import_job', args=[resp.data['job']['id']]))
+        self.assertEqual(poll.status_code, status.HTTP_200_OK)
+        self.assertEqual(poll.data['status'], 'completed')
+        self.assertEqual((poll.data['rows_processed'], poll.data['rows_imported'], poll.data['error_count']), (7, 5, 2))
+        self.assertEqual([e['index'] for e in poll.data['errors']], [5, 6])
+        self.assertEqual(models.UserProfile.objects.get(username='p0').point, 3)
+
+    def test_ndjson_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as source:
+            source.write('{"username": "p1", "position": "1st", "ranking_point_earned": 4}\n')
+            source.write('\n{broken\n')
+            source.write('{"username": "p2", "position": "2nd", "point_earned": 2}\n')
+        self.addCleanup(os.remove, source.name)
+        err = StringIO()
+        call_command('import_tournament', source.name, name='Weekly', stdout=StringIO(), stderr=err)
+
+        job = models.TournamentImportJob.objects.get()
+        self.assertEqual((job.status, job.rows_imported, job.error_count), ('completed', 2, 1))
+        self.assertIn('row 1', err.getvalue())
+        self.assertEqual(models.UserProfile.objects.get(username='p1').ranking_point, 4)
+
+    def test_stale_jobs_are_resumed_or_failed(self):
+        lines = ['username,position,point_earned,ranking_point_earned'] + [f'p{i},{i + 1},3,1' for i in range(5)]
+        # A worker died after committing the first chunk of two rows
+        orphan = models.TournamentImportJob.objects.create(
+            tournament_name='Regional', file_format='csv', chunk_size=2, status='running', rows_processed=2, rows_imported=2,
+            source=SimpleUploadedFile('regional.csv', '\n'.join(lines).encode()),
+        )
+        inline = models.TournamentImportJob.objects.create(tournament_name='Weekly', file_format='csv', status='running')
+        live = models.TournamentImportJob.objects.create(tournament_name='Open', file_format='csv', status='running')
+        stale_at = timezone.now() - imports.STALE_AFTER - timedelta(seconds=1)
+        models.TournamentImportJob.objects.exclude(id=live.id).update(updated_at=stale_at)
+
+        out = StringIO()
+        call_command('recover_tournament_imports', stdout=out)
+        self.assertIn('Resumed 1 stale imports, failed 1', out.getvalue())
+
+        orphan.refresh_from_db()
+        self.assertEqual((orphan.status, orphan.rows_processed, orphan.rows_imported), ('completed', 5, 5))
+        # Rows of the committed chunk are not imported again
+        self.assertEqual(
+            list(models.UserProfile.objects.filter(username__startswith='p').order_by('username').values_list('point', flat=True)),
+            [0, 0, 3, 3, 3],
+        )
+        self.assertEqual(models.TournamentImportJob.objects.get(id=inline.id).status, 'failed')
+        self.assertEqual(models.TournamentImportJob.objects.get(id=live.id).status, 'running')
@@ -0,0 +1,136 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from Backend import ledger
+from Backend import models
+from Backend import reconciliation
+
+
+class PointLedgerConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    ROUNDS = 25
+
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(
+            username='target', password='Pass12345', nickname='target'
+        )
+
+    def hammer(self, points, errors, barrier):
+        barrier.wait()
+        try:
+            for _ in range(self.ROUNDS):
+                while True:
+                    try:
+                        ledger.adjust_points(self.user, points, 'stress')
+                        break
+                    except OperationalError:
+                        # SQLite reports write contention instead of waiting; retry the whole unit
+                        if connection.vendor != 'sqlite':
+                            raise
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_adjustments_lose_no_deltas(self):
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+        deltas = [3 if i % 2 else -1 for i in range(self.THREADS)]
+        threads = [threading.Thread(target=self.hammer, args=(delta, errors, barrier)) for delta in deltas]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.point, sum(deltas) * self.ROUNDS)
+        self.assertEqual(models.PointTransaction.objects.filter(user=self.user).count(), self.THREADS * self.ROUNDS)
+
+    def test_debit_requires_balance(self):
+        ledger.adjust_points(self.user, 5)
+        with self.assertRaises(ledger.InsufficientPoints):
+            ledger.adjust_points(self.user, -6, require_balance=True)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.point, 5)
+        self.assertEqual(models.PointTransaction.objects.filter(user=self.user).count(), 1)
+
+
+class PointTransactionIdTests(TestCase):
+    def test_ids_are_unique_and_time_ordered(self):
+        ids = [models.generate_id() for _ in range(5000)]
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(ids, sorted(ids))
+        self.assertTrue(all(len(i) == models.ID_LENGTH for i in ids))
+
+    def test_bulk_create_needs_no_id_lookups(self):
+        user = models.UserProfile.objects.create_user(username='bulk', password='Pass12345', nickname='bulk')
+        with self.assertNumQueries(1):
+            models.PointTransaction.objects.bulk_create(
+                [models.PointTransaction(user=user, points=1) for _ in range(50)]
+            )
+        self.assertEqual(models.PointTransaction.objects.filter(user=user).count(), 50)
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(username='drift', password='Pass12345', nickname='drift')
+        self.other = models.UserProfile.objects.create_user(username='steady', password='Pass12345', nickname='steady')
+        ledger.adjust_points(self.user, 40, 'seed')
+        ledger.credit_tournament_result(self.user, 'Cup', '1st', point_earned=10, ranking_point_earned=7)
+        ledger.adjust_points(self.other, 5, 'seed')
+
+    def test_reports_and_repairs_drift(self):
+        models.UserProfile.objects.filter(id=self.user.id).update(point=999)
+
+        out = StringIO()
+        call_command('reconcile_points', chunk_size=1, stdout=out, stderr=StringIO())
+        self.assertIn(f'{self.user.id},drift,999,50,7,7,False', out.getvalue())
+        self.assertNotIn('steady', out.getvalue())
+
+        diffs = list(reconciliation.reconcile(repair=True))
+        self.assertEqual([d['user_id'] for d in diffs], [self.user.id])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.point, 50)
+        self.assertEqual(list(reconciliation.reconcile()), [])
+
+    def test_write_between_balance_read_and_ledger_sum(self):
+        # An adjustment that commits after the balances were read but before the ledger is
+        # summed must neither be reported as drift nor be applied a second time by a repair
+        models.UserProfile.objects.filter(id=self.other.id).update(point=999)
+        ledger_totals = reconciliation._ledger_totals
+        interleaved = []
+
+        def adjust_then_sum(queryset, *args):
+            if not interleaved:
+                interleaved.append(ledger.adjust_points(self.user, 25, 'concurrent'))
+            return ledger_totals(queryset, *args)
+
+        with mock.patch.object(reconciliation, '_ledger_totals', side_effect=adjust_then_sum):
+            diffs = list(reconciliation.reconcile(repair=True))
+        self.assertEqual([(d['user_id'], d['repaired']) for d in diffs], [(self.other.id, True)])
+        self.user.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual((self.user.point, self.other.point), (75, 5))
+        self.assertEqual(list(reconciliation.reconcile()), [])
+
+    def test_snapshot_limits_later_scans(self):
+        # Age the existing ledger past the snapshot lag, then snapshot it
+        past = timezone.now() - timedelta(days=1)
+        models.PointTransaction.objects.update(created_at=past)
+        models.TournamentResult.objects.update(created_at=past)
+        self.assertEqual(list(reconciliation.reconcile(take_snapshot=True)), [])
+        snapshot = reconciliation.latest_snapshot()
+        self.assertEqual(snapshot.balances.get(user=self.user).point, 50)
+
+        # Rows covered by the snapshot are no longer read
+        models.PointTransaction.objects.filter(created_at__lte=snapshot.as_of).delete()
+        ledger.adjust_points(self.user, -20, 'spend')
+        self.assertEqual(list(reconciliation.reconcile()), [])
+        self.assertEqual(len(list(reconciliation.reconcile(full=True))), 2)
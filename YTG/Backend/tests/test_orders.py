@@ -0,0 +1,146 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import models
+
+
+class OrderTests(APITestCase):
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(
+            username='buyer', password='Pass12345', nickname='buyer'
+        )
+        self.card = models.Card.objects.create(name='Blue-Eyes', price=10, stock=5, card_code='LOB-001', rarity='ultra rare')
+        self.booster = models.Booster.objects.create(name='Legend of Blue Eyes', price=4, stock=2, booster_code='LOB')
+
+    def test_create_order_decrements_stock(self):
+        self.client.force_authenticate(self.user)
+        items = [
+            {'product_type': 'card', 'product_id': self.card.id, 'quantity': 2},
+            {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': 2},
+        ]
+        resp = self.client.post(reverse('create_order'), {'items': items}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['total_price'], 28)
+        self.card.refresh_from_db()
+        self.booster.refresh_from_db()
+        self.assertEqual((self.card.stock, self.booster.stock), (3, 0))
+
+        # Lines carry a generic relation to their product
+        items = models.OrderItem.objects.filter(order_id=resp.data['order_id']).prefetch_related('product')
+        self.assertEqual({item.product for item in items}, {self.card, self.booster})
+
+    def test_failed_item_rolls_back_whole_order(self):
+        self.client.force_authenticate(self.user)
+        items = [
+            {'product_type': 'card', 'product_id': self.card.id, 'quantity': 1},
+            {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': 3},
+        ]
+        resp = self.client.post(reverse('create_order'), {'items': items}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        items[1] = {'product_type': 'booster', 'product_id': 999, 'quantity': 1}
+        resp = self.client.post(reverse('create_order'), {'items': items}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.stock, 5)
+        self.assertFalse(models.Order.objects.exists())
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = models.Order.objects.create(user=self.user)
+            models.OrderItem.objects.create(order=order, product_type='card', product_id=self.card.id, quantity=1, price=10)
+            models.OrderItem.objects.create(order=order, product_type='booster', product_id=self.booster.id, quantity=1, price=4)
+
+    def test_order_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        url = reverse('user_orders')
+
+        self.create_orders(1)
+        with self.assertNumQueries(4):
+            resp = self.client.get(url)
+        self.assertEqual(resp.data[0]['items'][0]['product_name'], 'Blue-Eyes')
+
+        self.create_orders(20)
+        with self.assertNumQueries(4):
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.data), 21)
+        self.assertEqual(resp.data[-1]['items'][1]['product_name'], 'Legend of Blue Eyes')
+
+        with self.assertNumQueries(4):
+            self.client.get(reverse('order_detail', args=[resp.data[0]['id']]))
+
+
+class OrderStatusTests(APITestCase):
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(username='buyer', password='Pass12345', nickname='buyer')
+        self.staff = models.UserProfile.objects.create_user(username='clerk', password='Pass12345', nickname='clerk', is_staff=True)
+        self.staff.user_permissions.add(Permission.objects.get(codename='can_confirm_order'))
+        self.card = models.Card.objects.create(name='Blue-Eyes', price=10, stock=50, card_code='LOB-001', rarity='ultra rare')
+        self.booster = models.Booster.objects.create(name='Legend of Blue Eyes', price=4, stock=50, booster_code='LOB')
+
+    def place_order(self, cards=2, boosters=1):
+        self.client.force_authenticate(self.user)
+        resp = self.client.post(reverse('create_order'), {'items': [
+            {'product_type': 'card', 'product_id': self.card.id, 'quantity': cards},
+            {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': boosters},
+        ]}, format='json')
+        return resp.data['order_id']
+
+    def stock(self):
+        self.card.refresh_from_db()
+        self.booster.refresh_from_db()
+        return self.card.stock, self.booster.stock
+
+    def test_cancel_restores_stock(self):
+        order_id = self.place_order()
+        self.assertEqual(self.stock(), (48, 49))
+        resp = self.client.post(reverse('cancel_order', args=[order_id]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stock(), (50, 50))
+
+        resp = self.client.post(reverse('cancel_order', args=[order_id]))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.stock(), (50, 50))
+
+    def test_transitions_require_permission_and_follow_state_machine(self):
+        order_id = self.place_order()
+        self.assertEqual(self.client.post(reverse('admin_confirm_order', args=[order_id])).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.post(reverse('admin_complete_order', args=[order_id])).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(reverse('admin_confirm_order', args=[order_id])).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(reverse('admin_confirm_order', args=[order_id])).status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Confirmed orders can no longer be cancelled by their owner, only by staff
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post(reverse('cancel_order', args=[order_id])).status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.post(reverse('cancel_order', args=[order_id])).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stock(), (50, 50))
+
+    def test_bulk_transitions_use_constant_queries(self):
+        def bulk_cancel(count):
+            order_ids = [self.place_order(cards=1, boosters=1) for _ in range(count)]
+            self.client.force_authenticate(self.staff)
+            with CaptureQueriesContext(connection) as queries:
+                resp = self.client.post(reverse('admin_bulk_orders'), {'order_ids': order_ids, 'action': 'cancel'}, format='json')
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(sorted(resp.data['updated']), order_ids)
+            return len(queries)
+
+        bulk_cancel(1)  # Warms the staff user's permission cache
+        self.assertEqual(bulk_cancel(2), bulk_cancel(40))
+        self.assertEqual(self.stock(), (50, 50))
+
+        completed = self.place_order()
+        models.Order.objects.filter(id=completed).update(status='completed')
+        pending = self.place_order()
+        self.client.force_authenticate(self.staff)
+        resp = self.client.post(reverse('admin_bulk_orders'), {'order_ids': [completed, pending, 999], 'action': 'confirm'}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(resp.data['updated'], [pending])
+        self.assertEqual([error['order_id'] for error in resp.data['errors']], [completed, 999])
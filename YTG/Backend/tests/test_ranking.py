@@ -0,0 +1,246 @@
+import random
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import catalog
+from Backend import leaderboard
+from Backend import ledger
+from Backend import models
+from Backend import pagination
+from Backend import ranking
+
+
+class MonthlyRankingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = models.UserProfile.objects.create_user(
+            username='admin', password='AdminPass123', nickname='adm', is_staff=True
+        )
+        self.alice = models.UserProfile.objects.create_user(
+            username='alice', password='Pass12345', nickname='alicek'
+        )
+        self.bob = models.UserProfile.objects.create_user(
+            username='bob', password='Pass12345', nickname='bobby'
+        )
+        self.carol = models.UserProfile.objects.create_user(
+            username='carol', password='Pass12345', nickname='caro'
+        )
+
+    def add_result(self, user, ranking_point_earned):
+        self.client.force_authenticate(self.admin)
+        resp = self.client.post(reverse('tournament_add'), {
+            'user': user.username,
+            'tournament_name': 'Local Cup',
+            'position': '1st',
+            'point_earned': 0,
+            'ranking_point_earned': ranking_point_earned,
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+
+    def test_tournament_writes_update_ranking_table(self):
+        self.add_result(self.alice, 10)
+        self.add_result(self.bob, 30)
+        self.add_result(self.carol, 30)
+        self.add_result(self.alice, 5)
+
+        now = timezone.localtime()
+        rows = {
+            row.user_id: (row.ranking_earned, row.rank)
+            for row in models.MonthlyRanking.objects.filter(year=now.year, month=now.month)
+        }
+        self.assertEqual(rows[self.bob.id], (30, 1))
+        self.assertEqual(rows[self.carol.id], (30, 1))
+        self.assertEqual(rows[self.alice.id], (15, 2))
+
+        self.client.force_authenticate(None)
+        resp = self.client.get(reverse('monthly_ranking'), {'year': now.year, 'month': now.month})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['total_items'], 3)
+        self.assertEqual([r['nickname'] for r in resp.data['results']], ['bobby', 'caro', 'alicek'])
+        self.assertEqual([r['rank'] for r in resp.data['results']], [1, 1, 2])
+
+    def test_rebuild_command_matches_incremental_table(self):
+        self.add_result(self.alice, 10)
+        self.add_result(self.bob, 20)
+        expected = list(models.MonthlyRanking.objects.order_by('user_id').values_list('user_id', 'ranking_earned', 'rank'))
+
+        models.MonthlyRanking.objects.all().delete()
+        call_command('rebuild_monthly_ranking', stdout=StringIO())
+        rebuilt = list(models.MonthlyRanking.objects.order_by('user_id').values_list('user_id', 'ranking_earned', 'rank'))
+        self.assertEqual(rebuilt, expected)
+
+    def test_partial_rerank_matches_dense_rank(self):
+        users = [self.admin, self.alice, self.bob, self.carol] + [
+            models.UserProfile.objects.create_user(username=f'player{i}', password='Pass12345', nickname=f'p{i}')
+            for i in range(6)
+        ]
+        now = timezone.localtime()
+        month_rows = models.MonthlyRanking.objects.filter(year=now.year, month=now.month)
+        chooser = random.Random(7)
+        for _ in range(40):
+            # Small scores so writes keep creating, merging and splitting ties
+            results = [
+                models.TournamentResult.objects.create(
+                    user=user, tournament_name='Cup', position='1st', ranking_point_earned=chooser.choice([0, 1, 2, 5])
+                )
+                for user in chooser.sample(users, chooser.randint(1, 3))
+            ]
+            ranking.record_results(results)
+            scores = sorted({score for score in month_rows.values_list('ranking_earned', flat=True)}, reverse=True)
+            for user_id, score, rank in month_rows.values_list('user_id', 'ranking_earned', 'rank'):
+                self.assertEqual(rank, scores.index(score) + 1, (user_id, score))
+
+    def test_count_cache_is_dropped_on_commit(self):
+        self.add_result(self.alice, 10)
+        now = timezone.localtime()
+        self.assertEqual(ranking.ranked_count(now.year, now.month), 1)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            ranking.record_results([models.TournamentResult.objects.create(
+                user=self.bob, tournament_name='Cup', position='1st', ranking_point_earned=3
+            )])
+            # Still cached until the transaction commits
+            self.assertEqual(ranking.ranked_count(now.year, now.month), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(ranking.ranked_count(now.year, now.month), 2)
+        # Other workers never see the drop on a per-process cache, so it expires soon
+        self.assertEqual(ranking.COUNT_CACHE_TIMEOUT, catalog.LOCAL_CACHE_TIMEOUT)
+
+    def test_invalid_month(self):
+        resp = self.client.get(reverse('monthly_ranking'), {'year': 2025, 'month': 13})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        for user, points in [(self.alice, 10), (self.bob, 30), (self.carol, 30), (self.admin, 5)]:
+            self.add_result(user, points)
+        self.client.force_authenticate(None)
+        url = reverse('monthly_ranking')
+
+        seen = []
+        params = {'pagination': 'cursor', 'page_size': 2, 'include_total': 'true'}
+        while True:
+            resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp.data['total_items'], 4)
+            seen.extend(r['nickname'] for r in resp.data['results'])
+            if not resp.data['next_cursor']:
+                break
+            params = {'cursor': resp.data['next_cursor'], 'page_size': 2, 'include_total': 'true'}
+        self.assertEqual(seen, ['bobby', 'caro', 'alicek', 'adm'])
+
+        resp = self.client.get(url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        for params in ({'pagination': 'cursor', 'page_size': 0}, {'pagination': 'cursor', 'page_size': -3}, {'page': 'x'}):
+            self.assertEqual(self.client.get(url, params).status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_forged_cursors_are_rejected(self):
+        # Well-formed tokens carrying values of the wrong type must not reach the query
+        forged = [pagination.encode_cursor('x', 'y'), pagination.encode_cursor({}, []), pagination.encode_cursor(None, 1)]
+        endpoints = [
+            (reverse('monthly_ranking'), {}, None),
+            (reverse('point_transaction_history'), {}, self.alice),
+            (reverse('user_list'), {'ordering': 'point'}, self.admin),
+            (reverse('admin_redemption_queue'), {}, self.admin),
+            (reverse('card_list'), {'ordering': 'price'}, None),
+        ]
+        for url, params, user in endpoints:
+            self.client.force_authenticate(user)
+            for cursor in forged + [pagination.encode_cursor('notadate', 'x'), pagination.encode_cursor('bad', 1)]:
+                resp = self.client.get(url, dict(params, cursor=cursor))
+                self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, (url, cursor))
+
+    def test_user_ranking_returns_rank_and_percentile(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_result(self.alice, 10)
+            self.add_result(self.bob, 30)
+        now = timezone.localtime()
+        url = reverse('user_ranking')
+
+        resp = self.client.get(url, {'username': 'alice', 'year': now.year, 'month': now.month})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual((resp.data['rank'], resp.data['percentile']), (2, 50.0))
+
+        # A later write is patched into the already built index
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_result(self.alice, 25)
+            self.add_result(self.carol, 1)
+        resp = self.client.get(url, {'username': 'alice', 'year': now.year, 'month': now.month})
+        self.assertEqual(resp.data['ranking_point_earned'], 35)
+        self.assertEqual((resp.data['rank'], resp.data['percentile'], resp.data['total_ranked']), (1, 100.0, 3))
+
+        resp = self.client.get(url, {'username': 'admin', 'year': now.year, 'month': now.month})
+        self.assertEqual((resp.data['ranking_point_earned'], resp.data['rank']), (0, None))
+
+    def test_index_expires_without_a_shared_version_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_result(self.alice, 10)
+            self.add_result(self.bob, 30)
+        now = timezone.localtime()
+        self.assertEqual(leaderboard.lookup(now.year, now.month, self.alice.id)[1], 2)
+
+        # Another worker's write, whose version bump this process never sees
+        models.MonthlyRanking.objects.filter(user=self.alice).update(ranking_earned=50)
+        self.assertEqual(leaderboard.lookup(now.year, now.month, self.alice.id)[1], 2)
+        later = time.monotonic() + leaderboard.MAX_AGE + 1
+        with mock.patch.object(leaderboard.time, 'monotonic', return_value=later):
+            self.assertEqual(leaderboard.lookup(now.year, now.month, self.alice.id)[:2], (50, 1))
+
+
+class RankingConcurrencyTests(TransactionTestCase):
+    THREADS = 6
+    ROUNDS = 10
+
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            models.UserProfile.objects.create_user(username=f'player{i}', password='Pass12345', nickname=f'p{i}')
+            for i in range(8)
+        ]
+
+    def hammer(self, seed, errors, barrier):
+        chooser = random.Random(seed)
+        barrier.wait()
+        try:
+            for _ in range(self.ROUNDS):
+                user, points = chooser.choice(self.users), chooser.choice([1, 2, 5])
+                while True:
+                    try:
+                        ledger.credit_tournament_result(user, 'Cup', '1st', ranking_point_earned=points)
+                        break
+                    except OperationalError:
+                        # SQLite reports write contention instead of waiting; retry the whole unit
+                        if connection.vendor != 'sqlite':
+                            raise
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_writers_keep_dense_ranks(self):
+        errors = []
+        barrier = threading.Barrier(self.THREADS)
+        threads = [threading.Thread(target=self.hammer, args=(seed, errors, barrier)) for seed in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        now = timezone.localtime()
+        rows = list(models.MonthlyRanking.objects.filter(year=now.year, month=now.month).values_list('ranking_earned', 'rank'))
+        scores = sorted({score for score, _rank in rows}, reverse=True)
+        self.assertEqual([rank for _score, rank in rows], [scores.index(score) + 1 for score, _rank in rows])
+        self.assertEqual(
+            sum(score for score, _rank in rows),
+            sum(models.TournamentResult.objects.values_list('ranking_point_earned', flat=True)),
+        )
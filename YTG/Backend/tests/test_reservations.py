@@ -0,0 +1,146 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import models
+from Backend import reservations
+
+
+class ReservationTests(APITestCase):
+    def setUp(self):
+        self.alice = models.UserProfile.objects.create_user(username='alice', password='Pass12345', nickname='alice')
+        self.bob = models.UserProfile.objects.create_user(username='bob', password='Pass12345', nickname='bob')
+        self.booster = models.Booster.objects.create(name='Legend of Blue Eyes', price=4, stock=3, booster_code='LOB')
+
+    def hold(self, user, quantity):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('cart_holds'), {'items': [
+            {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': quantity},
+        ]}, format='json')
+
+    def order(self, user, quantity):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('create_order'), {'items': [
+            {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': quantity},
+        ]}, format='json')
+
+    def test_holds_reserve_stock_from_other_carts(self):
+        self.assertEqual(self.hold(self.alice, 2).status_code, status.HTTP_201_CREATED)
+        self.booster.refresh_from_db()
+        self.assertEqual(self.booster.stock, 3)
+
+        self.assertEqual(self.hold(self.bob, 2).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.order(self.bob, 2).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.order(self.bob, 1).status_code, status.HTTP_201_CREATED)
+
+        # Re-holding replaces the previous quantity instead of adding to it
+        self.assertEqual(self.hold(self.alice, 2).status_code, status.HTTP_201_CREATED)
+        resp = self.client.get(reverse('cart_holds'))
+        self.assertEqual([hold['quantity'] for hold in resp.data['holds']], [2])
+
+    def test_checkout_converts_holds_into_order(self):
+        self.hold(self.alice, 2)
+        resp = self.client.post(reverse('cart_checkout'))
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data['total_price'], 8)
+        self.booster.refresh_from_db()
+        self.assertEqual(self.booster.stock, 1)
+        self.assertFalse(models.StockHold.objects.exists())
+
+        resp = self.client.post(reverse('cart_checkout'))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_holds_release_stock(self):
+        self.hold(self.alice, 3)
+        models.StockHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.order(self.bob, 3).status_code, status.HTTP_201_CREATED)
+
+        # Alice's cart is empty now, and the sweeper deletes her expired hold
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.get(reverse('cart_holds')).data['holds'], [])
+        out = StringIO()
+        call_command('release_expired_holds', stdout=out)
+        self.assertIn('Released 1 expired holds', out.getvalue())
+        self.assertFalse(models.StockHold.objects.exists())
+
+    def test_release_holds(self):
+        self.hold(self.alice, 3)
+        resp = self.client.delete(reverse('cart_holds'))
+        self.assertEqual(resp.data['released'], 1)
+        self.assertEqual(self.order(self.bob, 3).status_code, status.HTTP_201_CREATED)
+
+    def test_held_units_are_capped_per_user(self):
+        self.booster.stock = 100
+        self.booster.save()
+        card = models.Card.objects.create(name='Dark Magician', price=2, stock=100, card_code='SDY-006')
+        limit = reservations.MAX_HELD_UNITS
+        self.assertEqual(self.hold(self.alice, limit).status_code, status.HTTP_201_CREATED)
+        resp = self.client.post(reverse('cart_holds'), {'items': [
+            {'product_type': 'card', 'product_id': card.id, 'quantity': 1},
+        ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.hold(self.alice, limit + 1).status_code, status.HTTP_400_BAD_REQUEST)
+        # Replacing a hold counts its new quantity only
+        self.assertEqual(self.hold(self.alice, limit - 1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(list(models.StockHold.objects.values_list('quantity', flat=True)), [limit - 1])
+
+    def test_renewals_stop_at_the_maximum_lifetime(self):
+        self.hold(self.alice, 1)
+        started_at = timezone.now() - reservations.MAX_HOLD_LIFETIME + timedelta(minutes=5)
+        models.StockHoldCart.objects.update(started_at=started_at)
+
+        # Re-holding renews the cart, but not past its lifetime
+        self.assertEqual(self.hold(self.alice, 2).status_code, status.HTTP_201_CREATED)
+        hold = models.StockHold.objects.get()
+        self.assertEqual((hold.quantity, hold.expires_at), (2, started_at + reservations.MAX_HOLD_LIFETIME))
+
+        # Releasing and holding again keeps the cart's start
+        self.assertEqual(self.client.delete(reverse('cart_holds')).data['released'], 1)
+        self.assertEqual(self.hold(self.alice, 2).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(models.StockHold.objects.get().expires_at, started_at + reservations.MAX_HOLD_LIFETIME)
+
+    def test_next_cart_waits_for_the_cooldown(self):
+        self.hold(self.alice, 1)
+        self.client.delete(reverse('cart_holds'))
+        ended_at = timezone.now() - timedelta(minutes=1)
+        models.StockHoldCart.objects.update(started_at=ended_at - reservations.MAX_HOLD_LIFETIME)
+        self.assertEqual(self.hold(self.alice, 1).status_code, status.HTTP_400_BAD_REQUEST)
+        # Other users are not affected
+        self.assertEqual(self.hold(self.bob, 3).status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(self.bob)
+        self.client.delete(reverse('cart_holds'))
+
+        models.StockHoldCart.objects.filter(user=self.alice).update(
+            started_at=ended_at - reservations.MAX_HOLD_LIFETIME - reservations.HOLD_COOLDOWN
+        )
+        resp = self.hold(self.alice, 1)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        cart = models.StockHoldCart.objects.get(user=self.alice)
+        self.assertAlmostEqual(models.StockHold.objects.get().expires_at - cart.started_at, reservations.HOLD_TTL, delta=timedelta(seconds=5))
+
+    def test_checkout_ends_the_cart(self):
+        self.hold(self.alice, 1)
+        self.assertEqual(self.client.post(reverse('cart_checkout')).status_code, status.HTTP_201_CREATED)
+        self.assertFalse(models.StockHoldCart.objects.exists())
+
+    def test_product_tables_are_locked_in_checkout_order(self):
+        card = models.Card.objects.create(name='Dark Magician', price=2, stock=5, card_code='SDY-006')
+        self.client.force_authenticate(self.alice)
+        # Booster listed first; card rows must still be read before booster rows, as in create_order
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.post(reverse('cart_holds'), {'items': [
+                {'product_type': 'booster', 'product_id': self.booster.id, 'quantity': 1},
+                {'product_type': 'card', 'product_id': card.id, 'quantity': 1},
+            ]}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        product_reads = [
+            table for query in queries.captured_queries if query['sql'].startswith('SELECT')
+            for table in ('Backend_card', 'Backend_booster') if f'FROM "{table}"' in query['sql']
+        ]
+        self.assertEqual(product_reads[:2], ['Backend_card', 'Backend_booster'])
@@ -1,7 +1,13 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from Backend import models
+from Backend import catalog, models, redemptions, rewards
 
 
 class RewardsTests(APITestCase):
@@ -47,4 +53,211 @@ class RewardsTests(APITestCase):
 
         # Invalid reward id
         r2 = self.client.post(url_redeem, {'reward': 999999}, format='json')
-        self.assertEqual(r2.status_code, status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        self.assertEqual(r2.status_code, status.HTTP_400_BAD_REQUEST)
+
+class RedemptionConfirmTests(APITestCase):
+    def setUp(self):
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        self.users = [
+            models.UserProfile.objects.create_user(username=f'user{i}', password='Pass12345', nickname=f'user{i}', point=25)
+            for i in range(4)
+        ]
+        self.reward = models.Reward.objects.create(name='Sleeves', cost=10, stock=2)
+        self.client.force_authenticate(self.admin)
+
+    def redeem(self, user, reward=None):
+        return models.RewardRedemption.objects.create(user=user, reward=reward or self.reward)
+
+    def test_confirm_takes_stock_and_points_atomically(self):
+        poor = models.UserProfile.objects.create_user(username='poor', password='Pass12345', nickname='poor', point=5)
+        redemption = self.redeem(poor)
+        resp = self.client.post(reverse('admin_confirm_redemption', args=[redemption.id]))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.reward.refresh_from_db()
+        redemption.refresh_from_db()
+        self.assertEqual((self.reward.stock, redemption.status), (2, 'pending'))
+
+        redemption = self.redeem(self.users[0])
+        resp = self.client.post(reverse('admin_confirm_redemption', args=[redemption.id]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.reward.refresh_from_db()
+        self.users[0].refresh_from_db()
+        self.assertEqual((self.reward.stock, self.users[0].point), (1, 15))
+        self.assertTrue(models.PointTransaction.objects.filter(user=self.users[0], points=-10).exists())
+
+        resp = self.client.post(reverse('admin_confirm_redemption', args=[redemption.id]))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.reward.refresh_from_db()
+        self.assertEqual(self.reward.stock, 1)
+
+    def test_bulk_confirm_allocates_queue_in_order(self):
+        pricey = models.Reward.objects.create(name='Playmat', cost=20, stock=5)
+        queue = [self.redeem(user) for user in self.users]
+        # user0 cannot afford both rewards
+        queue.append(self.redeem(self.users[0], pricey))
+
+        with self.assertNumQueries(10):
+            resp = self.client.post(reverse('admin_bulk_confirm_redemption'), {}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(resp.data['confirmed'], [queue[0].id, queue[1].id])
+        self.assertEqual([error['redemption_id'] for error in resp.data['errors']], [r.id for r in queue[2:]])
+
+        self.reward.refresh_from_db()
+        pricey.refresh_from_db()
+        self.assertEqual((self.reward.stock, pricey.stock), (0, 5))
+        self.assertEqual(
+            list(models.UserProfile.objects.filter(id__in=[u.id for u in self.users]).order_by('id').values_list('point', flat=True)),
+            [15, 15, 25, 25],
+        )
+        self.assertEqual(models.PointTransaction.objects.count(), 2)
+
+    def test_bulk_confirm_processes_every_given_id(self):
+        queue = [self.redeem(user) for user in self.users[:3]]
+        resp = self.client.post(reverse('admin_bulk_confirm_redemption'), {
+            'redemption_ids': [redemption.id for redemption in queue], 'limit': 1,
+        }, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(resp.data['confirmed'], [queue[0].id, queue[1].id])
+        # The third is judged on its own merits, not reported as already processed
+        self.assertEqual(resp.data['errors'], [{'redemption_id': queue[2].id, 'error': 'This reward is out of stock'}])
+
+
+class RedemptionQueueTests(APITestCase):
+    def setUp(self):
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        self.sleeves = models.Reward.objects.create(name='Sleeves', cost=10, stock=2)
+        self.playmat = models.Reward.objects.create(name='Playmat', cost=20, stock=2)
+        self.users = [
+            models.UserProfile.objects.create_user(username=f'user{i}', password='Pass12345', nickname=f'user{i}')
+            for i in range(7)
+        ]
+        for user in self.users:
+            models.RewardRedemption.objects.create(user=user, reward=self.sleeves)
+        models.RewardRedemption.objects.create(user=self.users[0], reward=self.playmat)
+        models.RewardRedemption.objects.create(user=self.users[1], reward=self.playmat, status='cancelled')
+        self.client.force_authenticate(self.admin)
+
+    def test_queue_pages_oldest_first_with_pending_counts(self):
+        url = reverse('admin_redemption_queue')
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(2):
+                resp = self.client.get(url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen += [row['id'] for row in resp.data['results']]
+            cursor = resp.data['next_cursor']
+            if cursor is None:
+                break
+        expected = models.RewardRedemption.objects.filter(status='pending').order_by('redeemed_at', 'id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
+        self.assertEqual(
+            [(row['reward_name'], row['pending']) for row in resp.data['pending_by_reward']],
+            [('Sleeves', 7), ('Playmat', 1)],
+        )
+
+    def test_queue_filters(self):
+        url = reverse('admin_redemption_queue')
+        resp = self.client.get(url, {'reward': self.playmat.id, 'user': self.users[0].id})
+        self.assertEqual([row['reward_name'] for row in resp.data['results']], ['Playmat'])
+        resp = self.client.get(url, {'status': 'cancelled'})
+        self.assertEqual([row['username'] for row in resp.data['results']], ['user1'])
+        self.assertEqual(self.client.get(url, {'status': 'lost'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'user': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RewardCatalogTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        self.user = models.UserProfile.objects.create_user(username='alice', password='Pass12345', nickname='alice', point=15)
+        self.sleeves = models.Reward.objects.create(name='Sleeves', cost=10, stock=1)
+        self.playmat = models.Reward.objects.create(name='Playmat', cost=20, stock=3)
+
+    def test_flags_come_from_snapshot_and_balance(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('reward_list'))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse('reward_list'))
+            detail = self.client.get(reverse('reward_detail', args=[self.playmat.id]))
+        self.assertEqual(resp.data['balance'], 15)
+        self.assertEqual([(r['name'], r['in_stock'], r['affordable']) for r in resp.data['results']],
+                         [('Sleeves', True, True), ('Playmat', True, False)])
+        self.assertFalse(detail.data['affordable'])
+        self.assertEqual(self.client.get(reverse('reward_detail', args=[999])).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(None)
+        resp = self.client.get(reverse('reward_list'))
+        self.assertNotIn('affordable', resp.data['results'][0])
+
+    def test_confirmation_and_edits_refresh_snapshot(self):
+        self.client.force_authenticate(self.user)
+        self.client.get(reverse('reward_list'))
+        redemption = models.RewardRedemption.objects.create(user=self.user, reward=self.sleeves)
+        with self.captureOnCommitCallbacks(execute=True):
+            redemptions.confirm_redemption(redemption.id)
+        self.user.refresh_from_db()
+        resp = self.client.get(reverse('reward_list'))
+        self.assertEqual([(r['stock'], r['in_stock']) for r in resp.data['results']], [(0, False), (3, True)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.playmat.cost = 5
+            self.playmat.save()
+        resp = self.client.get(reverse('reward_detail', args=[self.playmat.id]))
+        self.assertEqual((resp.data['cost'], resp.data['affordable']), (5, True))
+
+    def test_per_process_cache_keeps_snapshot_briefly(self):
+        # Tests run on LocMemCache, whose invalidations other workers never see
+        with mock.patch('Backend.rewards.cache.get_or_set', wraps=cache.get_or_set) as get_or_set:
+            rewards.snapshot()
+        self.assertEqual(get_or_set.call_args.args[2], catalog.LOCAL_CACHE_TIMEOUT)
+
+
+class RedemptionConcurrencyTests(TransactionTestCase):
+    THREADS = 6
+
+    def setUp(self):
+        self.reward = models.Reward.objects.create(name='Sleeves', cost=10, stock=2)
+        self.redemptions = []
+        for i in range(self.THREADS):
+            user = models.UserProfile.objects.create_user(username=f'user{i}', password='Pass12345', nickname=f'user{i}', point=10)
+            self.redemptions.append(models.RewardRedemption.objects.create(user=user, reward=self.reward))
+
+    def confirm(self, redemption_id, outcomes, barrier):
+        barrier.wait()
+        try:
+            while True:
+                try:
+                    redemptions.confirm_redemption(redemption_id)
+                    outcomes.append('confirmed')
+                    return
+                except redemptions.RedemptionError:
+                    outcomes.append('rejected')
+                    return
+                except OperationalError:
+                    # SQLite reports write contention instead of waiting; retry the whole unit
+                    if connection.vendor != 'sqlite':
+                        raise
+        except Exception as exc:
+            outcomes.append(exc)
+        finally:
+            connection.close()
+
+    def test_concurrent_confirms_never_oversell(self):
+        outcomes = []
+        barrier = threading.Barrier(self.THREADS)
+        threads = [
+            threading.Thread(target=self.confirm, args=(redemption.id, outcomes, barrier))
+            for redemption in self.redemptions
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes, key=str), ['confirmed'] * 2 + ['rejected'] * (self.THREADS - 2))
+        self.reward.refresh_from_db()
+        self.assertEqual(self.reward.stock, 0)
+        self.assertEqual(models.RewardRedemption.objects.filter(status='completed').count(), 2)
+        self.assertEqual(models.PointTransaction.objects.count(), 2)
@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from Backend import models, search
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.blue_eyes = models.Card.objects.create(name='Blue-Eyes White Dragon', price=10, stock=5, card_code='LOB-001', rarity='ultra rare')
+        self.dark_magician = models.Card.objects.create(name='Dark Magician', price=8, stock=5, card_code='LOB-005', rarity='ultra rare')
+        self.booster = models.Booster.objects.create(name='Legend of Blue Eyes White Dragon', price=4, stock=2, booster_code='LOB')
+
+    def search(self, **params):
+        resp = self.client.get(reverse('catalog_search'), params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [(row['product_type'], row['id']) for row in resp.data['results']]
+
+    def test_ranked_and_typo_tolerant(self):
+        # Shorter document ranks first on equal matches
+        self.assertEqual(self.search(q='blue eyes'), [('card', self.blue_eyes.id), ('booster', self.booster.id)])
+        self.assertEqual(self.search(q='dark magican')[0], ('card', self.dark_magician.id))
+        self.assertEqual(self.search(q='LOB-005')[0], ('card', self.dark_magician.id))
+        self.assertEqual(self.search(q='blue eyes', type='booster'), [('booster', self.booster.id)])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.assertEqual(self.search(q='girl'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dark_magician.name = 'Dark Magician Girl'
+            self.dark_magician.save()
+        self.assertEqual(self.search(q='girl'), [('card', self.dark_magician.id)])
+
+        # Stock-only saves do not touch the index
+        with self.assertNumQueries(1):
+            self.dark_magician.stock = 1
+            self.dark_magician.save(update_fields=['stock'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.blue_eyes.delete()
+        self.assertNotIn(('card', self.blue_eyes.id), self.search(q='blue eyes'))
+        self.assertEqual(models.SearchEntry.objects.count(), 2)
+
+    def test_reindex_after_bulk_create(self):
+        models.Card.objects.bulk_create([models.Card(name='Pot of Greed', price=1, stock=1, card_code='LOB-119', rarity='rare')])
+        self.assertEqual(self.search(q='pot of greed'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            search.reindex(models.Card)
+        self.assertEqual(self.search(q='pot of greed')[0][0], 'card')
+        self.assertEqual(models.SearchEntry.objects.count(), 4)
+
+    def test_invalid_query(self):
+        for params in ({'q': 'a'}, {'q': 'blue', 'type': 'deck'}, {'q': 'blue', 'limit': 'x'}):
+            resp = self.client.get(reverse('catalog_search'), params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, params)
@@ -1,4 +1,7 @@
+from datetime import datetime, timedelta
+
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
 from Backend import models
@@ -24,7 +27,7 @@ class UserProfileTests(APITestCase):
         url_hist = reverse('point_transaction_history')
         resp2 = self.client.get(url_hist)
         self.assertEqual(resp2.status_code, status.HTTP_200_OK)
-        self.assertTrue(isinstance(resp2.data, list))
+        self.assertEqual([row['points'] for row in resp2.data['results']], [10])
 
     def test_update_profile(self):
         self.client.force_authenticate(self.user)
@@ -34,3 +37,49 @@ class UserProfileTests(APITestCase):
         self.assertTrue(self.user.check_name_change_limit())
 
 
+
+
+class PointHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = models.UserProfile.objects.create_user(username='u1', password='Pass12345', nickname='nick1')
+        self.admin = models.UserProfile.objects.create_user(username='admin', password='AdminPass123', nickname='adm', is_staff=True)
+        start = timezone.make_aware(datetime(2026, 3, 1, 12, 0))
+        for day in range(10):
+            transaction = models.PointTransaction.objects.create(user=self.user, points=5 if day % 2 else -3, description=f'day {day}')
+            models.PointTransaction.objects.filter(id=transaction.id).update(created_at=start + timedelta(days=day))
+
+    def walk(self, **params):
+        seen = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=3, **({'cursor': cursor} if cursor else {}))
+            resp = self.client.get(reverse('point_transaction_history'), query)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen += [row['description'] for row in resp.data['results']]
+            cursor = resp.data['next_cursor']
+            if cursor is None:
+                return seen
+
+    def test_pages_newest_first_with_filters(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.walk(), [f'day {day}' for day in range(9, -1, -1)])
+        self.assertEqual(self.walk(sign='earned'), ['day 9', 'day 7', 'day 5', 'day 3', 'day 1'])
+        self.assertEqual(self.walk(**{'from': '2026-03-03', 'to': '2026-03-05', 'sign': 'spent'}), ['day 4', 'day 2'])
+
+        for params in ({'from': 'yesterday'}, {'from': '2026-03-05', 'to': '2026-03-01'}, {'sign': 'both'}, {'cursor': 'x'}):
+            resp = self.client.get(reverse('point_transaction_history'), params)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_admin_lookup_by_user_id(self):
+        self.client.force_authenticate(self.admin)
+        with self.assertNumQueries(2):
+            resp = self.client.get(reverse('point_transaction_history'), {'user_id': self.user.id, 'page_size': 5})
+        self.assertEqual((resp.data['username'], len(resp.data['results'])), ('u1', 5))
+        resp = self.client.get(reverse('point_transaction_history'), {'user': 'u1'})
+        self.assertEqual(len(resp.data['results']), 10)
+        self.assertEqual(self.client.get(reverse('point_transaction_history'), {'user_id': 999}).status_code, status.HTTP_404_NOT_FOUND)
+
+        # Regular users cannot read other histories
+        self.client.force_authenticate(self.user)
+        resp = self.client.get(reverse('point_transaction_history'), {'user_id': self.admin.id})
+        self.assertEqual(resp.data['username'], 'u1')
@@ -0,0 +1,91 @@
+"""
+Set-based tournament result ingestion.
+
+A whole tournament is written with a fixed number of queries regardless of its
+size: one lookup for every username, one bulk INSERT of the results and one
+UPDATE applying every participant's point deltas through CASE expressions.
+"""
+from collections import defaultdict
+
+from django.db import DatabaseError, transaction
+
+from . import ledger
+from . import models
+from . import ranking
+
+
+def _resolve_users(usernames):
+    """Map usernames to users with a single query, tolerating case-insensitive collations."""
+    users = models.UserProfile.objects.filter(username__in=usernames).only('id', 'username', 'nickname')
+    by_name = {}
+    by_lower = {}
+    for user in users:
+        by_name[user.username] = user
+        by_lower.setdefault(user.username.lower(), user)
+    return {name: by_name.get(name) or by_lower.get(name.lower()) for name in usernames}
+
+
+def ingest_results(tournament_name, rows, all_or_nothing=False):
+    """
+    Create TournamentResult rows for a tournament and credit the participants.
+
+    `rows` are dicts with username, position, point_earned and ranking_point_earned.
+    Returns (results, errors) where errors carry the row index and username.
+    Rows with unknown usernames are reported and skipped, unless all_or_nothing
+    is set, in which case nothing is written when any row fails.
+    """
+    users = _resolve_users({row['username'] for row in rows})
+
+    errors = []
+    valid = []
+    for idx, row in enumerate(rows):
+        user = users.get(row['username'])
+        if user is None:
+            errors.append({
+                'index': idx,
+                'username': row['username'],
+                'error': f"User with username '{row['username']}' does not exist"
+            })
+        else:
+            valid.append((idx, row, user))
+
+    if not valid or (errors and all_or_nothing):
+        return [], errors
+
+    point_deltas = defaultdict(int)
+    ranking_deltas = defaultdict(int)
+    for _idx, row, user in valid:
+        point_deltas[user.id] += row.get('point_earned', 0)
+        ranking_deltas[user.id] += row.get('ranking_point_earned', 0)
+
+    try:
+        with transaction.atomic():
+            created = models.TournamentResult.objects.bulk_create([
+                models.TournamentResult(
+                    user=user,
+                    tournament_name=tournament_name,
+                    position=row['position'],
+                    point_earned=row.get('point_earned', 0),
+                    ranking_point_earned=row.get('ranking_point_earned', 0),
+                )
+                for _idx, row, user in valid
+            ])
+            ledger.apply_bulk_deltas(point_deltas, ranking_deltas)
+            ranking.record_results(created)
+    except DatabaseError as exc:
+        errors.extend({'index': idx, 'username': row['username'], 'error': str(exc)} for idx, row, _user in valid)
+        errors.sort(key=lambda error: error['index'])
+        return [], errors
+
+    results = [
+        {
+            'username': user.username,
+            'nickname': user.nickname,
+            'tournament_name': result.tournament_name,
+            'position': result.position,
+            'point_earned': result.point_earned,
+            'ranking_point_earned': result.ranking_point_earned,
+        }
+        for (_idx, _row, user), result in zip(valid, created)
+    ]
+    return results, errors
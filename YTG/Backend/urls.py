@@ -8,9 +8,17 @@ urlpatterns = [
     path('point/adjust/', views.AdminAdjustPointAPIView.as_view(), name='point_adjust'),
     path('tournament/add/', views.AdminTournamentResultAPIView.as_view(), name='tournament_add'),
     path('tournament/bulk/', views.AdminTournamentBulkUpdateAPIView.as_view(), name='tournament_bulk'),
+    path('tournament/import/', views.AdminTournamentImportAPIView.as_view(), name='tournament_import'),
+    path('tournament/import/<int:job_id>/', views.AdminTournamentImportJobAPIView.as_view(), name='tournament_import_job'),
     path('admin/users/<str:username>/', views.AdminUserUpdateAPIView.as_view(), name='admin_user_update'),
+    path('admin/orders/<int:order_id>/confirm/', views.ConfirmOrderAPIView.as_view(), name='admin_confirm_order'),
+    path('admin/orders/<int:order_id>/complete/', views.CompleteOrderAPIView.as_view(), name='admin_complete_order'),
+    path('admin/orders/bulk/', views.AdminBulkOrderStatusAPIView.as_view(), name='admin_bulk_orders'),
+    path('admin/redemptions/', views.AdminRedemptionQueueAPIView.as_view(), name='admin_redemption_queue'),
+    path('admin/redemption/confirm/', views.AdminBulkRedemptionAPIView.as_view(), name='admin_bulk_confirm_redemption'),
     path('admin/redemption/<int:redemption_id>/confirm/', views.AdminRedemptionAPIView.as_view(), name='admin_confirm_redemption'),
     path('admin/redemption/<int:redemption_id>/cancel/', views.AdminCancelRedemptionAPIView.as_view(), name='admin_cancel_redemption'),
+    path('admin/exports/<str:kind>/', views.AdminLedgerExportAPIView.as_view(), name='admin_ledger_export'),
 
     #user path
     path('user/', views.UserAPIView.as_view(), name='user_info'),
@@ -22,11 +30,21 @@ urlpatterns = [
     path('user/orders/<int:order_id>/', views.OrderDetailView.as_view(), name='order_detail'),
     path('user/orders/<int:order_id>/cancel/', views.CancelOrderAPIView.as_view(), name='cancel_order'),
     path('orders/create/', views.CreateOrderAPIView.as_view(), name='create_order'),
+    path('cart/holds/', views.CartHoldsAPIView.as_view(), name='cart_holds'),
+    path('cart/checkout/', views.CheckoutAPIView.as_view(), name='cart_checkout'),
 
     #guest path
+    path('catalog/cards/', views.CardListAPIView.as_view(), name='card_list'),
+    path('catalog/cards/<int:product_id>/', views.CardDetailAPIView.as_view(), name='card_detail'),
+    path('catalog/boosters/', views.BoosterListAPIView.as_view(), name='booster_list'),
+    path('catalog/boosters/<int:product_id>/', views.BoosterDetailAPIView.as_view(), name='booster_detail'),
+    path('catalog/search/', views.CatalogSearchAPIView.as_view(), name='catalog_search'),
+    path('rewards/', views.RewardListAPIView.as_view(), name='reward_list'),
+    path('rewards/<int:reward_id>/', views.RewardDetailAPIView.as_view(), name='reward_detail'),
     path('ranking/monthly/', views.MonthlyRankingAPIView.as_view(), name='monthly_ranking'),
     path('ranking/user/', views.UserRankingAPIView.as_view(), name='user_ranking'),
     path('register/', views.RegisterAPIView.as_view(), name='register'),
     path('login/', views.LoginAPIView.as_view(), name='login'),
-    path('logout/', views.LogoutAPIView.as_view(), name='logout')
+    path('logout/', views.LogoutAPIView.as_view(), name='logout'),
+    path('token/refresh/', views.TokenRefreshAPIView.as_view(), name='token_refresh'),
 ]
@@ -1,33 +1,92 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework import status
 from rest_framework.serializers import ValidationError
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.utils.translation import gettext as _
+from rest_framework_simplejwt.views import TokenRefreshView
+from django.utils.translation import gettext as _, gettext_lazy
 from django.db import IntegrityError
-from django.db.models import Sum, Q, F
-from django.db import transaction
+from django.db.models import Count, Sum, Q
+from django.core.cache import cache
 from django.utils import timezone
+from django.utils.http import parse_etags
 
 from . import serializers
 from . import models
+from . import orders
+from . import authentication
+from . import catalog
+from . import exports
+from . import filters
+from . import idempotency
+from . import imports
+from . import leaderboard
+from . import ledger
+from . import pagination
 from . import permissions
+from . import ranking
+from . import redemptions
+from . import reservations
+from . import revocation
+from . import rewards
+from . import search
+from . import tournaments
 # Create your views here.
 
 class UserListAPIView(APIView):
     """
-    API view for admin to get all users.
+    API view for admin to page through users.
+    ?search= matches the start of username, nickname, email or phone; ?ordering= is one of
+    ORDERINGS; ?fields=id,username,... limits the returned columns. Follow next_cursor for the next page.
     """
     permission_classes = [IsAdminUser]
+    ORDERINGS = {
+        'username': ['username'],
+        'point': ['point', 'id'],
+        '-point': ['-point', '-id'],
+        'ranking_point': ['ranking_point', 'id'],
+        '-ranking_point': ['-ranking_point', '-id'],
+    }
 
     def get(self, request):
-        users = models.UserProfile.objects.all().order_by('username')
-        serializer = serializers.UserListSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        params = request.query_params
+        ordering = self.ORDERINGS.get(params.get('ordering', 'username'))
+        if ordering is None:
+            return Response({'message': _('Invalid ordering')}, status=status.HTTP_400_BAD_REQUEST)
+        fields = serializers.UserListSerializer.Meta.fields
+        if params.get('fields'):
+            fields = [field for field in params['fields'].split(',') if field]
+            if not fields or set(fields) - set(serializers.UserListSerializer.Meta.fields):
+                return Response({'message': _('Invalid fields')}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page_size = pagination.get_page_size(params, default=50, maximum=200)
+        except ValueError:
+            return Response({'message': _('Invalid page size')}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sort keys are loaded even when not requested, to build the cursor
+        users = models.UserProfile.objects.only(*fields, *[field.lstrip('-') for field in ordering])
+        search = params.get('search', '').strip()
+        if search:
+            # Prefix lookups (LIKE 'x%') stay on the column indexes
+            users = users.filter(
+                Q(username__istartswith=search) | Q(nickname__istartswith=search)
+                | Q(email__istartswith=search) | Q(phone__startswith=search)
+            )
+        try:
+            rows, next_cursor = pagination.paginate(users, ordering, params.get('cursor'), page_size)
+        except pagination.InvalidCursor:
+            return Response({'message': _('Invalid cursor')}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'results': serializers.UserListSerializer(rows, many=True, fields=fields).data,
+        }, status=status.HTTP_200_OK)
 
 class LoginAPIView(APIView):
     """
@@ -93,12 +152,19 @@ class LogoutAPIView(APIView):
         if not refresh_token:
             return Response({'message': _('Refresh token is required')}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            token = RefreshToken(refresh_token)
+            token = revocation.RefreshToken(refresh_token)
             token.blacklist()
             return Response({'message': _('Logout successful')}, status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
             return Response({'message': _('Invalid token')}, status=status.HTTP_400_BAD_REQUEST)
         
+class TokenRefreshAPIView(TokenRefreshView):
+    """
+    API view for exchanging a refresh token for a new access token and, with rotation, a new refresh token.
+    Revoked refresh tokens are rejected through Backend.revocation.
+    """
+    serializer_class = serializers.RevocationTokenRefreshSerializer
+
 class UpdateUserAPIView(APIView):
     """
     API view for updating user profile.
@@ -166,15 +232,8 @@ class AdminAdjustPointAPIView(APIView):
             points = serializer.validated_data.get('points')
             description = serializer.validated_data.get('description', '')
 
-            # Create the point transaction
-            point_transaction = models.PointTransaction.objects.create(
-                user=user,
-                points=points,
-                description=description
-            )
-            # Update user's point balance
-            user.point += points
-            user.save()
+            # Record the transaction and apply it to the balance atomically
+            point_transaction = ledger.adjust_points(user, points, description)
 
             return Response({
                 'message': _('Points added successfully'),
@@ -199,22 +258,15 @@ class AdminTournamentResultAPIView(APIView):
             point_earned = serializer.validated_data.get('point_earned', 0)
             ranking_point_earned = serializer.validated_data.get('ranking_point_earned', 0)
 
-            # Create the tournament result
-            tournament_result = models.TournamentResult.objects.create(
-                user=user,
-                tournament_name=tournament_name,
-                position=position,
+            # Create the tournament result and credit ranking_point (for ranking only) and spendable point
+            tournament_result = ledger.credit_tournament_result(
+                user,
+                tournament_name,
+                position,
                 point_earned=point_earned,
                 ranking_point_earned=ranking_point_earned
             )
 
-            # Update user's ranking_point (for ranking only) and spendable point separately
-            if ranking_point_earned:
-                user.ranking_point += ranking_point_earned
-            if point_earned:
-                user.point += point_earned
-            user.save(update_fields=['ranking_point', 'point'])
-
             return Response({
                 'message': _('Tournament result added successfully'),
                 'user': user.username,
@@ -243,8 +295,11 @@ class AdminTournamentBulkUpdateAPIView(APIView):
                 "point_earned": 30,
                 "ranking_point_earned": 100
             }
-        ]
+        ],
+        "all_or_nothing": false
     }
+    Unknown usernames are reported per row (207) and skipped; with all_or_nothing
+    nothing is written if any row fails (400).
     """
     permission_classes = [IsAdminUser]
 
@@ -255,53 +310,14 @@ class AdminTournamentBulkUpdateAPIView(APIView):
 
         tournament_name = serializer.validated_data['tournament_name']
         results_data = serializer.validated_data['results']
-        
-        results = []
-        errors = []
+        all_or_nothing = serializer.validated_data['all_or_nothing']
 
-        for idx, result_data in enumerate(results_data):
-            try:
-                with transaction.atomic():
-                    user = models.UserProfile.objects.select_for_update().get(username=result_data['username'])
-                    
-                    # Create tournament result
-                    tournament_result = models.TournamentResult.objects.create(
-                        user=user,
-                        tournament_name=tournament_name,
-                        position=result_data['position'],  # Keep as string (e.g., "1st", "2nd")
-                        point_earned=result_data.get('point_earned', 0),
-                        ranking_point_earned=result_data.get('ranking_point_earned', 0)
-                    )
-                    
-                    # Update user points
-                    if result_data.get('ranking_point_earned', 0):
-                        user.ranking_point += result_data['ranking_point_earned']
-                    if result_data.get('point_earned', 0):
-                        user.point += result_data['point_earned']
-                    user.save(update_fields=['ranking_point', 'point'])
-                    
-                    results.append({
-                        'username': user.username,
-                        'nickname': user.nickname,
-                        'tournament_name': tournament_result.tournament_name,
-                        'position': tournament_result.position,
-                        'point_earned': tournament_result.point_earned,
-                        'ranking_point_earned': tournament_result.ranking_point_earned,
-                    })
-            except models.UserProfile.DoesNotExist:
-                errors.append({
-                    'index': idx, 
-                    'username': result_data['username'], 
-                    'error': f"User with username '{result_data['username']}' does not exist"
-                })
-            except Exception as exc:
-                errors.append({
-                    'index': idx, 
-                    'username': result_data['username'], 
-                    'error': str(exc)
-                })
+        results, errors = tournaments.ingest_results(tournament_name, results_data, all_or_nothing=all_or_nothing)
 
-        status_code = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        if errors and all_or_nothing:
+            status_code = status.HTTP_400_BAD_REQUEST
+        else:
+            status_code = status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
         return Response({
             'message': _('Tournament results processed'),
             'tournament_name': tournament_name,
@@ -311,6 +327,46 @@ class AdminTournamentBulkUpdateAPIView(APIView):
             'errors': errors
         }, status=status_code)
     
+class AdminTournamentImportAPIView(APIView):
+    """
+    API view for admin to import tournament results from a CSV or NDJSON export.
+    The file is processed in chunks in the background; poll the returned job for progress.
+    CSV columns: username, position, point_earned, ranking_point_earned
+    """
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        serializer = serializers.TournamentImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = serializer.validated_data['file']
+        job = models.TournamentImportJob(
+            tournament_name=serializer.validated_data['tournament_name'],
+            file_format=serializer.validated_data.get('file_format') or imports.detect_format(upload.name),
+            chunk_size=serializer.validated_data['chunk_size'],
+            created_by=request.user,
+        )
+        job.source.save(upload.name, upload, save=False)
+        job.save()
+        imports.start_import(job)
+
+        return Response({
+            'message': _('Tournament import started'),
+            'job': serializers.TournamentImportJobSerializer(job).data,
+        }, status=status.HTTP_202_ACCEPTED)
+
+class AdminTournamentImportJobAPIView(APIView):
+    """
+    API view for admin to poll the progress of a tournament import.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(models.TournamentImportJob, id=job_id)
+        return Response(serializers.TournamentImportJobSerializer(job).data, status=status.HTTP_200_OK)
+    
 class AdminUserUpdateAPIView(APIView):
     """
     API view for admin to update user profile.
@@ -386,26 +442,68 @@ class UserAPIView(APIView):
 
 class PointTransactionHistoryAPIView(APIView):
     """
-    API view for users to view their point transactions.
+    API view for users to view their point transactions, newest first.
+    Filters: ?from= and ?to= (ISO dates or datetimes, inclusive), ?sign=earned|spent.
+    Follow next_cursor for the next page. Staff may pass ?user_id= (or ?user=<username>).
     """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    ordering = ['-created_at', '-id']
 
     def get (self, request):
-        if (request.user.is_staff or request.user.is_superuser) and "user" in request.query_params:
-            user = request.query_params.get("user")
-            transactions = models.PointTransaction.objects.filter(user__username=user)
-        else:
-            transactions = models.PointTransaction.objects.filter(user=request.user)
+        params = request.query_params
+        user_id, username = request.user.id, request.user.username
+        # Staff flags come from the user row (at most TOKEN_USER_CACHE_SECONDS old), never from token claims
+        if request.user.is_staff or request.user.is_superuser:
+            try:
+                if params.get('user_id'):
+                    user_id = int(params['user_id'])
+                    username = models.UserProfile.objects.filter(id=user_id).values_list('username', flat=True).first()
+                elif params.get('user'):
+                    username = params['user']
+                    user_id = models.UserProfile.objects.filter(username=username).values_list('id', flat=True).first()
+            except ValueError:
+                return Response({'message': _('Invalid user id')}, status=status.HTTP_400_BAD_REQUEST)
+            if user_id is None or username is None:
+                return Response({'message': _('User not found')}, status=status.HTTP_404_NOT_FOUND)
+
+        # Filtering on user_id directly, without a join, is served by the (user, created_at) index
+        transactions = models.PointTransaction.objects.filter(user_id=user_id)
+        try:
+            since, until = filters.date_range(params.get('from'), params.get('to'))
+            page_size = pagination.get_page_size(params, default=50, maximum=200)
+        except ValueError:
+            return Response({'message': _('Invalid date range or page size')}, status=status.HTTP_400_BAD_REQUEST)
+        transactions = filters.filter_created(transactions, since, until)
 
-        serializer = serializers.PointTransactionSerializer(transactions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        sign = params.get('sign')
+        if sign == 'earned':
+            transactions = transactions.filter(points__gt=0)
+        elif sign == 'spent':
+            transactions = transactions.filter(points__lt=0)
+        elif sign:
+            return Response({'message': _('Invalid sign filter')}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows, next_cursor = pagination.paginate(transactions, self.ordering, params.get('cursor'), page_size)
+        except pagination.InvalidCursor:
+            return Response({'message': _('Invalid cursor')}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'username': username,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'results': serializers.PointHistorySerializer(rows, many=True).data,
+        }, status=status.HTTP_200_OK)
 
 class RedeemRewardAPIView(APIView):
     """
     API view for users to redeem rewards.
+    Send an Idempotency-Key header to make retries safe.
     """
     permission_classes = [IsAuthenticated]
 
+    @idempotency.idempotent('redeem_reward')
     def post(self, request):
         serializer = serializers.RewardRedemptionSerializer(data=request.data, context={'request': request})
         if not serializer.is_valid():
@@ -427,44 +525,116 @@ class RedeemRewardAPIView(APIView):
     
 class AdminRedemptionAPIView(APIView):
     """
-    API view for admin to confirm or reject reward redemptions.
+    API view for admin to confirm reward redemptions.
+    Stock and points are taken with conditional updates in one transaction.
     """
     permission_classes = [permissions.IsStaffUser]
     def post(self, request, redemption_id):
-        redemption = get_object_or_404(models.RewardRedemption, id=redemption_id)
+        get_object_or_404(models.RewardRedemption, id=redemption_id)
+        try:
+            redemptions.confirm_redemption(redemption_id)
+        except redemptions.RedemptionError as exc:
+            return Response({'message': exc.message}, status=status.HTTP_400_BAD_REQUEST)
 
-        if redemption.status != 'pending':
-            return Response({'message': _('This redemption has already been processed')}, status=status.HTTP_400_BAD_REQUEST)
-        
-        user = redemption.user
-        reward = redemption.reward
+        return Response({
+            'message': _('Redemption confirmed successfully'),
+        }, status=status.HTTP_200_OK)
 
-        if user.point < reward.cost:
-            return Response({'message': _('User does not have enough points to redeem this reward')}, status=status.HTTP_400_BAD_REQUEST)
-        if reward.stock <= 0:
-            return Response({'message': _('This reward is out of stock')}, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Update user's points and reward stock
-        user.point -= reward.cost
-        user.save()
-        reward.stock -= 1
-        reward.save()
+class RewardListAPIView(APIView):
+    """
+    API view for listing rewards with their stock.
+    Authenticated users also get an affordable flag and their current balance.
+    """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
+    permission_classes = [AllowAny]
 
-        # Update redemption status
-        redemption.status = 'completed'
-        redemption.save()
+    def get(self, request):
+        results = [rewards.with_flags(reward, request.user) for reward in rewards.snapshot()]
+        data = {'results': results}
+        if request.user.is_authenticated:
+            data['balance'] = request.user.point
+        return Response(data, status=status.HTTP_200_OK)
 
-        # Record point transaction as spent
-        models.PointTransaction.objects.create(
-            user=user,
-            points=-reward.cost,
-            description=f"Redeemed: {reward.name}"
-        )
+class RewardDetailAPIView(APIView):
+    """
+    API view for getting a reward.
+    """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request, reward_id):
+        reward = next((reward for reward in rewards.snapshot() if reward['id'] == reward_id), None)
+        if reward is None:
+            return Response({'message': _('Reward not found')}, status=status.HTTP_404_NOT_FOUND)
+        return Response(rewards.with_flags(reward, request.user), status=status.HTTP_200_OK)
 
+class AdminRedemptionQueueAPIView(APIView):
+    """
+    API view for admin to page through reward redemptions, oldest first.
+    Filters: ?status= (default pending), ?reward=<id>, ?user=<id>. Follow next_cursor for the next page.
+    Also returns the number of pending redemptions per reward.
+    """
+    permission_classes = [permissions.IsStaffUser]
+    ordering = ['redeemed_at', 'id']
+
+    def get(self, request):
+        params = request.query_params
+        redemption_status = params.get('status', 'pending')
+        if redemption_status not in dict(models.Status_CHOICES):
+            return Response({'message': _('Invalid status')}, status=status.HTTP_400_BAD_REQUEST)
+        queue = models.RewardRedemption.objects.filter(status=redemption_status).select_related('user', 'reward')
+        try:
+            if params.get('reward'):
+                queue = queue.filter(reward_id=int(params['reward']))
+            if params.get('user'):
+                queue = queue.filter(user_id=int(params['user']))
+            page_size = pagination.get_page_size(params, default=50, maximum=200)
+        except ValueError:
+            return Response({'message': _('Invalid filter')}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            rows, next_cursor = pagination.paginate(queue, self.ordering, params.get('cursor'), page_size)
+        except pagination.InvalidCursor:
+            return Response({'message': _('Invalid cursor')}, status=status.HTTP_400_BAD_REQUEST)
+
+        pending_by_reward = (
+            models.RewardRedemption.objects.filter(status='pending')
+            .values('reward_id', 'reward__name').annotate(pending=Count('id')).order_by('reward_id')
+        )
         return Response({
-            'message': _('Redemption confirmed successfully'),
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'results': serializers.AdminRedemptionSerializer(rows, many=True).data,
+            'pending_by_reward': [
+                {'reward_id': row['reward_id'], 'reward_name': row['reward__name'], 'pending': row['pending']}
+                for row in pending_by_reward
+            ],
         }, status=status.HTTP_200_OK)
-    
+
+class AdminBulkRedemptionAPIView(APIView):
+    """
+    API view for admin to confirm a batch of pending redemptions, oldest first.
+    Request format: {"redemption_ids": [1, 2, 3]} or {"limit": 100} to take the head of the queue.
+    Given ids are all processed; limit only applies without them.
+    Redemptions that cannot be confirmed stay pending and are reported (207).
+    """
+    permission_classes = [permissions.IsStaffUser]
+
+    def post(self, request):
+        serializer = serializers.RedemptionBulkConfirmSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        confirmed_ids, errors = redemptions.confirm_queue(
+            serializer.validated_data.get('redemption_ids'),
+            limit=serializer.validated_data['limit'],
+        )
+        return Response({
+            'message': _('Redemptions processed'),
+            'confirmed': confirmed_ids,
+            'errors': [{'redemption_id': redemption_id, 'error': error} for redemption_id, error in sorted(errors.items())]
+        }, status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
+
 class AdminCancelRedemptionAPIView(APIView):
     """
     API view for admin to cancel reward redemptions.
@@ -474,99 +644,144 @@ class AdminCancelRedemptionAPIView(APIView):
     def post(self, request, redemption_id):
         redemption = get_object_or_404(models.RewardRedemption, id=redemption_id)
 
-        if redemption.status != 'pending':
+        # Only moves a redemption that is still pending, even under concurrent confirms
+        try:
+            cancelled = models.RewardRedemption.objects.filter(id=redemption.id, status='pending').update(status='cancelled')
+        except IntegrityError:
+            cancelled = 0
+        if not cancelled:
             return Response({'message': _('This redemption cannot be cancelled')}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Update redemption status to cancelled
-        redemption.status = 'cancelled'
-        redemption.save()
-
         return Response({
             'message': _('Redemption cancelled successfully'),
         }, status=status.HTTP_200_OK)
         
     
+class AdminLedgerExportAPIView(APIView):
+    """
+    API view for admin to download a ledger table (point_transactions, tournament_results
+    or reward_redemptions) as ?file_format=csv|ndjson, streamed oldest first.
+    Filters: ?from= and ?to= (ISO dates or datetimes, inclusive), or ?year= and ?month=.
+    """
+    permission_classes = [permissions.IsStaffUser]
+
+    def get(self, request, kind):
+        params = request.query_params
+        if kind not in exports.EXPORTS:
+            return Response({'message': _('Unknown export')}, status=status.HTTP_404_NOT_FOUND)
+        file_format = params.get('file_format', 'csv')
+        if file_format not in exports.FORMATS:
+            return Response({'message': _('Invalid file format')}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if params.get('year') or params.get('month'):
+                since, until = ranking.month_bounds(int(params['year']), int(params['month']))
+            else:
+                since, until = filters.date_range(params.get('from'), params.get('to'))
+        except (KeyError, ValueError):
+            return Response({'message': _('Invalid date range')}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            exports.stream(kind, file_format, since, until), content_type=exports.FORMATS[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exports.filename(kind, file_format, since, until)}"'
+        return response
+
 # Order API Views
 
 class CreateOrderAPIView(APIView):
     """
     API view for creating an order.
+    The whole order is written in one transaction; stock is only decremented if every item is available.
+    Send an Idempotency-Key header to make retries safe.
     """
     permission_classes = [IsAuthenticated]
 
-    def post(self, request):
-        order = models.Order.objects.create(user=request.user, total_price=0)
-
-        items_data = request.data.get('items', [])
-        total_price = 0
+    def create_order(self, request):
+        return orders.create_order(request.user, request.data.get('items', []))
 
-        for item in items_data:
-            product_type = item.get('product_type')
-            product_id = item.get('product_id')
-            quantity = item.get('quantity', 1)
-
-            if product_type == 'card':
-                product = get_object_or_404(models.Card, id=product_id)
-            elif product_type == 'booster':
-                product = get_object_or_404(models.Booster, id=product_id)
-            else:
-                return Response({'message': _('Invalid product type')}, status=status.HTTP_400_BAD_REQUEST)
-            
-            if product.stock < quantity:
-                return Response({'message': _('Insufficient stock for product')}, status=status.HTTP_400_BAD_REQUEST)
-            
-            price = product.price * quantity
-            total_price += price
-
-            #Reduce stock
-            product.stock -= quantity
-            product.save()
-
-            # Create order item
-            order_item = models.OrderItem.objects.create(
-                order=order,
-                product_type=product_type,
-                product_id=product_id,
-                quantity=quantity,
-                price=price
-            )
+    @idempotency.idempotent('create_order')
+    def post(self, request):
+        try:
+            order, order_items = self.create_order(request)
+        except orders.OrderError as exc:
+            return Response({'message': exc.message}, status=exc.status_code)
 
-        # Update order total price
-        order.total_price = total_price
-        order.save()
+        # Re-read the lines: bulk_create does not return primary keys on MySQL
+        order_items = list(order.items.all())
 
         return Response({
             'message': _('Order created successfully'),
             'order_id': order.id,
             'total_price': order.total_price,
-            'items': serializers.OrderItemSerializer(order.items.all(), many=True).data
+            'items': serializers.OrderItemSerializer(
+                order_items, many=True, context={'product_names': orders.product_names(order_items)}
+            ).data
         }, status=status.HTTP_201_CREATED)
     
+class CartHoldsAPIView(APIView):
+    """
+    API view for the stock holds of the user's cart.
+    POST {'items': [...]} holds stock for the items and renews every hold's expiry,
+    GET lists the active holds and DELETE releases them all.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        holds = reservations.active_holds(request.user)
+        return Response({'holds': serializers.StockHoldSerializer(holds, many=True).data}, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        try:
+            expires_at = reservations.place_holds(request.user, request.data.get('items', []))
+        except orders.OrderError as exc:
+            return Response({'message': exc.message}, status=exc.status_code)
+        holds = reservations.active_holds(request.user)
+        return Response({
+            'message': _('Stock held successfully'),
+            'expires_at': expires_at,
+            'holds': serializers.StockHoldSerializer(holds, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+    def delete(self, request):
+        released = reservations.release_holds(request.user)
+        return Response({'message': _('Holds released'), 'released': released}, status=status.HTTP_200_OK)
+
+class CheckoutAPIView(CreateOrderAPIView):
+    """
+    API view for turning the cart's active stock holds into an order.
+    """
+    def create_order(self, request):
+        return reservations.checkout(request.user)
+
 class UserOrderView(APIView):
     """
     API view for users to view all their orders.
     """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        orders = models.Order.objects.filter(user=request.user).order_by('-created_at')
-        serializer = serializers.OrderSerializer(orders, many=True)
+        user_orders = list(models.Order.objects.filter(user_id=request.user.id).prefetch_related('items').order_by('-created_at'))
+        serializer = serializers.OrderSerializer(user_orders, many=True, context=orders.serializer_context(user_orders))
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 class OrderDetailView(APIView):
     """
     API view for users to view details of a specific order.
     """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, order_id):
-        order = get_object_or_404(models.Order, id=order_id, user=request.user)
-        serializer = serializers.OrderSerializer(order)
+        order = get_object_or_404(models.Order.objects.prefetch_related('items'), id=order_id, user_id=request.user.id)
+        serializer = serializers.OrderSerializer(order, context=orders.serializer_context([order]))
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 class CancelOrderAPIView(APIView):
     """
     API view for users to cancel an order.
+    Users may cancel their own pending orders; staff may also cancel confirmed ones.
+    The order's stock is returned in the same transaction.
     """
     permission_classes = [IsAuthenticated]
 
@@ -579,63 +794,255 @@ class CancelOrderAPIView(APIView):
         if order.status == 'cancelled':
             return Response({'message': _('Order is already cancelled')}, status=status.HTTP_400_BAD_REQUEST)
 
-        if order.status != 'pending':
-            return Response({'message': _('Only pending orders can be cancelled')}, status=status.HTTP_400_BAD_REQUEST)
-        
-        #Update order status
-        order.status = 'cancelled'
-        order.save()
+        cancellable = models.Order.objects.filter(id=order.id)
+        if not request.user.is_staff and not request.user.is_superuser:
+            cancellable = cancellable.filter(status='pending')
+        changed_ids, errors = orders.transition_orders(cancellable, 'cancelled')
+        if not changed_ids:
+            message = errors.get(order.id, _('Only pending orders can be cancelled'))
+            return Response({'message': message}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             'message': _('Order cancelled successfully'),
             'order_id': order.id
         }, status=status.HTTP_200_OK)
+
+class OrderTransitionAPIView(APIView):
+    """
+    Base view for moving one order to `new_status`.
+    """
+    permission_classes = [permissions.CanConfirmOrder]
+    new_status = None
+    success_message = None
+
+    def post(self, request, order_id):
+        order = get_object_or_404(models.Order, id=order_id)
+        changed_ids, errors = orders.transition_orders(models.Order.objects.filter(id=order.id), self.new_status)
+        if not changed_ids:
+            return Response({'message': errors[order.id]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': self.success_message,
+            'order_id': order.id,
+            'status': self.new_status
+        }, status=status.HTTP_200_OK)
+
+class ConfirmOrderAPIView(OrderTransitionAPIView):
+    """
+    API view for staff to confirm a pending order.
+    """
+    new_status = 'confirmed'
+    success_message = gettext_lazy('Order confirmed successfully')
+
+class CompleteOrderAPIView(OrderTransitionAPIView):
+    """
+    API view for staff to mark a confirmed order as completed.
+    """
+    new_status = 'completed'
+    success_message = gettext_lazy('Order completed successfully')
+
+class AdminBulkOrderStatusAPIView(APIView):
+    """
+    API view for staff to confirm, complete or cancel many orders at once.
+    Request format: {"order_ids": [1, 2, 3], "action": "confirm" | "complete" | "cancel"}
+    Valid transitions are applied together; invalid ones are reported per order (207).
+    """
+    permission_classes = [permissions.CanConfirmOrder]
+
+    def post(self, request):
+        serializer = serializers.OrderBulkStatusSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        order_ids = set(serializer.validated_data['order_ids'])
+        new_status = serializers.OrderBulkStatusSerializer.ACTIONS[serializer.validated_data['action']]
+        changed_ids, errors = orders.transition_orders(models.Order.objects.filter(id__in=order_ids), new_status)
+        for order_id in order_ids - set(changed_ids) - set(errors):
+            errors[order_id] = _('Order not found')
+
+        return Response({
+            'message': _('Orders processed'),
+            'status': new_status,
+            'updated': changed_ids,
+            'errors': [{'order_id': order_id, 'error': error} for order_id, error in sorted(errors.items())]
+        }, status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_200_OK)
+        
+# Catalog API Views
+
+class CachedCatalogAPIView(APIView):
+    """
+    Base view for catalog reads served from the catalog cache with strong ETags.
+    Subclasses define build(request, ...), returning (data, products) or an error
+    Response, which is never cached. A matching If-None-Match is answered with 304.
+    """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        key = catalog.cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            built = self.build(request, *args, **kwargs)
+            if isinstance(built, Response):
+                return built
+            data, products = built
+            cached = (data, catalog.etag(products))
+            cache.set(key, cached, catalog.CACHE_TIMEOUT)
+
+        data, etag = cached
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        return Response(data, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+class CatalogListAPIView(CachedCatalogAPIView):
+    """
+    Base view for browsing a product catalog with filters and keyset pagination.
+    Filters: min_price, max_price, in_stock plus the model's exact-match fields.
+    Ordering: ?ordering=id|-id|price|-price. Follow next_cursor for the next page.
+    """
+    model = None
+    serializer_class = None
+    filter_fields = []
+
+    def build(self, request):
+        try:
+            page_size = pagination.get_page_size(request.query_params)
+            ordering = catalog.get_ordering(request.query_params)
+            products = catalog.filter_products(self.model.objects.all(), request.query_params, self.filter_fields)
+            rows, next_cursor = pagination.paginate(products, ordering, request.query_params.get('cursor'), page_size)
+        except pagination.InvalidCursor:
+            return Response({'message': _('Invalid cursor')}, status=status.HTTP_400_BAD_REQUEST)
+        except catalog.CatalogFilterError as exc:
+            return Response({'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'message': _('Invalid page size')}, status=status.HTTP_400_BAD_REQUEST)
+
+        return {
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'results': self.serializer_class(rows, many=True).data,
+        }, rows
+
+class CardListAPIView(CatalogListAPIView):
+    """
+    API view for browsing cards. Extra filters: rarity, card_code, version.
+    """
+    model = models.Card
+    serializer_class = serializers.CardSerializer
+    filter_fields = catalog.CARD_FILTERS
+
+class BoosterListAPIView(CatalogListAPIView):
+    """
+    API view for browsing boosters. Extra filters: booster_code, version.
+    """
+    model = models.Booster
+    serializer_class = serializers.BoosterSerializer
+    filter_fields = catalog.BOOSTER_FILTERS
+
+class CatalogDetailAPIView(CachedCatalogAPIView):
+    """
+    Base view for a single catalog product.
+    """
+    model = None
+    serializer_class = None
+
+    def build(self, request, product_id):
+        product = self.model.objects.filter(id=product_id).first()
+        if product is None:
+            return Response({'message': _('Product not found')}, status=status.HTTP_404_NOT_FOUND)
+        return self.serializer_class(product).data, [product]
+
+class CardDetailAPIView(CatalogDetailAPIView):
+    """
+    API view for getting a card.
+    """
+    model = models.Card
+    serializer_class = serializers.CardSerializer
+
+class BoosterDetailAPIView(CatalogDetailAPIView):
+    """
+    API view for getting a booster.
+    """
+    model = models.Booster
+    serializer_class = serializers.BoosterSerializer
+
+class CatalogSearchAPIView(CachedCatalogAPIView):
+    """
+    API view for ranked, typo-tolerant search over cards and boosters by name or set code.
+    ?q= is required; ?type=card|booster narrows the search; ?limit= caps the results.
+    """
+    serializer_classes = {
+        models.Card: serializers.CardSerializer,
+        models.Booster: serializers.BoosterSerializer,
+    }
+
+    def build(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < 2:
+            return Response({'message': _('Query must be at least 2 characters')}, status=status.HTTP_400_BAD_REQUEST)
+        product_type = request.query_params.get('type')
+        if product_type and product_type not in orders.PRODUCT_MODELS:
+            return Response({'message': _('Invalid product type')}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = pagination.get_page_size(request.query_params, maximum=50, param='limit')
+        except ValueError:
+            return Response({'message': _('Invalid limit')}, status=status.HTTP_400_BAD_REQUEST)
+
+        models_to_search = [orders.PRODUCT_MODELS[product_type]] if product_type else None
+        matches = search.search(query, models_to_search, limit=limit)
+        results = []
+        for instance, score in matches:
+            data = self.serializer_classes[type(instance)](instance).data
+            data['product_type'] = instance._meta.model_name
+            data['score'] = round(score, 3)
+            results.append(data)
+        return {'results': results}, [instance for instance, _score in matches]
         
 # Ranking API Views        
 class MonthlyRankingAPIView(APIView):
     """
     API view for getting monthly ranking.
+    Pages with ?page= by default; pass ?pagination=cursor (first page) or
+    ?cursor=<next_cursor> to seek by (ranking_earned, user id) instead.
+    In cursor mode the total is only returned with ?include_total=true.
     """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
     permission_classes = [AllowAny]
 
     def get(self, request):
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        page = int(request.query_params.get('page', 1))
-        page_size = int(request.query_params.get('page_size', 10))
-
         # Validate date parameters
         try:
-            start = timezone.datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
-            if month == 12:
-                end = timezone.datetime(year + 1, 1, 1, tzinfo=timezone.get_current_timezone())
-            else:
-                end = timezone.datetime(year, month + 1, 1, tzinfo=timezone.get_current_timezone())
+            year = int(request.query_params.get('year', timezone.now().year))
+            month = int(request.query_params.get('month', timezone.now().month))
+            ranking.month_bounds(year, month)
         except ValueError:
             return Response(
                 {'error': _('Invalid year or month')}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Use TournamentResult to compute monthly ranking points earned
-        qs = models.TournamentResult.objects.filter(created_at__gte=start, created_at__lt=end)
+        # Read from the precomputed monthly ranking table (indexed on year, month, ranking_earned, user)
+        qs = models.MonthlyRanking.objects.filter(year=year, month=month).select_related('user').order_by(*ranking.ORDERING)
+
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = pagination.get_page_size(request.query_params, default=10)
+            if page < 1:
+                raise ValueError(page)
+        except ValueError:
+            return Response({'error': _('Invalid page or page size')}, status=status.HTTP_400_BAD_REQUEST)
+
+        cursor = request.query_params.get('cursor')
+        if cursor is not None or request.query_params.get('pagination') == 'cursor':
+            return self.get_cursor_page(request, qs, year, month, cursor, page_size)
 
-        aggregated = qs.values('user__username', 'user__nickname').annotate(
-            ranking_earned=Sum('ranking_point_earned')
-        ).order_by('-ranking_earned')
-        
         # Manual pagination
-        total_items = aggregated.count()
+        total_items = ranking.ranked_count(year, month)
         total_pages = (total_items + page_size - 1) // page_size
         start_idx = (page - 1) * page_size
         end_idx = start_idx + page_size
         
-        results = []
-        for row in aggregated[start_idx:end_idx]:
-            results.append({
-                'nickname': row['user__nickname'],
-                'ranking_earned': row['ranking_earned'] or 0,
-            })
+        results = [self.serialize_row(row) for row in qs[start_idx:end_idx]]
 
         return Response({
             'year': year,
@@ -647,12 +1054,37 @@ class MonthlyRankingAPIView(APIView):
             'results': results
         }, status=status.HTTP_200_OK)
 
+    def get_cursor_page(self, request, qs, year, month, cursor, page_size):
+        try:
+            rows, next_cursor = pagination.paginate(qs, ranking.ORDERING, cursor, page_size)
+        except pagination.InvalidCursor:
+            return Response({'error': _('Invalid cursor')}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {
+            'year': year,
+            'month': month,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'results': [self.serialize_row(row) for row in rows],
+        }
+        if request.query_params.get('include_total') in ('1', 'true'):
+            data['total_items'] = ranking.ranked_count(year, month)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def serialize_row(self, row):
+        return {
+            'rank': row.rank,
+            'nickname': row.user.nickname,
+            'ranking_earned': row.ranking_earned,
+        }
+
 class UserRankingAPIView(APIView):
     """
     API View for getting a user's ranking information for a specific month/year.
     Accepts username, year, and month parameters.
-    Returns only nickname and ranking_point_earned for privacy.
+    Returns only nickname, ranking_point_earned, rank and percentile for privacy.
     """
+    authentication_classes = [authentication.StatelessJWTAuthentication]
     permission_classes = [AllowAny]
     
     def get(self, request):
@@ -671,26 +1103,18 @@ class UserRankingAPIView(APIView):
         
         user = get_object_or_404(models.UserProfile, username=username)
 
-        # Calculate ranking points for the specified month/year
         try:
-            start_of_month = timezone.datetime(year, month, 1, tzinfo=timezone.get_current_timezone())
-            if month == 12:
-                end_of_month = timezone.datetime(year + 1, 1, 1, tzinfo=timezone.get_current_timezone())
-            else:
-                end_of_month = timezone.datetime(year, month + 1, 1, tzinfo=timezone.get_current_timezone())
+            ranking.month_bounds(year, month)
         except ValueError:
             return Response({'error': _('Invalid year or month')}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get ranking points for the specified period
-        ranking_points = models.TournamentResult.objects.filter(
-            user=user,
-            created_at__gte=start_of_month,
-            created_at__lt=end_of_month
-        ).aggregate(
-            total_ranking_points=Sum('ranking_point_earned')
-        )['total_ranking_points'] or 0
+        # Rank and percentile come from the in-memory order-statistics index
+        ranking_points, rank, percentile, total_ranked = leaderboard.lookup(year, month, user.id)
         
         return Response({
             'nickname': user.nickname,
-            'ranking_point_earned': ranking_points
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+            'ranking_point_earned': ranking_points or 0,
+            'rank': rank,
+            'percentile': percentile,
+            'total_ranked': total_ranked,
+        }, status=status.HTTP_200_OK)
@@ -107,6 +107,19 @@ DATABASES = {
 }
 
 
+# Cache (catalog responses, ranking counts, throttling)
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend (file, Redis, Memcached) in production so invalidation reaches every worker;
+# with the per-process default, catalog pages are cached for seconds only (Backend.catalog)
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ytg'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -163,6 +176,10 @@ REST_FRAMEWORK = {
 
 
 
+# Tournament imports run in a background thread; disable to process them inside the request
+TOURNAMENT_IMPORT_ASYNC = config('TOURNAMENT_IMPORT_ASYNC', default=True, cast=bool)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 